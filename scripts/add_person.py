@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Launcher script for the add-person command.
+This script runs the add-person command of src/cli.py in-process,
+allowing users to enroll people without re-encoding the dataset from the project root.
+"""
+import os
+import sys
+
+# Add the project root to the path so the tools import without a subprocess
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.cli import main as cli_main
+
+def main():
+    """
+    Run the add-person command with the command-line arguments.
+    
+    Returns:
+        int: Exit code of the command
+    """
+    return cli_main(sys.argv[1:], command="add-person")
+
+if __name__ == "__main__":
+    sys.exit(main())
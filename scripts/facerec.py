@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Single entry point for all tools.
+This script runs src/cli.py in-process, allowing users to run every tool
+as a subcommand from the project root, e.g.
+python -m scripts.facerec attendance --source 0
+"""
+import os
+import sys
+
+# Add the project root to the path so the tools import without a subprocess
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.cli import main as cli_main
+
+def main():
+    """
+    Run the subcommand given on the command line.
+    
+    Returns:
+        int: Exit code of the command
+    """
+    return cli_main(sys.argv[1:])
+
+if __name__ == "__main__":
+    sys.exit(main())
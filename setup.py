@@ -14,13 +14,13 @@ import platform
 
 def check_python_version():
     """
-    Check if Python version is 3.6 or higher.
+    Check if Python version is 3.7 or higher.
     
     Returns:
         bool: True if Python version is compatible
     """
-    if sys.version_info < (3, 6):
-        print("[❌] Python 3.6 or higher is required.")
+    if sys.version_info < (3, 7):
+        print("[❌] Python 3.7 or higher is required.")
         sys.exit(1)
     print(f"[✅] Python version: {sys.version.split()[0]}")
     print(f"[INFO] Running on: {platform.system()} {platform.release()}")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Attendance reports from the SQLite attendance store.
+This script answers per-person, per-day and date range questions from the
+attendance database, and imports or exports the daily CSV files.
+"""
+import os
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.attendance_db import AttendanceDatabase
+
+def print_table(header, rows):
+    """Print rows as aligned columns."""
+    widths = [max([len(str(h))] + [len(str(row[i])) for row in rows]) for i, h in enumerate(header)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(header, widths)))
+    for row in rows:
+        print("  ".join(str(v).ljust(w) for v, w in zip(row, widths)))
+
+def run_report(args):
+    """Run one report subcommand against the database."""
+    if args.command != "import" and not os.path.exists(args.db):
+        print(f"❌ Attendance database not found: {args.db}")
+        print("Run the attendance system with --attendance-db or import CSV files first.")
+        return 1
+
+    database = AttendanceDatabase(args.db)
+    start = time.perf_counter()
+    try:
+        if args.command == "person":
+            rows = database.person_report(args.name, args.start, args.end)
+            print_table(["Date", "First seen", "Last seen", "Events"], rows)
+            print(f"[INFO] {args.name} attended on {len(rows)} days.")
+        elif args.command == "day":
+            rows = database.day_report(args.date)
+            print_table(["Name", "First seen", "Last seen", "Events"], rows)
+            print(f"[INFO] {len(rows)} people attended on {args.date}.")
+        elif args.command == "range":
+            rows = database.range_report(args.start, args.end)
+            print_table(["Name", "Days", "First seen", "Last seen"], rows)
+            print(f"[INFO] {len(rows)} people attended between {args.start or 'the start'} "
+                  f"and {args.end or 'today'}.")
+        elif args.command == "import":
+            files, added = database.import_csv(args.paths)
+            print(f"[INFO] Imported {added} new events from {files} files into {args.db}")
+        elif args.command == "export":
+            written = database.export_csv(args.output_dir, args.start, args.end)
+            print(f"[INFO] Exported {len(written)} daily files to {args.output_dir}")
+    finally:
+        database.close()
+    print(f"[INFO] Done in {(time.perf_counter() - start) * 1000.0:.1f} ms.")
+    return 0
+
+def main():
+    """Parse arguments and run an attendance report."""
+    from cli import main as cli_main
+    return cli_main(command="report")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for encoding, matching, detection and the live loop.
+Everything runs on synthetic data (or a folder of images), so the suite
+needs no camera, GPU or network: galleries from 100 to 1M embeddings,
+face-like frames drawn with OpenCV and a throwaway dataset written to a
+temporary folder. Results are written as JSON and can be compared with a
+saved baseline, which flags every measurement that got slower.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+
+import cv2
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.ann_index import IVFIndex
+from utils.detectors import DETECTORS, create_detector, benchmark_detectors
+from utils.face_utils import encode_images, recognize_frame
+from utils.matcher import UNKNOWN_NAME, FaceMatcher, ShardedMatcher
+from utils.synthetic import synthetic_frames, synthetic_gallery, synthetic_queries
+
+SUITES = ("encode", "match", "detect", "end-to-end")
+DEFAULT_SIZES = [100, 1000, 10000, 100000, 1000000]
+QUICK_SIZES = [100, 1000, 10000]
+
+def _result(name, value, unit, better="lower", **details):
+    """One measurement; name identifies it across runs for baseline comparison."""
+    return dict({"name": name, "value": round(float(value), 4), "unit": unit, "better": better}, **details)
+
+def _percentiles(timings_ms):
+    """Mean, p50 and p95 of a list of timings in milliseconds."""
+    timings = np.asarray(timings_ms)
+    return {
+        "mean_ms": round(float(timings.mean()), 4),
+        "p50_ms": round(float(np.percentile(timings, 50)), 4),
+        "p95_ms": round(float(np.percentile(timings, 95)), 4),
+    }
+
+def bench_encode(frames, detector="hog", workers=(1,)):
+    """
+    Measure encode throughput with encode_images on a temporary dataset.
+
+    Args:
+        frames (list): BGR frames written out as the dataset images
+        detector (str): Face detector backend
+        workers (iterable): Worker counts to measure
+
+    Returns:
+        list: Measurements
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as dataset:
+        paths = []
+        for i, frame in enumerate(frames):
+            path = os.path.join(dataset, f"image_{i:04d}.jpg")
+            cv2.imwrite(path, frame)
+            paths.append(path)
+
+        for count in workers:
+            start = time.perf_counter()
+            faces = sum(len(encodings) for encodings, _ in encode_images(paths, count, detector))
+            elapsed = time.perf_counter() - start
+            results.append(_result(f"encode/{detector}/workers={count}", len(paths) / elapsed, "images/s",
+                                   better="higher", images=len(paths), faces=faces, seconds=round(elapsed, 3)))
+            print(f"[INFO] encode {detector} x{count}: {len(paths) / elapsed:.1f} images/s ({faces} faces)")
+    return results
+
+def bench_match(sizes, faces=(1, 4), tolerance=0.5, index=False, nprobe=8, budget=2.0, shards=(), precisions=()):
+    """
+    Measure match latency against synthetic galleries of growing size.
+
+    Args:
+        sizes (iterable): Gallery sizes
+        faces (iterable): Faces matched per call
+        tolerance (float): Recognition tolerance
+        index (bool): Also measure IVF matching (and its agreement with exhaustive matching)
+        nprobe (int): IVF lists scanned per face
+        budget (float): Approximate seconds spent timing each configuration
+        shards (iterable): Shard counts to measure sharded exhaustive matching with
+        precisions (iterable): Quantized precisions ("float16", "int8") to measure
+
+    Returns:
+        list: Measurements
+    """
+    results = []
+    for size in sizes:
+        start = time.perf_counter()
+        gallery = synthetic_gallery(size)
+        queries, expected = synthetic_queries(gallery, 256)
+        print(f"[INFO] Generated a gallery of {size} embeddings in {time.perf_counter() - start:.1f}s")
+
+        matchers = [("exhaustive", FaceMatcher(gallery, tolerance=tolerance, nprobe=0))]
+        if index and size >= 1000:
+            start = time.perf_counter()
+            ivf = IVFIndex.build(gallery.embeddings, sample_size=min(size, 100000))
+            print(f"[INFO] Built an IVF index with {ivf.nlist} lists in {time.perf_counter() - start:.1f}s")
+            matchers.append((f"ivf-nprobe={nprobe}", FaceMatcher(gallery, tolerance=tolerance, index=ivf,
+                                                                  nprobe=nprobe)))
+        for count in shards:
+            if count > 1:
+                matchers.append((f"sharded={count}", ShardedMatcher(gallery, tolerance=tolerance, shards=count)))
+        for precision in precisions:
+            matchers.append((precision, FaceMatcher(gallery, tolerance=tolerance, nprobe=0, precision=precision)))
+
+        for kind, matcher in matchers:
+            if isinstance(matcher, FaceMatcher) and matcher.index is None:
+                # Bytes each exhaustive match reads: the scanned rows and their norms
+                scanned = (matcher.scan.nbytes if matcher.scan is not None
+                           else matcher.embeddings.nbytes + matcher.norms.nbytes)
+                results.append(_result(f"memory/{kind}/n={size}", scanned / 1e6, "MB"))
+                print(f"[INFO] {kind} n={size} scans {scanned / 1e6:.1f} MB")
+            names = [match.name for match in matcher.match(queries)]
+            accuracy = np.mean([(name if name != UNKNOWN_NAME else None) == want
+                                for name, want in zip(names, expected)])
+            for count in faces:
+                batches = [queries[i:i + count] for i in range(0, len(queries) - count + 1, count)]
+                matcher.match(batches[0])
+                timings = []
+                deadline = time.perf_counter() + budget
+                while len(timings) < 5 or (time.perf_counter() < deadline and len(timings) < 1000):
+                    batch = batches[len(timings) % len(batches)]
+                    t0 = time.perf_counter()
+                    matcher.match(batch)
+                    timings.append((time.perf_counter() - t0) * 1000.0)
+                stats = _percentiles(timings)
+                results.append(_result(f"match/{kind}/n={size}/faces={count}", stats["p50_ms"], "ms",
+                                       calls=len(timings), accuracy=round(float(accuracy), 4), **stats))
+                print(f"[INFO] match {kind} n={size} faces={count}: p50 {stats['p50_ms']:.3f} ms, "
+                      f"p95 {stats['p95_ms']:.3f} ms, accuracy {accuracy:.1%}")
+        del matchers, gallery
+    return results
+
+def bench_detectors(frames, names=None, repeat=3):
+    """
+    Measure detector latency per backend with benchmark_detectors.
+
+    Backends that cannot be set up (e.g. missing DNN model files) are skipped.
+
+    Args:
+        frames (list): BGR frames
+        names (iterable, optional): Backends to measure (default all)
+        repeat (int): Passes over the frames per backend
+
+    Returns:
+        list: Measurements
+    """
+    detectors = []
+    for name in names or DETECTORS:
+        try:
+            detector = create_detector(name)
+            if name == "dnn":
+                # Never pick up a GPU backend; results must be comparable across machines
+                detector.use_cpu()
+            detectors.append(detector)
+        except Exception as e:
+            print(f"[WARNING] Skipping {name} detector: {e}")
+
+    results = []
+    for result in benchmark_detectors(detectors, frames, repeat):
+        h, w = frames[0].shape[:2]
+        results.append(_result(f"detect/{result['detector']}/{w}x{h}", result["p50_ms"], "ms",
+                               mean_ms=round(result["mean_ms"], 4), p95_ms=round(result["p95_ms"], 4),
+                               faces_per_frame=round(result["faces_per_frame"], 3)))
+        print(f"[INFO] detect {result['detector']} {w}x{h}: p50 {result['p50_ms']:.2f} ms, "
+              f"{result['faces_per_frame']:.2f} faces/frame")
+    return results
+
+def bench_end_to_end(frames, detector="hog", gallery_size=1000, scale=0.25, tolerance=0.5):
+    """
+    Measure frames per second of detect, encode and match with recognize_frame.
+
+    Args:
+        frames (list): BGR frames
+        detector (str): Face detector backend
+        gallery_size (int): Synthetic gallery size
+        scale (float): Factor frames are resized by before detection
+        tolerance (float): Recognition tolerance
+
+    Returns:
+        list: Measurements
+    """
+    face_detector = create_detector(detector)
+    matcher = FaceMatcher(synthetic_gallery(gallery_size), tolerance=tolerance, nprobe=0)
+    recognize_frame(frames[0], face_detector, matcher, scale)
+
+    timings = []
+    faces = 0
+    for frame in frames:
+        t0 = time.perf_counter()
+        faces += len(recognize_frame(frame, face_detector, matcher, scale))
+        timings.append((time.perf_counter() - t0) * 1000.0)
+    stats = _percentiles(timings)
+    fps = 1000.0 / stats["mean_ms"] if stats["mean_ms"] > 0 else 0.0
+    print(f"[INFO] end-to-end {detector} scale={scale}: {fps:.1f} FPS, p95 {stats['p95_ms']:.2f} ms")
+    return [_result(f"end-to-end/{detector}/scale={scale}/n={gallery_size}", fps, "fps", better="higher",
+                    frames=len(frames), faces_per_frame=round(faces / float(len(frames)), 3), **stats)]
+
+def compare_with_baseline(results, baseline, threshold=10.0):
+    """
+    Compare measurements with a baseline report.
+
+    Args:
+        results (list): Measurements of this run
+        baseline (dict): Earlier report
+        threshold (float): Percent change that counts as a regression
+
+    Returns:
+        list: One comparison per measurement present in both runs
+    """
+    previous = {result["name"]: result for result in baseline.get("results", [])}
+    comparisons = []
+    for result in results:
+        before = previous.get(result["name"])
+        if before is None or not before["value"]:
+            continue
+        change = (result["value"] / before["value"] - 1.0) * 100.0
+        worse = change if result["better"] == "lower" else -change
+        comparisons.append({
+            "name": result["name"],
+            "baseline": before["value"],
+            "value": result["value"],
+            "unit": result["unit"],
+            "change_pct": round(change, 2),
+            "regression": worse > threshold,
+        })
+    return comparisons
+
+def run_benchmarks(suites=SUITES, sizes=None, images=None, frames=30, detector="hog", workers=0, index=False,
+                   output=None, baseline=None, threshold=10.0, shards=None, precisions=None):
+    """
+    Run the benchmark suites and write the JSON report.
+
+    Args:
+        suites (iterable): Suites to run, from SUITES
+        sizes (list, optional): Gallery sizes for the match suite
+        images (str, optional): Folder of images to use instead of synthetic frames
+        frames (int): Number of frames
+        detector (str): Detector backend for the encode and end-to-end suites
+        workers (int): Encoding processes to compare with one (0 for all CPU cores)
+        index (bool): Also benchmark IVF matching
+        output (str, optional): JSON report file
+        baseline (str, optional): Earlier report to compare with
+        threshold (float): Percent slowdown that counts as a regression
+        shards (list, optional): Shard counts to benchmark sharded matching with
+        precisions (list, optional): Quantized precisions to benchmark matching with
+
+    Returns:
+        int: 0, or 1 if a measurement regressed past the threshold
+    """
+    if images:
+        from detect_faces_live import load_benchmark_frames
+        frame_list = load_benchmark_frames(images, frames)
+        if not frame_list:
+            print(f"❌ No images found in {images}")
+            return 1
+    else:
+        frame_list = synthetic_frames(frames)
+    workers = workers or os.cpu_count() or 1
+
+    results = []
+    if "encode" in suites:
+        results += bench_encode(frame_list, detector, sorted({1, workers}))
+    if "match" in suites:
+        results += bench_match(sizes or DEFAULT_SIZES, index=index, shards=shards or (),
+                               precisions=precisions or ())
+    if "detect" in suites:
+        results += bench_detectors(frame_list)
+    if "end-to-end" in suites:
+        results += bench_end_to_end(frame_list, detector)
+
+    report = {
+        "time": time.time(),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "cpus": os.cpu_count(),
+        },
+        "frames": "synthetic" if not images else os.path.abspath(images),
+        "results": results,
+    }
+
+    regressions = 0
+    if baseline:
+        with open(baseline) as f:
+            comparisons = compare_with_baseline(results, json.load(f), threshold)
+        report["baseline"] = {"file": baseline, "threshold_pct": threshold, "comparisons": comparisons}
+        print(f"\n{'benchmark':<48}{'baseline':>12}{'now':>12}{'change':>10}")
+        for comparison in comparisons:
+            flag = "  ❌" if comparison["regression"] else ""
+            print(f"{comparison['name']:<48}{comparison['baseline']:>12.3f}{comparison['value']:>12.3f}"
+                  f"{comparison['change_pct']:>+9.1f}%{flag}")
+        regressions = sum(comparison["regression"] for comparison in comparisons)
+        if regressions:
+            print(f"❌ {regressions} measurement(s) regressed by more than {threshold}%.")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[INFO] Results written to {output}")
+    return 1 if regressions else 0
+
+def main():
+    """Parse arguments and run the benchmarks."""
+    from cli import main as cli_main
+    return cli_main(command="benchmark")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,569 @@
+#!/usr/bin/env python3
+"""
+Single command-line entry point for every tool.
+All subcommands are parsed and dispatched in this process. The parser
+only needs the standard library, so --help, argument errors and checks
+such as a missing encodings file answer in milliseconds; OpenCV,
+face_recognition and dlib are imported only once a subcommand that uses
+them actually runs.
+
+Usage:
+    python -m scripts.facerec <command> [options]
+    python -m scripts.facerec startup   # measure startup times
+"""
+import os
+import sys
+import argparse
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(BASE_DIR, "src")
+
+# The tools import utils.* from the project root and each other from src/;
+# both go first so scripts/benchmark.py cannot shadow src/benchmark.py
+for path in (BASE_DIR, SRC_DIR):
+    if path in sys.path:
+        sys.path.remove(path)
+    sys.path.insert(0, path)
+
+from utils.metrics import add_metrics_arguments
+
+DETECTOR_NAMES = ["hog", "dnn", "haar"]
+DEFAULT_ENCODINGS = os.path.join(BASE_DIR, "encodings.gallery")
+DEFAULT_STORE = os.path.join(BASE_DIR, "encodings.store")
+
+def _parse_source(source):
+    """Camera indices are given as digits; everything else is a path or URL."""
+    return int(source) if source.isdigit() else source
+
+def _missing_file(path):
+    """True for a local path that does not exist (camera indices and URLs are never missing)."""
+    return not path.isdigit() and "://" not in path and not os.path.exists(path)
+
+def _metrics(pipeline, args):
+    """Build the metrics recorder for a pipeline from the shared options."""
+    from utils.metrics import metrics_from_args
+    return metrics_from_args(pipeline, args)
+
+# Subcommands: each has an argument builder and a handler that imports its
+# tool only when it runs, and returns an exit code.
+
+def _collect_arguments(parser):
+    parser.add_argument("--name", type=str, help="Name of the person")
+    parser.add_argument("--output", type=str, help="Directory to save images in")
+    parser.add_argument("--count", type=int, help="Number of images to collect (0 for unlimited)")
+    parser.add_argument("--source", type=str, default="0",
+                        help="Camera index, video file, stream URL or .frec recording")
+    parser.add_argument("--record", type=str, help="Record the session to this .frec file for later replay")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="Playback speed for .frec sources (0 for as fast as possible)")
+
+def _run_collect(args):
+    if _missing_file(args.source):
+        print(f"❌ Source not found: {args.source}")
+        return 1
+    from collect_faces import collect_face_images
+    collect_face_images(args.name, args.output, args.count, _parse_source(args.source), args.record,
+                        args.replay_speed)
+    return 0
+
+def _encode_arguments(parser):
+    parser.add_argument("--dataset", type=str, default=os.path.join(BASE_DIR, "dataset"),
+                        help="Path to the dataset directory")
+    parser.add_argument("--output", type=str, default=DEFAULT_ENCODINGS,
+                        help="Path to save the encodings")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of encoding processes (0 to use all CPU cores)")
+    parser.add_argument("--detector", choices=DETECTOR_NAMES, default="hog",
+                        help="Face detector backend")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore the manifest cache and re-encode every image")
+    parser.add_argument("--index", choices=["none", "ivf"], default="none",
+                        help="Build an approximate nearest-neighbour index next to the gallery")
+    parser.add_argument("--nlist", type=int,
+                        help="Number of IVF clusters (default 4 * sqrt(number of encodings))")
+    parser.add_argument("--prototypes", action="store_true",
+                        help="Compress each person's encodings to a few weighted prototypes")
+    parser.add_argument("--max-radius", type=float, default=0.3,
+                        help="Maximum distance from an encoding to its prototype")
+    parser.add_argument("--max-prototypes", type=int, default=8,
+                        help="Maximum number of prototypes per person")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Recognition tolerance used to evaluate the prototypes (match the one you recognize with)")
+    parser.add_argument("--precision", choices=["float32", "float16", "int8"], default="float32",
+                        help="Also store a quantized copy of the gallery for faster, smaller matching scans")
+    add_metrics_arguments(parser)
+
+def _run_encode(args):
+    # Verify dataset directory exists
+    if not os.path.exists(args.dataset):
+        print(f"❌ Dataset directory not found: {args.dataset}")
+        print("Creating the directory...")
+        os.makedirs(args.dataset, exist_ok=True)
+        print(f"✅ Created dataset directory: {args.dataset}")
+        print("Please add face images before encoding.")
+        return 1
+
+    # Count number of subdirectories (people)
+    people = [d for d in os.listdir(args.dataset) if os.path.isdir(os.path.join(args.dataset, d))]
+    if not people:
+        print("❌ No people found in the dataset directory.")
+        print("Please run the collect_faces.py script first to gather face images.")
+        return 1
+
+    print(f"[INFO] Found {len(people)} people in the dataset.")
+    from utils.face_utils import encode_face_images
+    total = encode_face_images(args.dataset, args.output, workers=args.workers,
+                               incremental=not args.full,
+                               index=None if args.index == "none" else args.index,
+                               nlist=args.nlist,
+                               prototypes=args.prototypes,
+                               max_radius=args.max_radius,
+                               max_prototypes=args.max_prototypes,
+                               detector=args.detector,
+                               metrics=_metrics("encode", args),
+                               precision=args.precision,
+                               tolerance=args.tolerance)
+    print(f"[✅] Encoding complete! Processed {total} face images.")
+    return 0
+
+def _attendance_arguments(parser):
+    parser.add_argument("--encodings", type=str, default=DEFAULT_ENCODINGS,
+                        help="Path to face encodings gallery file or store directory")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Face recognition tolerance (lower is stricter, range 0-1)")
+    parser.add_argument("--detector", choices=DETECTOR_NAMES, default="hog",
+                        help="Face detector backend")
+    parser.add_argument("--nprobe", type=int, default=8,
+                        help="IVF lists scanned per face when an index exists (higher is more accurate, 0 for exhaustive)")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="Split exhaustive matching into this many shards scored in parallel")
+    parser.add_argument("--reverify-interval", type=int, default=30,
+                        help="Frames between re-encoding an already recognized face")
+    parser.add_argument("--source", type=str, nargs="+", default=["0"],
+                        help="Camera indices, video files, stream URLs or .frec recordings to watch at once")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Recognition worker threads shared by all cameras (0 for one per camera, up to the CPU count)")
+    parser.add_argument("--status-interval", type=float, default=10.0,
+                        help="Seconds between per-camera status lines with several sources")
+    parser.add_argument("--reload-interval", type=float, default=2.0,
+                        help="Seconds between checks for a new gallery (0 to reload only on SIGHUP)")
+    parser.add_argument("--motion-threshold", type=float, default=0.002,
+                        help="Fraction of pixels that must change to run detection (0 to detect on every frame)")
+    parser.add_argument("--motion-recheck", type=int, default=30,
+                        help="Maximum frames to skip in a row before detecting anyway")
+    parser.add_argument("--scale", type=float, default=0.25,
+                        help="Factor frames are resized by before detection (the starting point with a target)")
+    parser.add_argument("--target-fps", type=float, default=0.0,
+                        help="Adapt the detection scale and cadence to hold this frame rate (0 for a fixed scale)")
+    parser.add_argument("--target-latency", type=float, default=0.0,
+                        help="Adapt the detection scale and cadence to this per-frame budget in ms")
+    parser.add_argument("--record", type=str,
+                        help="Record the session to this .frec file for later replay")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="Playback speed for .frec sources (0 for as fast as possible)")
+    parser.add_argument("--attendance-db", type=str,
+                        help="Log attendance to this SQLite database instead of daily CSV files")
+    add_metrics_arguments(parser)
+
+def _run_attendance(args):
+    if not os.path.exists(args.encodings):
+        print(f"❌ Encodings file not found: {args.encodings}. Please run the encode command first.")
+        return 1
+    for source in args.source:
+        if _missing_file(source):
+            print(f"❌ Source not found: {source}")
+            return 1
+    from recognize_faces import run_attendance_system
+    run_attendance_system(args.encodings, args.tolerance, args.nprobe, args.reverify_interval, args.detector,
+                          metrics=_metrics("attendance", args), sources=args.source, workers=args.workers,
+                          status_interval=args.status_interval, attendance_db=args.attendance_db,
+                          reload_interval=args.reload_interval, motion_threshold=args.motion_threshold,
+                          motion_recheck=args.motion_recheck, scale=args.scale, target_fps=args.target_fps,
+                          target_latency=args.target_latency, record=args.record, replay_speed=args.replay_speed,
+                          shards=args.shards)
+    return 0
+
+def _detect_arguments(parser):
+    parser.add_argument("--prototxt", type=str, help="Path to the prototxt file")
+    parser.add_argument("--model", type=str, help="Path to the Caffe model file")
+    parser.add_argument("--confidence", type=float, default=0.5, help="Confidence threshold")
+    parser.add_argument("--detector", choices=DETECTOR_NAMES, default="dnn", help="Face detector backend")
+    parser.add_argument("--motion-threshold", type=float, default=0.002,
+                        help="Fraction of pixels that must change to run detection (0 to detect on every frame)")
+    parser.add_argument("--motion-recheck", type=int, default=30,
+                        help="Maximum frames to skip in a row before detecting anyway")
+    parser.add_argument("--source", type=str, default="0",
+                        help="Camera index, video file, stream URL or .frec recording")
+    parser.add_argument("--record", type=str, help="Record the session to this .frec file for later replay")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="Playback speed for .frec sources (0 for as fast as possible)")
+    parser.add_argument("--benchmark", action="store_true", help="Compare the speed of every detector backend")
+    parser.add_argument("--images", type=str, help="Folder of images to benchmark on instead of the webcam")
+    parser.add_argument("--frames", type=int, default=30, help="Number of frames to benchmark on")
+    add_metrics_arguments(parser)
+
+def _run_detect(args):
+    for path in (args.prototxt, args.model, args.images):
+        if path and not os.path.exists(path):
+            print(f"❌ File not found: {path}")
+            return 1
+    if not args.benchmark and _missing_file(args.source):
+        print(f"❌ Source not found: {args.source}")
+        return 1
+    from detect_faces_live import run_detector_benchmark, run_face_detection
+    if args.benchmark:
+        run_detector_benchmark(args.prototxt, args.model, args.confidence, args.images, args.frames)
+    else:
+        run_face_detection(args.prototxt, args.model, args.confidence, args.detector,
+                           metrics=_metrics("detect", args), motion_threshold=args.motion_threshold,
+                           motion_recheck=args.motion_recheck, source=_parse_source(args.source),
+                           record=args.record, replay_speed=args.replay_speed)
+    return 0
+
+def _convert_arguments(parser):
+    parser.add_argument("--input", type=str, default=os.path.join(BASE_DIR, "encodings.pickle"),
+                        help="Path to the legacy encodings pickle")
+    parser.add_argument("--output", type=str, default=DEFAULT_ENCODINGS,
+                        help="Path to save the gallery file")
+
+def _run_convert(args):
+    if not os.path.exists(args.input):
+        print(f"❌ Encodings file not found: {args.input}")
+        return 1
+    from convert_encodings import run_conversion
+    return run_conversion(args.input, args.output)
+
+def _offline_arguments(parser):
+    parser.add_argument("--source", type=str, required=True,
+                        help="Video file, stream URL (e.g. rtsp://...) or folder of images")
+    parser.add_argument("--output", type=str, default="recognitions.jsonl",
+                        help="Results file (.jsonl or .csv)")
+    parser.add_argument("--format", choices=["jsonl", "csv"],
+                        help="Results format (default from the output extension)")
+    parser.add_argument("--encodings", type=str, default=DEFAULT_ENCODINGS,
+                        help="Path to face encodings gallery file or store directory")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Face recognition tolerance (lower is stricter, range 0-1)")
+    parser.add_argument("--detector", choices=DETECTOR_NAMES, default="hog",
+                        help="Face detector backend")
+    parser.add_argument("--nprobe", type=int, default=8,
+                        help="IVF lists scanned per face when an index exists (0 for exhaustive)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Number of worker processes (0 to use all CPU cores)")
+    parser.add_argument("--stride", type=int, default=1,
+                        help="Process every n-th video frame")
+    parser.add_argument("--scale", type=float, default=0.25,
+                        help="Factor frames are resized by before detection")
+    parser.add_argument("--chunk-size", type=int, default=300,
+                        help="Frames per chunk handed to a worker")
+
+def _run_offline(args):
+    for path in (args.encodings, args.source):
+        if _missing_file(path):
+            print(f"❌ File not found: {path}")
+            return 1
+    from recognize_offline import run_offline_recognition
+    run_offline_recognition(args.source, args.output, args.encodings, args.tolerance, args.nprobe, args.detector,
+                            args.workers, args.stride, args.scale, args.chunk_size, args.format)
+    return 0
+
+def _report_arguments(parser):
+    parser.add_argument("--db", type=str, default="attendance.db",
+                        help="Path to the attendance database")
+    subparsers = parser.add_subparsers(dest="report", required=True)
+
+    person = subparsers.add_parser("person", help="Days one person attended")
+    person.add_argument("name", help="Person to report on")
+    person.add_argument("--from", dest="start", help="First day (YYYY-MM-DD)")
+    person.add_argument("--to", dest="end", help="Last day (YYYY-MM-DD)")
+
+    day = subparsers.add_parser("day", help="Everyone present on one day")
+    day.add_argument("date", help="Day (YYYY-MM-DD)")
+
+    summary = subparsers.add_parser("range", help="Days attended per person over a date range")
+    summary.add_argument("--from", dest="start", help="First day (YYYY-MM-DD)")
+    summary.add_argument("--to", dest="end", help="Last day (YYYY-MM-DD)")
+
+    importer = subparsers.add_parser("import", help="Import attendance_YYYY-MM-DD.csv files")
+    importer.add_argument("paths", nargs="+", help="CSV files or directories containing them")
+
+    exporter = subparsers.add_parser("export", help="Export to attendance_YYYY-MM-DD.csv files")
+    exporter.add_argument("--output-dir", default=".", help="Directory for the CSV files")
+    exporter.add_argument("--from", dest="start", help="First day (YYYY-MM-DD)")
+    exporter.add_argument("--to", dest="end", help="Last day (YYYY-MM-DD)")
+
+def _run_report(args):
+    # sqlite3 and the standard library only, so reports stay fast
+    from attendance_report import run_report
+    args.command = args.report
+    return run_report(args)
+
+def _replay_arguments(parser):
+    parser.add_argument("recording", type=str, help=".frec recording to replay")
+    parser.add_argument("--pipeline", choices=["attendance", "detect"], default="attendance",
+                        help="Pipeline to replay the recording through")
+    parser.add_argument("--runs", type=int, default=2, help="Number of replays to compare")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="Playback speed (0 for as fast as possible with every frame processed)")
+    parser.add_argument("--encodings", type=str, default=DEFAULT_ENCODINGS,
+                        help="Path to face encodings gallery file or store directory (attendance pipeline)")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Face recognition tolerance (lower is stricter, range 0-1)")
+    parser.add_argument("--detector", choices=DETECTOR_NAMES,
+                        help="Face detector backend (default hog for attendance, dnn for detect)")
+    parser.add_argument("--prototxt", type=str, help="Path to Caffe 'deploy' prototxt file")
+    parser.add_argument("--model", type=str, help="Path to Caffe pre-trained model")
+    parser.add_argument("--output", type=str, help="Write the JSON report to this file")
+    parser.add_argument("--expect", type=str, help="Earlier JSON report whose results must be reproduced")
+
+def _run_replay(args):
+    for path in (args.recording, args.expect):
+        if path and not os.path.exists(path):
+            print(f"❌ File not found: {path}")
+            return 1
+    from replay_benchmark import run_benchmark
+    return run_benchmark(args.recording, args.pipeline, args.runs, args.speed, args.encodings, args.tolerance,
+                         args.detector, args.prototxt, args.model, args.output, args.expect)
+
+def _benchmark_arguments(parser):
+    parser.add_argument("--suite", choices=["encode", "match", "detect", "end-to-end"], nargs="+",
+                        help="Suites to run (default all)")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        help="Gallery sizes for the match suite (default 100 to 1000000)")
+    parser.add_argument("--quick", action="store_true",
+                        help="Only use galleries up to 10000 embeddings")
+    parser.add_argument("--index", action="store_true", help="Also benchmark IVF index matching")
+    parser.add_argument("--shards", type=int, nargs="+",
+                        help="Also benchmark sharded matching with these shard counts")
+    parser.add_argument("--precision", choices=["float16", "int8"], nargs="+",
+                        help="Also benchmark quantized matching with these precisions")
+    parser.add_argument("--images", type=str, help="Folder of images to use instead of synthetic frames")
+    parser.add_argument("--frames", type=int, default=30, help="Number of frames")
+    parser.add_argument("--detector", choices=DETECTOR_NAMES, default="hog",
+                        help="Detector backend for the encode and end-to-end suites")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Encoding processes to compare with one (0 to use all CPU cores)")
+    parser.add_argument("--output", type=str, default="benchmark.json", help="JSON results file")
+    parser.add_argument("--baseline", type=str, help="Earlier results file to compare with")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Percent slowdown that counts as a regression")
+
+def _run_benchmark(args):
+    for path in (args.images, args.baseline):
+        if path and not os.path.exists(path):
+            print(f"❌ File not found: {path}")
+            return 1
+    from benchmark import DEFAULT_SIZES, QUICK_SIZES, SUITES, run_benchmarks
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    return run_benchmarks(args.suite or SUITES, sizes, args.images, args.frames, args.detector, args.workers,
+                          args.index, args.output, args.baseline, args.threshold, args.shards,
+                          args.precision)
+
+def _daemon_arguments(parser):
+    from utils.daemon_client import DEFAULT_SOCKET
+    parser.add_argument("--encodings", type=str, default=DEFAULT_ENCODINGS,
+                        help="Path to face encodings gallery file or store directory")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Face recognition tolerance (lower is stricter, range 0-1)")
+    parser.add_argument("--nprobe", type=int, default=8,
+                        help="IVF lists scanned per face when an index exists (0 for exhaustive)")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="Split exhaustive matching into this many shards scored in parallel")
+    parser.add_argument("--detector", choices=DETECTOR_NAMES, default="hog", help="Face detector backend")
+    parser.add_argument("--scale", type=float, default=0.25,
+                        help="Default factor images are resized by before detection")
+    parser.add_argument("--socket", type=str, default=DEFAULT_SOCKET, help="Unix socket to listen on")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Address to listen on with --port")
+    parser.add_argument("--port", type=int, help="Listen on this TCP port instead of the Unix socket")
+    parser.add_argument("--max-batch", type=int, default=16, help="Largest micro-batch of requests")
+    parser.add_argument("--max-wait", type=float, default=2.0,
+                        help="Milliseconds a batch waits for more requests")
+    parser.add_argument("--reload-interval", type=float, default=2.0,
+                        help="Seconds between checks for a new gallery (0 to reload only on SIGHUP)")
+    add_metrics_arguments(parser)
+
+def _run_daemon(args):
+    if not os.path.exists(args.encodings):
+        print(f"❌ Encodings file not found: {args.encodings}. Please run the encode command first.")
+        return 1
+    from recognition_daemon import run_daemon
+    run_daemon(args.encodings, args.tolerance, args.nprobe, args.detector, args.scale, args.socket, args.host,
+               args.port, args.max_batch, args.max_wait, args.reload_interval, _metrics("daemon", args),
+               args.shards)
+    return 0
+
+def _query_arguments(parser):
+    from utils.daemon_client import DEFAULT_SOCKET
+    parser.add_argument("images", nargs="*", help="Image files to recognize")
+    parser.add_argument("--socket", type=str, default=DEFAULT_SOCKET, help="Unix socket of the daemon")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Host of the daemon with --port")
+    parser.add_argument("--port", type=int, help="Connect over TCP to this port instead of the Unix socket")
+    parser.add_argument("--scale", type=float, help="Factor images are resized by before detection")
+    parser.add_argument("--repeat", type=int, default=1, help="Send every image this many times and report timings")
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per image")
+    parser.add_argument("--status", action="store_true", help="Print the daemon's status")
+    parser.add_argument("--reload", action="store_true", help="Ask the daemon to reload the gallery")
+
+def _run_query(args):
+    from query_daemon import run_query
+    return run_query(args)
+
+def _publish_arguments(parser):
+    parser.add_argument("--encodings", type=str, default=DEFAULT_ENCODINGS,
+                        help="Path to face encodings gallery file or store directory to publish")
+    parser.add_argument("--name", type=str, default="encodings",
+                        help="Name of the shared gallery (published as /dev/shm/facerec-<name>.gallery)")
+    parser.add_argument("--output", type=str, help="Publish to this path instead")
+    parser.add_argument("--reload-interval", type=float, default=2.0,
+                        help="Seconds between checks for a new gallery to publish")
+    parser.add_argument("--once", action="store_true",
+                        help="Publish once and exit, leaving the shared gallery in place")
+    parser.add_argument("--check-workers", type=int, default=0,
+                        help="Measure the memory this many worker processes add when attached")
+
+def _run_publish(args):
+    if not os.path.exists(args.encodings):
+        print(f"❌ Encodings file not found: {args.encodings}. Please run the encode command first.")
+        return 1
+    from utils.shared_gallery import shared_gallery_path
+    from gallery_service import run_gallery_service
+    return run_gallery_service(args.encodings, args.output or shared_gallery_path(args.name), args.reload_interval,
+                               args.once, args.check_workers)
+
+def _add_person_arguments(parser):
+    parser.add_argument("--store", type=str, default=DEFAULT_STORE,
+                        help="Gallery store directory (created if missing)")
+    parser.add_argument("--name", type=str, required=True, help="Name of the person")
+    parser.add_argument("images", nargs="+", help="Images of the person, or directories containing them")
+    parser.add_argument("--replace", action="store_true", help="Replace the person's earlier encodings")
+    parser.add_argument("--workers", type=int, default=1, help="Number of encoding processes")
+    parser.add_argument("--detector", choices=DETECTOR_NAMES, default="hog",
+                        help="Face detector backend used to find faces before encoding")
+
+def _run_add_person(args):
+    missing = [path for path in args.images if not os.path.exists(path)]
+    if missing:
+        print(f"❌ Images not found: {', '.join(missing)}")
+        return 1
+    from manage_store import add_person
+    return add_person(args.store, args.name, args.images, args.workers, args.detector, args.replace)
+
+def _remove_person_arguments(parser):
+    parser.add_argument("--store", type=str, default=DEFAULT_STORE, help="Gallery store directory")
+    parser.add_argument("--name", type=str, required=True, help="Name of the person")
+
+def _run_remove_person(args):
+    from manage_store import remove_person
+    return remove_person(args.store, args.name)
+
+def _store_arguments(parser):
+    parser.add_argument("--store", type=str, default=DEFAULT_STORE, help="Gallery store directory")
+    subparsers = parser.add_subparsers(dest="store_command", required=True)
+
+    init = subparsers.add_parser("init", help="Create a store")
+    init.add_argument("--from", dest="source", help="Gallery file to import as the first segment")
+
+    subparsers.add_parser("list", help="People and segments in the store")
+
+    compact = subparsers.add_parser("compact", help="Merge the segments and drop removed people's rows")
+    compact.add_argument("--watch", type=float, default=0.0,
+                         help="Keep running and check the store every this many seconds")
+    compact.add_argument("--max-segments", type=int, default=8,
+                         help="With --watch, compact when the store has more segments")
+    compact.add_argument("--max-dead-ratio", type=float, default=0.2,
+                         help="With --watch, compact when this fraction of rows belongs to removed people")
+
+def _run_store(args):
+    if args.store_command == "init" and args.source and not os.path.exists(args.source):
+        print(f"❌ Encodings file not found: {args.source}")
+        return 1
+    from manage_store import run_store_command
+    return run_store_command(args)
+
+def _download_models_arguments(parser):
+    pass
+
+def _run_download_models(args):
+    from scripts.download_models import main as download_models
+    return download_models()
+
+def _startup_arguments(parser):
+    parser.add_argument("--runs", type=int, default=5, help="Runs per measurement (the median is reported)")
+    parser.add_argument("--budget", type=float, default=200.0,
+                        help="Milliseconds the fast commands (help, validation, reports) must stay under")
+    parser.add_argument("--output", type=str, help="Write the JSON report to this file")
+
+def _run_startup(args):
+    from startup_report import run_startup_report
+    return run_startup_report(args.runs, args.budget, args.output)
+
+# name: (help, argument builder, handler)
+COMMANDS = {
+    "collect": ("Collect face images from the camera", _collect_arguments, _run_collect),
+    "encode": ("Encode the dataset into a gallery", _encode_arguments, _run_encode),
+    "attendance": ("Run the attendance system", _attendance_arguments, _run_attendance),
+    "detect": ("Run live face detection or compare detectors", _detect_arguments, _run_detect),
+    "convert": ("Convert a legacy encodings.pickle to a gallery", _convert_arguments, _run_convert),
+    "offline": ("Recognize faces in videos, streams and image folders", _offline_arguments, _run_offline),
+    "report": ("Attendance database reports and CSV import/export", _report_arguments, _run_report),
+    "replay": ("Benchmark a pipeline on a recorded session", _replay_arguments, _run_replay),
+    "benchmark": ("Benchmark encoding, matching, detection and the live loop", _benchmark_arguments,
+                  _run_benchmark),
+    "daemon": ("Run the recognition daemon", _daemon_arguments, _run_daemon),
+    "query": ("Recognize images with the running daemon", _query_arguments, _run_query),
+    "publish": ("Share the gallery with recognizer processes through shared memory", _publish_arguments,
+                _run_publish),
+    "add-person": ("Enroll a person into a gallery store without re-encoding", _add_person_arguments,
+                   _run_add_person),
+    "remove-person": ("Remove a person from a gallery store", _remove_person_arguments, _run_remove_person),
+    "store": ("Create, list and compact gallery stores", _store_arguments, _run_store),
+    "download-models": ("Download the DNN face detector model", _download_models_arguments,
+                        _run_download_models),
+    "startup": ("Measure the startup time of the commands", _startup_arguments, _run_startup),
+}
+
+def build_parser(command=None):
+    """
+    Build the argument parser.
+
+    Args:
+        command (str, optional): Only build this subcommand's parser, for
+            the per-tool scripts
+
+    Returns:
+        argparse.ArgumentParser: The parser
+    """
+    if command is not None:
+        description, add_arguments, handler = COMMANDS[command]
+        parser = argparse.ArgumentParser(description=description)
+        add_arguments(parser)
+        parser.set_defaults(handler=handler)
+        return parser
+
+    parser = argparse.ArgumentParser(prog="facerec", description="Facial Recognition Attendance System")
+    subparsers = parser.add_subparsers(dest="command", metavar="command", required=True)
+    for name, (description, add_arguments, handler) in COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=description, description=description)
+        add_arguments(subparser)
+        subparser.set_defaults(handler=handler)
+    return parser
+
+def main(argv=None, command=None):
+    """
+    Parse the command line and run the chosen tool in this process.
+
+    Args:
+        argv (list, optional): Arguments (default sys.argv[1:])
+        command (str, optional): Run this subcommand; argv then holds only its options
+
+    Returns:
+        int: Exit code
+    """
+    args = build_parser(command).parse_args(argv)
+    try:
+        return args.handler(args) or 0
+    except KeyboardInterrupt:
+        return 130
+
+if __name__ == "__main__":
+    sys.exit(main())
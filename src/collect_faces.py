@@ -6,14 +6,13 @@ This script captures images from a webcam for a given person.
 import cv2
 import os
 import sys
-import time
-import argparse
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.face_utils import encode_face_images
+from utils.recording import open_frame_source
 
-def collect_face_images(name=None, output_dir=None, count_target=None):
+def collect_face_images(name=None, output_dir=None, count_target=None, source=0, record=None, replay_speed=1.0):
     """
     Collect face images from webcam for a specified person.
     
@@ -21,6 +20,9 @@ def collect_face_images(name=None, output_dir=None, count_target=None):
         name (str, optional): Name of the person to collect images for.
         output_dir (str, optional): Directory to save images in.
         count_target (int, optional): Number of images to collect (0 for unlimited).
+        source (int or str, optional): Camera index, video file, stream URL or .frec recording.
+        record (str, optional): Record the session to this .frec file.
+        replay_speed (float, optional): Playback speed for recordings (0 for as fast as possible).
     """
     # If name is not provided, ask for it
     if name is None or name.strip() == "":
@@ -40,10 +42,11 @@ def collect_face_images(name=None, output_dir=None, count_target=None):
     os.makedirs(save_path, exist_ok=True)
 
     # Open the webcam
-    cap = cv2.VideoCapture(0)
+    cap = open_frame_source(source, record=record, replay_speed=replay_speed)
     if not cap.isOpened():
         print("❌ Could not open webcam. Please check your camera connection.")
         return
+    cap.start()
 
     count = 0
     print(f"[INFO] Capturing images for: {name}")
@@ -59,10 +62,12 @@ def collect_face_images(name=None, output_dir=None, count_target=None):
                 print(f"[INFO] Reached target of {count_target} images.")
                 break
                 
-            ret, frame = cap.read()
+            # The grabber thread retries failed grabs; just wait for the next frame
+            ret, frame, _, _ = cap.read()
             if not ret:
-                print("⚠️ Failed to grab frame. Retrying...")
-                time.sleep(0.5)
+                if cap.finished:
+                    print("[INFO] End of recording.")
+                    break
                 continue
 
             # Display the frame with count
@@ -99,7 +104,7 @@ def collect_face_images(name=None, output_dir=None, count_target=None):
         if encode_now == 'y':
             # Encode all faces
             print("\n[INFO] Encoding all faces...")
-            encodings_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "encodings.pickle")
+            encodings_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "encodings.gallery")
             total = encode_face_images(dataset_path, encodings_path)
             print(f"[✅] Done! Encoded {total} face images. You can now run the attendance system.")
         else:
@@ -109,13 +114,8 @@ def collect_face_images(name=None, output_dir=None, count_target=None):
         
 def main():
     """Parse arguments and run the face collection process."""
-    parser = argparse.ArgumentParser(description="Collect face images for recognition")
-    parser.add_argument("--name", type=str, help="Name of the person")
-    parser.add_argument("--output", type=str, help="Directory to save images in")
-    parser.add_argument("--count", type=int, help="Number of images to collect (0 for unlimited)")
-    args = parser.parse_args()
-    
-    collect_face_images(args.name, args.output, args.count)
+    from cli import main as cli_main
+    return cli_main(command="collect")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Convert legacy encodings to the gallery format.
+This script reads an existing encodings.pickle and writes an equivalent
+memory-mappable gallery file.
+"""
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.gallery import convert_pickle_to_gallery
+
+def run_conversion(input_path, output_path):
+    """
+    Convert a legacy encodings pickle into a gallery file.
+    
+    Args:
+        input_path (str): Path to the legacy encodings pickle
+        output_path (str): Path to save the gallery file
+        
+    Returns:
+        int: Exit code
+    """
+    print(f"[INFO] Converting {input_path}...")
+    try:
+        gallery = convert_pickle_to_gallery(input_path, output_path)
+    except Exception as e:
+        print(f"❌ Conversion failed: {e}")
+        return 1
+    
+    print(f"[✅] Wrote {gallery.count} encodings for {len(gallery.names)} people to {output_path}")
+    return 0
+
+def main():
+    """Convert a legacy encodings pickle into a gallery file."""
+    from cli import main as cli_main
+    return cli_main(command="convert")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,102 +1,135 @@
 #!/usr/bin/env python3
 """
 Live face detection using OpenCV DNN.
-This script detects faces in a live webcam feed using OpenCV's DNN module.
+This script detects faces in a live webcam feed using OpenCV's DNN module,
+or any of the other detector backends, and can benchmark the backends
+against each other on the same frames.
 """
 import cv2
 import os
 import sys
-import time
-import argparse
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.face_utils import setup_dnn_network
+from utils.capture import FrameGrabber
+from utils.recording import open_frame_source
+from utils.detectors import DETECTORS, create_detector, benchmark_detectors
+from utils.motion import MotionGate
+from utils.metrics import PipelineMetrics
 
-def run_face_detection(prototxt=None, model=None, confidence_threshold=0.5):
-    """Run live face detection using OpenCV DNN."""
-    # Set default paths if not provided
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    if prototxt is None:
-        prototxt = os.path.join(base_dir, "models", "deploy.prototxt")
-    if model is None:
-        model = os.path.join(base_dir, "models", "res10_300x300_ssd_iter_140000_fp16.caffemodel")
+def build_detector(detector, prototxt=None, model=None, confidence_threshold=0.5):
+    """
+    Create the requested detector backend, passing DNN options through.
     
-    # Check if model files exist
-    if not os.path.exists(prototxt):
-        print(f"❌ Prototxt file not found: {prototxt}")
-        return
-    if not os.path.exists(model):
-        print(f"❌ Model file not found: {model}")
-        return
+    Args:
+        detector (str): Detector backend name
+        prototxt (str, optional): Path to the Caffe prototxt file
+        model (str, optional): Path to the Caffe model file
+        confidence_threshold (float): Minimum DNN confidence
+        
+    Returns:
+        FaceDetector: The detector
+    """
+    if detector == "dnn":
+        return create_detector("dnn", prototxt=prototxt, model=model, confidence=confidence_threshold)
+    return create_detector(detector)
+
+def run_face_detection(prototxt=None, model=None, confidence_threshold=0.5, detector="dnn", metrics=None,
+                       motion_threshold=0.002, motion_recheck=30, source=0, record=None, replay_speed=1.0,
+                       display=True, on_result=None):
+    """
+    Run live face detection using OpenCV DNN or another detector backend.
+    
+    The source may be a .frec recording, which is replayed instead of opening
+    the webcam; record saves the live session for later replay. With display
+    off no window is opened, and on_result(seq, timestamp, detections) is
+    called after every frame.
+    """
+    if metrics is None:
+        metrics = PipelineMetrics("detect")
     
-    # Load the DNN model
-    print("[INFO] Loading face detection model...")
-    net = setup_dnn_network(prototxt, model)
+    # Load the detector (the DNN network is loaded once here and reused)
+    print(f"[INFO] Loading {detector} face detection model...")
+    try:
+        face_detector = build_detector(detector, prototxt, model, confidence_threshold)
+    except Exception as e:
+        print(f"❌ {e}")
+        return
     
-    # Open the webcam
+    # Open the webcam (or the recording)
     print("[INFO] Starting webcam...")
-    cap = cv2.VideoCapture(0)
+    cap = open_frame_source(source, record=record, replay_speed=replay_speed)
     
     if not cap.isOpened():
         print("❌ Could not open webcam. Please check your camera connection.")
         return
+    cap.start()
     
     print("[INFO] Face detection started. Press 'q' to quit.")
     
-    # Try to get the first frame to test the model
-    ret, frame = cap.read()
-    if ret:
+    # Try the model on the first frame without consuming it
+    ret, frame, _, _ = cap.peek(timeout=5.0)
+    if ret and detector == "dnn":
         try:
             # Test the model on the first frame
-            blob = cv2.dnn.blobFromImage(frame, 1.0, (300, 300), (104.0, 117.0, 123.0), False, False)
-            net.setInput(blob)
-            net.forward()
+            face_detector.detect(frame)
             print("[INFO] Model test successful.")
         except Exception as e:
             print(f"[ERROR] Model test failed: {e}")
             print("[INFO] Falling back to CPU.")
-            net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
-            net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+            face_detector.use_cpu()
+    
+    motion = MotionGate(motion_threshold, recheck_interval=motion_recheck) if motion_threshold > 0 else None
+    boxes, scores = [], []
     
     try:
         # Main detection loop
         while True:
-            ret, frame = cap.read()
+            # The grabber thread retries failed grabs; just wait for the next frame
+            with metrics.stage("capture"):
+                ret, frame, seq, timestamp = cap.read()
             if not ret:
-                print("⚠️ Failed to grab frame. Retrying...")
-                time.sleep(0.5)
+                if cap.finished:
+                    break
                 continue
             
-            # Create a blob from the frame
-            blob = cv2.dnn.blobFromImage(frame, 1.0, (300, 300), (104.0, 117.0, 123.0), False, False)
-            net.setInput(blob)
+            # Skip detection when nothing changed; the previous boxes still apply
+            moving = True
+            if motion is not None:
+                with metrics.stage("motion"):
+                    moving = motion.should_process(frame)
+                metrics.set_skipped(motion.skipped)
             
             # Run detection
-            detections = net.forward()
+            if moving:
+                with metrics.stage("detect"):
+                    boxes, scores = face_detector.detect_with_scores(frame)
             
             # Process results
-            h, w = frame.shape[:2]
-            for i in range(detections.shape[2]):
-                confidence = detections[0, 0, i, 2]
+            for (top, right, bottom, left), confidence in zip(boxes, scores):
+                # Draw the bounding box
+                cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
                 
-                if confidence > confidence_threshold:
-                    # Get face box coordinates
-                    box = detections[0, 0, i, 3:7] * [w, h, w, h]
-                    (x1, y1, x2, y2) = box.astype("int")
-                    
-                    # Draw the bounding box
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                    
-                    # Add confidence label
-                    label = f"{confidence:.2f}"
-                    cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+                # Add confidence label
+                label = f"{confidence:.2f}"
+                cv2.putText(frame, label, (left, top - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+            
+            if on_result is not None:
+                on_result(seq, timestamp, list(zip(boxes, scores)))
             
             # Display the frame with detections
-            cv2.imshow("Face Detection (Press Q to quit)", frame)
+            key = 0xFF
+            if display:
+                with metrics.stage("display"):
+                    cv2.imshow("Face Detection (Press Q to quit)", frame)
+                    key = cv2.waitKey(1) & 0xFF
+            
+            metrics.frame_done(faces=len(boxes))
+            metrics.set_dropped(cap.dropped)
+            metrics.maybe_dump()
             
             # Press 'q' to quit
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            if key == ord('q'):
                 break
     
     except KeyboardInterrupt:
@@ -105,19 +138,77 @@ def run_face_detection(prototxt=None, model=None, confidence_threshold=0.5):
         print(f"❌ Error occurred: {e}")
     finally:
         cap.release()
-        cv2.destroyAllWindows()
+        if display:
+            cv2.destroyAllWindows()
+        metrics.set_dropped(cap.dropped)
+        metrics.close()
     
+    print(f"[INFO] Skipped {cap.dropped} stale frames to stay real-time.")
+    if motion is not None:
+        print(f"[INFO] Motion gate skipped detection on {motion.skipped} of {motion.checked} frames "
+              f"({motion.skip_ratio:.0%}).")
     print("[INFO] Face detection completed.")
 
+def load_benchmark_frames(images=None, count=30):
+    """
+    Collect frames to benchmark on, from a folder of images or the webcam.
+    
+    Args:
+        images (str, optional): Folder searched recursively for images
+        count (int): Maximum number of frames
+        
+    Returns:
+        list: BGR frames
+    """
+    frames = []
+    if images:
+        for root, _, files in os.walk(images):
+            for filename in sorted(files):
+                frame = cv2.imread(os.path.join(root, filename))
+                if frame is not None:
+                    frames.append(frame)
+                if len(frames) >= count:
+                    return frames
+        return frames
+    
+    cap = FrameGrabber(0)
+    if not cap.isOpened():
+        print("❌ Could not open webcam. Please check your camera connection.")
+        return frames
+    try:
+        while len(frames) < count:
+            ret, frame, _, _ = cap.read(timeout=5.0)
+            if not ret:
+                break
+            frames.append(frame)
+    finally:
+        cap.release()
+    return frames
+
+def run_detector_benchmark(prototxt=None, model=None, confidence_threshold=0.5, images=None, count=30):
+    """Time every available detector backend on the same frames."""
+    frames = load_benchmark_frames(images, count)
+    if not frames:
+        print("❌ No frames to benchmark on.")
+        return
+    
+    detectors = []
+    for name in DETECTORS:
+        try:
+            detectors.append(build_detector(name, prototxt, model, confidence_threshold))
+        except Exception as e:
+            print(f"[WARNING] Skipping {name} detector: {e}")
+    
+    print(f"[INFO] Benchmarking {len(detectors)} detectors on {len(frames)} frames...")
+    print(f"{'detector':<10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'fps':>10}{'faces/frame':>14}")
+    for result in benchmark_detectors(detectors, frames):
+        print(f"{result['detector']:<10}{result['mean_ms']:>10.2f}{result['p50_ms']:>10.2f}"
+              f"{result['p95_ms']:>10.2f}{result['fps']:>10.1f}{result['faces_per_frame']:>14.2f}")
+
 def main():
     """Parse arguments and run face detection."""
-    parser = argparse.ArgumentParser(description="Live Face Detection")
-    parser.add_argument("--prototxt", type=str, help="Path to the prototxt file")
-    parser.add_argument("--model", type=str, help="Path to the Caffe model file")
-    parser.add_argument("--confidence", type=float, default=0.5, help="Confidence threshold")
-    args = parser.parse_args()
-    
-    run_face_detection(args.prototxt, args.model, args.confidence)
+    from cli import main as cli_main
+    return cli_main(command="detect")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Gallery service for several recognizer processes on one host.
+This script publishes the gallery into shared memory once and keeps it up
+to date: after a re-encode it publishes a new version, which the workers'
+reloaders pick up while frames already in flight finish on the old one.
+Workers use the shared gallery by passing its path as --encodings.
+"""
+import os
+import sys
+import time
+import signal
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.shared_gallery import GalleryPublisher, measure_workers
+
+def report_workers(path, workers):
+    """
+    Measure and print the memory the worker processes add.
+
+    Args:
+        path (str): Path of the shared gallery
+        workers (int): Number of worker processes
+    """
+    print(f"[INFO] Attaching {workers} worker processes...")
+    usage = measure_workers(path, workers)
+    if usage is None:
+        print("[WARNING] Memory usage can only be measured on Linux.")
+        return
+    gallery_mb = usage["gallery_kb"] / 1024.0
+    for i, worker in enumerate(usage["workers"]):
+        print(f"[INFO]   worker {i}: Rss +{worker['Rss'] / 1024.0:.1f} MB, Pss +{worker['Pss'] / 1024.0:.1f} MB, "
+              f"shared +{worker['Shared'] / 1024.0:.1f} MB")
+    print(f"[INFO] Gallery {gallery_mb:.1f} MB; {workers} workers add {usage['pss_kb'] / 1024.0:.1f} MB "
+          f"proportional ({usage['rss_kb'] / 1024.0:.1f} MB Rss counting shared pages once per worker).")
+
+def run_gallery_service(encodings_path, shared_path, poll_interval=2.0, once=False, check_workers=0):
+    """
+    Publish the gallery and republish it whenever it changes.
+
+    Args:
+        encodings_path (str): Gallery file written by the encode command
+        shared_path (str): Path of the shared gallery
+        poll_interval (float): Seconds between checks of the gallery file
+        once (bool): Publish once and exit, leaving the shared gallery in place
+        check_workers (int): Measure the memory this many worker processes add
+
+    Returns:
+        int: Exit code
+    """
+    publisher = GalleryPublisher(encodings_path, shared_path)
+    start = time.perf_counter()
+    version = publisher.publish()
+    if not version:
+        print(f"❌ Nothing to publish: {encodings_path} is empty.")
+        return 1
+    print(f"[INFO] Published version {version} of {encodings_path} to {shared_path} "
+          f"in {time.perf_counter() - start:.2f}s.")
+    print(f"[INFO] Start workers with --encodings {shared_path}")
+
+    if check_workers:
+        report_workers(shared_path, check_workers)
+    if once:
+        return 0
+
+    running = [True]
+    def stop(signum, frame):
+        running[0] = False
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    print("[INFO] Watching for a new gallery. Press Ctrl+C to stop.")
+    try:
+        while running[0]:
+            time.sleep(poll_interval)
+            if running[0] and publisher.poll():
+                print(f"[INFO] Published version {publisher.version}.")
+    finally:
+        # Workers that are attached keep their mapping; new ones cannot start
+        publisher.close()
+        print(f"[INFO] Removed {shared_path}.")
+    return 0
+
+def main():
+    """Parse arguments and run the gallery service."""
+    from cli import main as cli_main
+    return cli_main(command="publish")
+
+if __name__ == "__main__":
+    sys.exit(main())
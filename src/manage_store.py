@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Enrollment commands for segmented gallery stores.
+This script adds and removes people without re-encoding the dataset:
+add-person encodes only the new person's images into a small segment,
+remove-person writes a tombstone, and compaction merges the segments in
+the background. Recognizers load the store by passing its directory as
+--encodings and pick up every change through their gallery reloader.
+"""
+import os
+import sys
+import time
+import signal
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.gallery import load_gallery
+from utils.gallery_store import GalleryStore, StoreCompactor, is_gallery_store
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+def _open_store(store_path, create=False):
+    """Open a store, optionally creating an empty one; None if it does not exist."""
+    if is_gallery_store(store_path):
+        return GalleryStore(store_path)
+    if create:
+        print(f"[INFO] Creating gallery store {store_path}")
+        return GalleryStore.create(store_path)
+    print(f"❌ {store_path} is not a gallery store. Create it with the store init command.")
+    return None
+
+def _image_paths(paths):
+    """Expand image files and directories of images, in a stable order."""
+    images = []
+    for path in paths:
+        if os.path.isdir(path):
+            images.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                          if name.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            images.append(path)
+    return images
+
+def _print_stats(store):
+    stats = store.stats()
+    print(f"[INFO] {store.path}: {stats['live_rows']} live encodings for {len(store.people())} people in "
+          f"{stats['segments']} segments ({stats['dead_rows']} dead rows, {stats['tombstones']} tombstones)")
+    if StoreCompactor(store).needs_compaction(stats):
+        print(f"[INFO] Run 'python scripts/store.py --store {store.path} compact' to merge the segments, "
+              f"or keep 'compact --watch' running.")
+
+def add_person(store_path, name, images, workers=1, detector="hog", replace=False):
+    """
+    Encode one person's images and add them to the store as a new segment.
+
+    Args:
+        store_path (str): Store directory (created if missing)
+        name (str): Person name
+        images (list): Image files or directories of images
+        workers (int): Number of encoding processes
+        detector (str): Face detector backend
+        replace (bool): Hide the person's earlier encodings
+
+    Returns:
+        int: Exit code
+    """
+    from utils.face_utils import encode_images
+
+    paths = _image_paths(images)
+    if not paths:
+        print(f"❌ No images found in {', '.join(images)}")
+        return 1
+    store = _open_store(store_path, create=True)
+
+    start = time.perf_counter()
+    encodings = []
+    for path, (image_encodings, error) in zip(paths, encode_images(paths, workers, detector)):
+        if error is not None:
+            print(f"[ERROR] Failed to process {path}: {error}")
+        encodings.extend(image_encodings)
+    if not encodings:
+        print(f"❌ No faces found in the images of {name}.")
+        return 1
+
+    entry = store.add_person(name, encodings, replace=replace)
+    print(f"[INFO] Added {len(encodings)} encodings for {name} from {len(paths)} images as segment "
+          f"{entry['file']} in {time.perf_counter() - start:.2f}s")
+    _print_stats(store)
+    return 0
+
+def remove_person(store_path, name):
+    """
+    Remove a person from the store with a tombstone.
+
+    Args:
+        store_path (str): Store directory
+        name (str): Person name
+
+    Returns:
+        int: Exit code
+    """
+    store = _open_store(store_path)
+    if store is None:
+        return 1
+    hidden = store.remove_person(name)
+    if not hidden:
+        print(f"❌ {name} is not enrolled in {store_path}")
+        return 1
+    print(f"[INFO] Removed {name} ({hidden} encodings hidden until the next compaction)")
+    _print_stats(store)
+    return 0
+
+def init_store(store_path, gallery_path=None):
+    """
+    Create a store, optionally importing an existing gallery as its first segment.
+
+    Args:
+        store_path (str): Store directory
+        gallery_path (str, optional): Gallery file to import
+
+    Returns:
+        int: Exit code
+    """
+    if is_gallery_store(store_path):
+        print(f"❌ {store_path} already holds a gallery store.")
+        return 1
+    gallery = load_gallery(gallery_path) if gallery_path else None
+    store = GalleryStore.create(store_path, gallery)
+    print(f"[INFO] Created gallery store {store_path}")
+    _print_stats(store)
+    return 0
+
+def list_store(store_path):
+    """
+    Print the people in a store and its segments.
+
+    Args:
+        store_path (str): Store directory
+
+    Returns:
+        int: Exit code
+    """
+    store = _open_store(store_path)
+    if store is None:
+        return 1
+    for name, count in sorted(store.people().items()):
+        print(f"{name}: {count} encodings")
+    _print_stats(store)
+    return 0
+
+def compact_store(store_path, watch=0.0, max_segments=8, max_dead_ratio=0.2):
+    """
+    Compact a store now, or keep compacting it in the background.
+
+    Args:
+        store_path (str): Store directory
+        watch (float): Check the store every this many seconds instead of
+            compacting once (0 to compact once)
+        max_segments (int): With watch, compact when the store has more segments
+        max_dead_ratio (float): With watch, compact when this fraction of rows is dead
+
+    Returns:
+        int: Exit code
+    """
+    store = _open_store(store_path)
+    if store is None:
+        return 1
+
+    if not watch:
+        start = time.perf_counter()
+        result = store.compact()
+        if result is None:
+            print("[INFO] Nothing to compact (or another compaction is running).")
+        else:
+            before, after = result["before"], result["after"]
+            print(f"[INFO] Compacted {before['segments']} segments ({before['rows']} rows) into "
+                  f"{after['segments']} ({after['rows']} rows) in {time.perf_counter() - start:.2f}s")
+        _print_stats(store)
+        return 0
+
+    compactor = StoreCompactor(store, watch, max_segments, max_dead_ratio)
+    running = [True]
+    def stop(signum, frame):
+        running[0] = False
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    print(f"[INFO] Compacting {store_path} when it has more than {max_segments} segments "
+          f"or {max_dead_ratio:.0%} dead rows. Press Ctrl+C to stop.")
+    compactor.start()
+    try:
+        while running[0]:
+            time.sleep(0.5)
+    finally:
+        compactor.stop()
+    print(f"[INFO] Ran {compactor.compactions} compactions.")
+    return 0
+
+def run_store_command(args):
+    """
+    Run a store subcommand from parsed arguments.
+
+    Args:
+        args (argparse.Namespace): Arguments with a "store_command" and its options
+
+    Returns:
+        int: Exit code
+    """
+    if args.store_command == "init":
+        return init_store(args.store, args.source)
+    if args.store_command == "list":
+        return list_store(args.store)
+    return compact_store(args.store, args.watch, args.max_segments, args.max_dead_ratio)
+
+def main():
+    """Parse arguments and run the store command."""
+    from cli import main as cli_main
+    return cli_main(command="store")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Thin client for the recognition daemon.
+This script sends images to a running recognition daemon and prints the
+identities it found. It only imports the standard library, so a query
+costs a few milliseconds on top of the daemon's recognition time.
+"""
+import os
+import sys
+import json
+import time
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.daemon_client import RecognitionClient
+
+def query_daemon(images, socket_path=None, host="127.0.0.1", port=None, scale=None, repeat=1, as_json=False):
+    """
+    Recognize images with the daemon and print the results.
+
+    Args:
+        images (list): Image files
+        socket_path (str, optional): Unix socket of the daemon
+        host (str): Host of the daemon when using TCP
+        port (int, optional): TCP port of the daemon
+        scale (float, optional): Factor images are resized by before detection
+        repeat (int): Times to send every image, to measure round trips
+        as_json (bool): Print one JSON object per image instead of text
+
+    Returns:
+        int: Exit code
+    """
+    round_trips = []
+    failed = 0
+    with RecognitionClient(socket_path, host, port) as client:
+        for path in images:
+            try:
+                with open(path, "rb") as f:
+                    payload = f.read()
+            except OSError as e:
+                print(f"❌ Could not read {path}: {e}")
+                return 1
+            try:
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    faces = client.recognize(payload, scale)
+                    round_trips.append((time.perf_counter() - start) * 1000.0)
+            except RuntimeError as e:
+                # The daemon rejected this image; the others can still be recognized
+                print(f"❌ {path}: {e}")
+                failed += 1
+                continue
+            if as_json:
+                print(json.dumps({"file": path, "faces": faces}))
+            else:
+                names = ", ".join(f"{face['name']} ({face['distance']:.2f})" for face in faces) or "no faces"
+                print(f"{path}: {names} [{round_trips[-1]:.1f} ms]")
+
+    if repeat > 1 and round_trips:
+        round_trips.sort()
+        p50 = round_trips[len(round_trips) // 2]
+        p95 = round_trips[min(len(round_trips) - 1, int(len(round_trips) * 0.95))]
+        print(f"[INFO] {len(round_trips)} round trips: p50 {p50:.1f} ms, p95 {p95:.1f} ms", file=sys.stderr)
+    return 1 if failed else 0
+
+def run_query(args):
+    """
+    Run the client for parsed command-line options.
+
+    Args:
+        args (argparse.Namespace): Parsed options of the query command
+
+    Returns:
+        int: Exit code
+    """
+    try:
+        if args.status or args.reload:
+            with RecognitionClient(args.socket, args.host, args.port) as client:
+                if args.reload:
+                    client.reload()
+                    print("[INFO] Gallery reload requested.")
+                if args.status:
+                    print(json.dumps(client.status(), indent=2))
+        if args.images:
+            return query_daemon(args.images, args.socket, args.host, args.port, args.scale, args.repeat, args.json)
+        if not (args.status or args.reload):
+            print("❌ Nothing to do: give image files, --status or --reload.")
+            return 1
+    except (OSError, RuntimeError) as e:
+        print(f"❌ Recognition daemon error: {e}")
+        return 1
+    return 0
+
+def main():
+    """Parse arguments and query the daemon."""
+    from cli import main as cli_main
+    return cli_main(command="query")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Long-running recognition daemon.
+The daemon loads face_recognition, the detector and the gallery once and
+serves recognition requests over a Unix socket (or a localhost TCP port),
+so clients skip the seconds of imports and model loading a fresh script
+pays. Requests are handled with asyncio; requests that arrive together
+are grouped into micro-batches, and all faces of a batch are matched
+against the gallery in a single call on the model thread.
+"""
+import os
+import sys
+import json
+import time
+import struct
+import socket
+import signal
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import face_recognition
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.adaptive import scale_frame_box
+from utils.daemon_client import DEFAULT_SOCKET, MAX_HEADER_BYTES, encode_message
+from utils.detectors import create_detector
+from utils.metrics import PipelineMetrics
+from utils.reloader import MatcherReloader
+
+# Largest image accepted in a request.
+MAX_IMAGE_BYTES = 32 << 20
+
+class RecognitionService:
+    """
+    The warm recognition pipeline: detector, encoder and gallery matcher.
+
+    process_batch is only called from the single model thread, so the
+    detector and dlib models are never used concurrently.
+    """
+
+    def __init__(self, encodings_path, tolerance=0.5, nprobe=8, detector="hog", scale=0.25, reload_interval=2.0,
+                 metrics=None, shards=1):
+        """
+        Load the gallery and the models.
+
+        Args:
+            encodings_path (str): Path to the gallery file
+            tolerance (float): Recognition tolerance
+            nprobe (int): IVF lists scanned per face (0 for exhaustive matching)
+            detector (str): Face detector backend
+            scale (float): Default factor images are resized by before detection
+            reload_interval (float): Seconds between checks for a new gallery
+            metrics (PipelineMetrics, optional): Instrumentation to record stage timings in
+            shards (int): Shards exhaustive matching is split into
+        """
+        self.scale = scale
+        self.metrics = metrics or PipelineMetrics("daemon")
+        self.reloader = MatcherReloader(encodings_path, tolerance=tolerance, nprobe=nprobe,
+                                        poll_interval=reload_interval, shards=shards)
+        if self.reloader.matcher is None:
+            raise ValueError(f"No face encodings found in {encodings_path}")
+        self.detector = create_detector(detector)
+        self.detector_name = detector
+        self.images = 0
+        self.batches = 0
+
+        # Run the models once so the first request does not pay for lazy initialisation
+        warmup = np.zeros((240, 320, 3), dtype=np.uint8)
+        self.detector.detect(warmup, cv2.cvtColor(warmup, cv2.COLOR_BGR2RGB))
+        face_recognition.face_encodings(cv2.cvtColor(warmup, cv2.COLOR_BGR2RGB), [(40, 200, 200, 40)])
+
+    def process_batch(self, requests):
+        """
+        Recognize the faces in a batch of images.
+
+        Args:
+            requests (list): (encoded image bytes, scale or None) pairs
+
+        Returns:
+            list: Per request, a list of face dicts or the exception it raised
+        """
+        # Read the matcher once so a gallery reload never lands mid-batch
+        matcher = self.reloader.matcher
+        results = []
+        found = []
+        encodings = []
+        for payload, scale in requests:
+            try:
+                with self.metrics.stage("decode"):
+                    frame = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if frame is None:
+                    raise ValueError("Could not decode the image")
+                scale = scale or self.scale
+                with self.metrics.stage("resize"):
+                    small = cv2.resize(frame, (0, 0), fx=scale, fy=scale) if scale != 1.0 else frame
+                    rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+                with self.metrics.stage("detect"):
+                    boxes = self.detector.detect(small, rgb)
+                with self.metrics.stage("encode"):
+                    faces = face_recognition.face_encodings(rgb, boxes) if boxes else []
+                results.append([scale_frame_box(box, small.shape, frame.shape) for box in boxes])
+                found.append(len(faces))
+                encodings.extend(faces)
+            except Exception as e:
+                results.append(e)
+                found.append(0)
+
+        # One match call for every face in the batch
+        with self.metrics.stage("match"):
+            matches = matcher.match(np.asarray(encodings, dtype=np.float32)) if encodings else []
+
+        start = 0
+        for i, count in enumerate(found):
+            if isinstance(results[i], Exception):
+                continue
+            results[i] = [{"box": list(box), "name": match.name, "distance": round(match.distance, 4)}
+                          for box, match in zip(results[i], matches[start:start + count])]
+            start += count
+            self.metrics.frame_done(faces=count)
+        self.images += len(requests)
+        self.batches += 1
+        self.metrics.maybe_dump()
+        return results
+
+    def status(self):
+        """
+        Summarize the gallery and the batching so far.
+
+        Returns:
+            dict: Status fields
+        """
+        matcher = self.reloader.matcher
+        return {
+            "gallery": matcher.count,
+            "people": len(matcher.names),
+            "gallery_version": self.reloader.version,
+            "detector": self.detector_name,
+            "scale": self.scale,
+            "images": self.images,
+            "batches": self.batches,
+            "mean_batch": round(self.images / self.batches, 2) if self.batches else 0.0,
+        }
+
+class MicroBatcher:
+    """
+    Groups concurrent requests into batches for one worker thread.
+
+    A batch starts with the first waiting request and takes every request
+    that arrives within max_wait_ms, up to max_batch. While a batch is
+    being processed new requests queue up, so under load batches grow on
+    their own, while a lone request on an idle daemon waits at most
+    max_wait_ms.
+    """
+
+    def __init__(self, process_batch, max_batch=16, max_wait_ms=2.0):
+        """
+        Configure the batcher.
+
+        Args:
+            process_batch (callable): Called with a list of items, returns one result per item
+            max_batch (int): Largest batch
+            max_wait_ms (float): How long a batch waits for more requests
+        """
+        self.process_batch = process_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        # Created by start() on the loop that runs the batcher: before
+        # Python 3.10 a queue is bound to the loop current at creation
+        self.queue = None
+        # dlib and the detectors are not shared between threads
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recognition")
+
+    async def submit(self, item):
+        """
+        Queue an item and wait for its result.
+
+        Args:
+            item: Anything process_batch accepts
+
+        Returns:
+            The item's result
+
+        Raises:
+            Exception: The exception process_batch returned for the item
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((item, future))
+        result = await future
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def start(self):
+        """
+        Create the queue and start forming batches on the running loop.
+
+        Returns:
+            asyncio.Task: The batching task, to cancel on shutdown
+        """
+        self.queue = asyncio.Queue()
+        return asyncio.ensure_future(self.run())
+
+    async def run(self):
+        """Form and process batches until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.process_batch, items)
+            except Exception as e:
+                results = [e] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+async def _read_message(reader):
+    """Read one framed request from an asyncio stream."""
+    (length,) = struct.unpack("<I", await reader.readexactly(4))
+    if length > MAX_HEADER_BYTES:
+        raise ValueError(f"Request header too large ({length} bytes)")
+    header = json.loads((await reader.readexactly(length)).decode("utf-8"))
+    if not isinstance(header, dict):
+        raise ValueError("Request header is not a JSON object")
+    size = int(header.get("size", 0))
+    if size > MAX_IMAGE_BYTES:
+        raise ValueError(f"Image too large ({size} bytes)")
+    payload = await reader.readexactly(size) if size else b""
+    return header, payload
+
+class RecognitionDaemon:
+    """
+    asyncio server answering ping, status, reload and recognize requests.
+    """
+
+    def __init__(self, service, max_batch=16, max_wait_ms=2.0):
+        self.service = service
+        self.batcher = MicroBatcher(service.process_batch, max_batch, max_wait_ms)
+        self.started = time.monotonic()
+
+    async def handle(self, request):
+        """
+        Answer one request.
+
+        Args:
+            request (tuple): (header, payload)
+
+        Returns:
+            dict: Reply header
+        """
+        header, payload = request
+        op = header.get("op")
+        if op == "recognize":
+            if not payload:
+                raise ValueError("No image in the request")
+            start = time.perf_counter()
+            faces = await self.batcher.submit((payload, header.get("scale")))
+            return {"ok": True, "faces": faces, "server_ms": round((time.perf_counter() - start) * 1000.0, 3)}
+        if op == "ping":
+            return {"ok": True}
+        if op == "status":
+            return dict(self.service.status(), ok=True, uptime_s=round(time.monotonic() - self.started, 1))
+        if op == "reload":
+            self.service.reloader.request_reload()
+            return {"ok": True}
+        raise ValueError(f"Unknown op '{op}'")
+
+    async def serve_connection(self, reader, writer):
+        """Answer requests on one connection until the client disconnects."""
+        try:
+            while True:
+                try:
+                    request = await _read_message(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                try:
+                    reply = await self.handle(request)
+                except Exception as e:
+                    reply = {"ok": False, "error": str(e)}
+                writer.write(encode_message(reply))
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            print(f"[WARNING] Dropping client: {e}")
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path=None, host="127.0.0.1", port=None):
+        """
+        Listen until SIGINT or SIGTERM.
+
+        Args:
+            socket_path (str, optional): Unix socket to listen on
+            host (str): Address to listen on when using TCP
+            port (int, optional): TCP port; when given, TCP is used instead of the Unix socket
+        """
+        # The queue must exist before the first client can submit to it
+        batcher = self.batcher.start()
+        try:
+            if port:
+                server = await asyncio.start_server(self.serve_connection, host, port)
+                for sock in server.sockets:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                where = f"{host}:{port}"
+            else:
+                server = await asyncio.start_unix_server(self.serve_connection, socket_path)
+                where = socket_path
+
+            loop = asyncio.get_running_loop()
+            stop = loop.create_future()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signum, lambda: stop.done() or stop.set_result(None))
+
+            print(f"[INFO] Recognition daemon listening on {where}. Press Ctrl+C to stop.")
+            async with server:
+                await stop
+        finally:
+            batcher.cancel()
+            self.batcher.executor.shutdown(wait=True)
+
+def _check_socket(socket_path):
+    """Remove a stale socket file; fail if another daemon is listening on it."""
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        os.unlink(socket_path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"A daemon is already listening on {socket_path}")
+
+def run_daemon(encodings_path=None, tolerance=0.5, nprobe=8, detector="hog", scale=0.25, socket_path=None,
+               host="127.0.0.1", port=None, max_batch=16, max_wait_ms=2.0, reload_interval=2.0, metrics=None,
+               shards=1):
+    """
+    Load the models and gallery and serve recognition requests.
+
+    Args:
+        encodings_path (str, optional): Path to the gallery file
+        tolerance (float): Recognition tolerance
+        nprobe (int): IVF lists scanned per face (0 for exhaustive matching)
+        detector (str): Face detector backend
+        scale (float): Default factor images are resized by before detection
+        socket_path (str, optional): Unix socket to listen on (default recognizer.sock)
+        host (str): Address to listen on when using TCP
+        port (int, optional): TCP port; when given, TCP is used instead of the Unix socket
+        max_batch (int): Largest micro-batch
+        max_wait_ms (float): How long a batch waits for more requests
+        reload_interval (float): Seconds between checks for a new gallery
+        metrics (PipelineMetrics, optional): Instrumentation to record stage timings in
+        shards (int): Shards exhaustive matching is split into
+    """
+    if encodings_path is None:
+        encodings_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "encodings.gallery")
+    socket_path = socket_path or DEFAULT_SOCKET
+    if not port:
+        try:
+            _check_socket(socket_path)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return
+
+    start = time.perf_counter()
+    print(f"[INFO] Loading encodings from {encodings_path} and the {detector} detector...")
+    try:
+        service = RecognitionService(encodings_path, tolerance, nprobe, detector, scale, reload_interval, metrics,
+                                     shards)
+    except Exception as e:
+        print(f"❌ {e}")
+        return
+    service.reloader.start()
+    service.reloader.install_signal_handler()
+    print(f"[INFO] Ready in {time.perf_counter() - start:.2f}s: {service.reloader.matcher.count} encodings "
+          f"for {len(service.reloader.matcher.names)} people.")
+
+    try:
+        asyncio.run(RecognitionDaemon(service, max_batch, max_wait_ms).serve(socket_path, host, port))
+    finally:
+        service.reloader.stop()
+        service.metrics.close()
+        if not port and os.path.exists(socket_path):
+            os.unlink(socket_path)
+        status = service.status()
+        print(f"[INFO] Served {status['images']} images in {status['batches']} batches "
+              f"(mean batch {status['mean_batch']}).")
+
+def main():
+    """Parse arguments and run the recognition daemon."""
+    from cli import main as cli_main
+    return cli_main(command="daemon")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,135 +1,347 @@
 #!/usr/bin/env python3
 """
 Face recognition attendance system.
-This script recognizes faces from a webcam and logs attendance.
+This script recognizes faces from one or more webcams and logs attendance.
+Every camera has its own capture thread; a fair scheduler hands the newest
+frame of each camera to a shared pool of recognition workers, which all
+use one copy of the gallery and one attendance log.
 """
 import cv2
 import sys
 import os
-import argparse
-from datetime import datetime
-import csv
 import time
+import threading
 import face_recognition
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.face_utils import load_encodings, get_attendance_file
+from utils.reloader import MatcherReloader
+from utils.attendance import AttendanceWriter
+from utils.attendance_db import AttendanceDatabase
+from utils.matcher import UNKNOWN_NAME
+from utils.scheduler import CameraStream, FairScheduler, format_status
+from utils.recording import RECORDING_EXTENSION, open_frame_source
+from utils.tracker import FaceTracker
+from utils.motion import MotionGate
+from utils.adaptive import AdaptiveController, scale_frame_box
+from utils.detectors import create_detector
+from utils.metrics import PipelineMetrics
 
-def run_attendance_system(encodings_path=None, tolerance=0.5):
-    """Run the face recognition attendance system."""
+def parse_source(source):
+    """
+    Turn a command-line video source into a cv2.VideoCapture argument.
+    
+    Args:
+        source (str or int): Camera index, video file or stream URL
+        
+    Returns:
+        int or str: Camera indices as int, anything else unchanged
+    """
+    if isinstance(source, str) and source.isdigit():
+        return int(source)
+    return source
+
+def draw_faces(frame, faces):
+    """
+    Draw face boxes and names on a frame.
+    
+    Args:
+        frame (np.ndarray): BGR frame, drawn on in place
+        faces (list): ((top, right, bottom, left), name) pairs
+    """
+    for (top, right, bottom, left), name in faces:
+        cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
+        cv2.putText(frame, name, (left, top - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.75, (0, 255, 0), 2)
+
+def process_frame(camera, frame, face_detector, matcher, attendance, multi_camera=False):
+    """
+    Recognize the faces in one frame of a camera and annotate it.
+    
+    Args:
+        camera (CameraStream): Camera the frame came from
+        frame (np.ndarray): BGR frame, annotated in place
+        face_detector (FaceDetector): Detector owned by the calling worker
+        matcher (FaceMatcher): Shared matcher
+        attendance (AttendanceWriter): Shared attendance log
+        multi_camera (bool): Name the camera in log lines
+        
+    Returns:
+        int: Number of faces found
+    """
+    metrics = camera.metrics
+    
+    # Skip detection entirely when nothing changed since the last processed frame
+    if camera.motion is not None:
+        with metrics.stage("motion"):
+            moving = camera.motion.should_process(frame)
+        metrics.set_skipped(camera.motion.skipped)
+        if not moving:
+            draw_faces(frame, camera.faces)
+            return len(camera.faces)
+    
+    # Between detections the adaptive controller reuses the previous boxes
+    controller = camera.controller
+    if not controller.should_detect():
+        if camera.motion is not None:
+            # The change has not been looked at yet; let the next frame through
+            camera.motion.invalidate()
+        draw_faces(frame, camera.faces)
+        return len(camera.faces)
+    started = time.perf_counter()
+    
+    # Resize frame for faster processing, by the scale the controller chose
+    scale = controller.scale
+    with metrics.stage("resize"):
+        small_frame = cv2.resize(frame, (0, 0), fx=scale, fy=scale)
+    
+    # Convert to RGB (face_recognition uses RGB)
+    with metrics.stage("color"):
+        rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+    
+    # Find faces in the frame
+    with metrics.stage("detect"):
+        face_locations = face_detector.detect(small_frame, rgb_small_frame)
+    
+    # Scale face locations back up by the factor actually applied
+    boxes = [scale_frame_box(box, small_frame.shape, frame.shape) for box in face_locations]
+    
+    # Link detections to tracks so known faces are not re-encoded every frame;
+    # tracks use original coordinates so they survive scale changes
+    camera.frame_index += 1
+    frame_index = camera.frame_index
+    with metrics.stage("track"):
+        tracks = camera.tracker.update(boxes, frame_index)
+        pending = [i for i, track in enumerate(tracks) if camera.tracker.needs_encoding(track, frame_index)]
+    
+    if pending:
+        # Generate encodings only for new tracks and tracks due for re-verification
+        with metrics.stage("encode"):
+            face_encodings = face_recognition.face_encodings(
+                rgb_small_frame, [face_locations[i] for i in pending])
+        
+        # Match every pending face against the gallery at once
+        with metrics.stage("match"):
+            matches = matcher.match(face_encodings)
+        for i, match in zip(pending, matches):
+            tracks[i].assign(match, frame_index)
+    
+    controller.update(time.perf_counter() - started, [bottom - top for top, _, bottom, _ in boxes])
+    
+    # Process each tracked face
+    faces = []
+    for box, track in zip(boxes, tracks):
+        name = track.name
+        faces.append((box, name))
+        
+        # Log attendance for recognized people (only once across all cameras)
+        if name != UNKNOWN_NAME:
+            with metrics.stage("log"):
+                attendance.log(name, camera.name if multi_camera else None)
+    
+    # Keep the faces so frames skipped by the motion gate can show them
+    camera.faces = faces
+    draw_faces(frame, faces)
+    
+    if multi_camera:
+        status = f"{camera.name} {camera.fps:.1f} fps backlog {camera.backlog} scale {controller.scale:.2f}"
+        cv2.putText(frame, status, (10, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+    
+    return len(face_locations)
+
+def _recognition_worker(scheduler, detector, reloader, attendance, multi_camera, errors, on_result=None):
+    """Worker thread: process the frames the scheduler hands out until it stops."""
+    try:
+        face_detector = create_detector(detector)
+    except Exception as e:
+        errors.append(e)
+        scheduler.stop()
+        return
+    
+    while scheduler.running:
+        camera = scheduler.acquire()
+        if camera is None:
+            continue
+        faces = 0
+        try:
+            ret, frame, seq, timestamp = camera.grabber.read(timeout=0)
+            if ret:
+                # Read the matcher once so a gallery reload never lands mid-frame
+                matcher, version = reloader.matcher, reloader.version
+                if version != camera.gallery_version:
+                    # Identities cached by the tracker came from the old gallery
+                    for track in camera.tracker.tracks:
+                        track.last_verified = None
+                    camera.gallery_version = version
+                faces = process_frame(camera, frame, face_detector, matcher, attendance, multi_camera)
+                camera.display = frame
+                camera.display_seq += 1
+                if on_result is not None:
+                    on_result(camera.name, seq, timestamp, camera.faces)
+                camera.metrics.frame_done(faces=faces)
+                camera.metrics.set_dropped(camera.grabber.dropped)
+                camera.metrics.set_backlog(camera.backlog)
+                camera.metrics.maybe_dump()
+        except Exception as e:
+            print(f"❌ Error occurred on {camera.name}: {e}")
+        finally:
+            scheduler.release(camera, faces)
+
+def run_attendance_system(encodings_path=None, tolerance=0.5, nprobe=8, reverify_interval=30, detector="hog",
+                          metrics=None, sources=None, workers=0, status_interval=10.0, attendance_db=None,
+                          reload_interval=2.0, motion_threshold=0.002, motion_recheck=30,
+                          scale=0.25, target_fps=0.0, target_latency=0.0, record=None, replay_speed=1.0,
+                          display=True, on_result=None, shards=1):
+    """
+    Run the face recognition attendance system on one or more cameras.
+    
+    Sources may be .frec recordings, which are replayed instead of opening a
+    camera; record saves the live session for later replay. With display
+    off no windows are opened, and on_result(camera, seq, timestamp, faces)
+    is called after every processed frame. shards splits exhaustive
+    matching into that many shards scored in parallel.
+    """
+    if metrics is None:
+        metrics = PipelineMetrics("attendance")
     if encodings_path is None:
-        encodings_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "encodings.pickle")
+        encodings_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "encodings.gallery")
+    sources = [parse_source(source) for source in (sources or [0])]
+    multi_camera = len(sources) > 1
+    workers = workers or min(len(sources), os.cpu_count() or 1)
     
-    # Load encodings
+    # Load encodings once; every camera and worker shares the matcher
     print(f"[INFO] Loading encodings from {encodings_path}...")
-    data = load_encodings(encodings_path)
+    reloader = MatcherReloader(encodings_path, tolerance=tolerance, nprobe=nprobe, poll_interval=reload_interval,
+                               shards=shards)
     
-    if not data["encodings"]:
+    if reloader.matcher is None:
         print("❌ No face encodings found. Please run encode_faces.py first.")
         return
     
-    print(f"[INFO] Loaded {len(data['encodings'])} face encodings.")
+    try:
+        create_detector(detector)
+    except Exception as e:
+        print(f"❌ Could not set up the {detector} detector: {e}")
+        return
+    print(f"[INFO] Using the {detector} face detector.")
     
-    # Set up attendance file
-    attendance_file = get_attendance_file()
-    logged_names = set()
+    # Set up the attendance log; rows are written on a background thread
+    attendance = AttendanceWriter(sink=AttendanceDatabase(attendance_db) if attendance_db else None)
+    if attendance.logged_names:
+        print(f"[INFO] {len(attendance.logged_names)} people already logged today.")
     
-    # Start webcam
-    print("[INFO] Starting webcam...")
-    video_capture = cv2.VideoCapture(0)
+    # Start the cameras
+    print("[INFO] Starting webcam..." if not multi_camera else f"[INFO] Starting {len(sources)} cameras...")
+    scheduler = FairScheduler()
+    cameras = []
+    for i, source in enumerate(sources):
+        name = f"cam{i}"
+        camera_metrics = metrics
+        if multi_camera:
+            camera_metrics = PipelineMetrics(f"{metrics.pipeline}-{name}", dump_dir=metrics.dump_dir,
+                                             interval=metrics.interval, summary=metrics.summary)
+        motion = MotionGate(motion_threshold, recheck_interval=motion_recheck) if motion_threshold > 0 else None
+        controller = AdaptiveController(target_fps=target_fps, target_latency_ms=target_latency, scale=scale)
+        camera_record = record
+        if record and multi_camera:
+            root, ext = os.path.splitext(record)
+            camera_record = f"{root}.{name}{ext or RECORDING_EXTENSION}"
+        grabber = open_frame_source(source, on_frame=scheduler.notify, record=camera_record,
+                                    replay_speed=replay_speed)
+        camera = CameraStream(name, grabber, FaceTracker(reverify_interval=reverify_interval), camera_metrics,
+                              motion=motion, controller=controller)
+        if not camera.grabber.isOpened():
+            print(f"❌ Camera {source} not available. Please check your camera connection.")
+            camera.grabber.release()
+            continue
+        if multi_camera:
+            print(f"[INFO] {name}: {source}")
+        scheduler.add(camera)
+        cameras.append(camera)
     
-    if not video_capture.isOpened():
+    if not cameras:
         print("❌ Webcam not available. Please check your camera connection.")
+        attendance.close()
         return
+    for camera in cameras:
+        camera.grabber.start()
+    
+    errors = []
+    threads = [threading.Thread(target=_recognition_worker, name=f"recognition-{i}",
+                                args=(scheduler, detector, reloader, attendance, multi_camera, errors, on_result), daemon=True)
+               for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    
+    # Pick up re-encoded galleries without a restart
+    reloader.start()
+    if reloader.install_signal_handler():
+        print(f"[INFO] Send SIGHUP to process {os.getpid()} to reload the gallery.")
     
     print("[INFO] Attendance system started. Press 'q' to quit.")
     
+    shown = {camera.name: 0 for camera in cameras}
+    last_status = time.monotonic()
     try:
-        while True:
-            ret, frame = video_capture.read()
-            if not ret:
-                print("⚠️ Failed to grab frame. Retrying...")
-                time.sleep(0.5)
-                continue
-            
-            # Resize frame for faster processing (optional)
-            small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
-            
-            # Convert to RGB (face_recognition uses RGB)
-            rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
-            
-            # Find faces in the frame
-            face_locations = face_recognition.face_locations(rgb_small_frame, model="hog")
+        while scheduler.running:
+            # Replays and video files end once every frame has been processed
+            if all(camera.finished for camera in cameras):
+                break
             
-            if face_locations:
-                # Generate encodings for the detected faces
-                face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
-                
-                # Process each detected face
-                for (top, right, bottom, left), face_encoding in zip(face_locations, face_encodings):
-                    # Scale back up face locations
-                    top *= 4
-                    right *= 4
-                    bottom *= 4
-                    left *= 4
-                    
-                    # Compare with known faces
-                    matches = face_recognition.compare_faces(data["encodings"], face_encoding, tolerance=tolerance)
-                    name = "Unknown"
-                    
-                    if True in matches:
-                        # Find the best match
-                        matched_idxs = [i for i, val in enumerate(matches) if val]
-                        counts = {}
-                        for i in matched_idxs:
-                            matched_name = data["names"][i]
-                            counts[matched_name] = counts.get(matched_name, 0) + 1
-                        name = max(counts, key=counts.get)
-                    
-                    # Draw rectangle and name on the frame
-                    cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
-                    cv2.putText(frame, name, (left, top - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.75, (0, 255, 0), 2)
-                    
-                    # Log attendance for recognized people (only once)
-                    if name != "Unknown" and name not in logged_names:
-                        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        with open(attendance_file, "a", newline="") as f:
-                            writer = csv.writer(f)
-                            writer.writerow([name, now])
-                        logged_names.add(name)
-                        print(f"[LOGGED] {name} at {now}")
+            # Windows can only be updated from the main thread
+            key = 0xFF
+            if display:
+                for camera in cameras:
+                    if camera.display_seq != shown[camera.name]:
+                        shown[camera.name] = camera.display_seq
+                        title = "Face Recognition Attendance" + (f" - {camera.name}" if multi_camera else "")
+                        with camera.metrics.stage("display"):
+                            cv2.imshow(title, camera.display)
+                key = cv2.waitKey(5) & 0xFF
+            else:
+                time.sleep(0.005)
             
-            # Display the resulting frame
-            cv2.imshow("Face Recognition Attendance", frame)
+            if multi_camera and time.monotonic() - last_status >= status_interval:
+                last_status = time.monotonic()
+                print(format_status(scheduler.status()))
             
             # Quit on 'q' press
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            if key == ord('q'):
                 break
                 
     except KeyboardInterrupt:
         print("\n[INFO] Interrupted by user.")
-    except Exception as e:
-        print(f"❌ Error occurred: {e}")
     finally:
-        video_capture.release()
-        cv2.destroyAllWindows()
+        scheduler.stop()
+        reloader.stop()
+        for thread in threads:
+            thread.join(timeout=5.0)
+        for camera in cameras:
+            camera.grabber.release()
+            camera.metrics.set_dropped(camera.grabber.dropped)
+            camera.metrics.close()
+        if display:
+            cv2.destroyAllWindows()
+        attendance.close()
     
-    print(f"[INFO] Attendance log saved to {attendance_file}")
-    print(f"[INFO] Total attendance logged: {len(logged_names)} people")
+    for error in errors:
+        print(f"❌ Error occurred: {error}")
+    for camera in cameras:
+        prefix = f"{camera.name}: " if multi_camera else ""
+        print(f"[INFO] {prefix}Skipped {camera.grabber.dropped} stale frames to stay real-time.")
+        if camera.motion is not None:
+            print(f"[INFO] {prefix}Motion gate skipped detection on {camera.motion.skipped} of "
+                  f"{camera.motion.checked} frames ({camera.motion.skip_ratio:.0%}).")
+        if camera.controller.enabled:
+            status = camera.controller.status()
+            print(f"[INFO] {prefix}Adaptive detection ended at scale {status['scale']:.2f}, every "
+                  f"{status['interval']} frames ({status['skipped']} frames reused earlier boxes).")
+    print(f"[INFO] Attendance log saved to {attendance.location}")
+    print(f"[INFO] Total attendance logged: {len(attendance.logged_names)} people")
 
 def main():
     """Parse arguments and run the attendance system."""
-    parser = argparse.ArgumentParser(description="Facial Recognition Attendance System")
-    parser.add_argument("--encodings", type=str, 
-                       default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "encodings.pickle"),
-                       help="Path to face encodings file")
-    parser.add_argument("--tolerance", type=float, default=0.5,
-                       help="Face recognition tolerance (lower is stricter, range 0-1)")
-    args = parser.parse_args()
-    
-    # Run the attendance system
-    run_attendance_system(args.encodings, args.tolerance)
+    from cli import main as cli_main
+    return cli_main(command="attendance")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main())
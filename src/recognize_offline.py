@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Headless face recognition over recorded footage.
+This script runs the recognition pipeline over a video file, a stream URL
+or a folder of images without opening a window, and writes every
+recognized face to a JSON lines or CSV file. Video files and image folders
+are split into chunks that are decoded and processed in parallel worker
+processes, so archived footage is processed faster than real time.
+"""
+import os
+import sys
+import csv
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.face_utils import load_matcher, recognize_frame
+from utils.detectors import create_detector
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+OUTPUT_FIELDS = ["frame", "timestamp", "file", "top", "right", "bottom", "left", "name", "distance"]
+
+# Per-process pipeline, set up once by _init_worker.
+_worker = {}
+
+def _init_worker(encodings_path, tolerance, nprobe, detector, scale):
+    """Load the gallery, matcher and detector once per worker process."""
+    _worker["matcher"] = load_matcher(encodings_path, tolerance=tolerance, nprobe=nprobe, verbose=False)
+    _worker["detector"] = create_detector(detector)
+    _worker["scale"] = scale
+
+def _recognize(frame, frame_index, timestamp, filename=None):
+    """Recognize one frame and turn the faces into output rows."""
+    rows = []
+    for (top, right, bottom, left), match in recognize_frame(frame, _worker["detector"], _worker["matcher"],
+                                                             _worker["scale"]):
+        rows.append({
+            "frame": frame_index,
+            "timestamp": round(timestamp, 3),
+            "file": filename,
+            "top": top,
+            "right": right,
+            "bottom": bottom,
+            "left": left,
+            "name": match.name,
+            "distance": round(match.distance, 4),
+        })
+    return rows
+
+def _process_video_chunk(task):
+    """
+    Decode and recognize one range of frames of a video file.
+
+    Args:
+        task (tuple): (path, first frame, end frame, stride, fps)
+
+    Returns:
+        tuple: (rows, frames processed)
+    """
+    path, start, end, stride, fps = task
+    capture = cv2.VideoCapture(path)
+    rows = []
+    processed = 0
+    try:
+        if start and not seek_frame(capture, start):
+            # Decode from the beginning instead, like a single process would
+            print(f"[WARNING] Could not seek to frame {start} of {path}; decoding up to it instead.")
+            capture.release()
+            capture = cv2.VideoCapture(path)
+            for _ in range(start):
+                if not capture.grab():
+                    return rows, processed
+        for frame_index in range(start, end):
+            if (frame_index - start) % stride:
+                # Skipped frames only need to be grabbed, not decoded into an image
+                if not capture.grab():
+                    break
+                continue
+            ret, frame = capture.read()
+            if not ret:
+                break
+            rows.extend(_recognize(frame, frame_index, frame_index / fps))
+            processed += 1
+    finally:
+        capture.release()
+    return rows, processed
+
+def seek_frame(capture, frame_index):
+    """
+    Position a capture so the next read returns the given frame.
+
+    Backends that land on an earlier keyframe and report it are grabbed
+    forward to the frame.
+
+    Args:
+        capture (cv2.VideoCapture): Open video file
+        frame_index (int): Frame to seek to
+
+    Returns:
+        bool: False if the capture could not be positioned
+    """
+    capture.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+    position = int(capture.get(cv2.CAP_PROP_POS_FRAMES))
+    if position > frame_index:
+        capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        position = 0
+    while position < frame_index:
+        if not capture.grab():
+            return False
+        position += 1
+    return True
+
+def seeking_is_exact(path, frame_index):
+    """
+    Check that seeking lands on the same frame as decoding in order.
+
+    Some codecs and backends seek to a nearby keyframe while reporting the
+    requested position, which would shift every chunk after the first.
+
+    Args:
+        path (str): Video file
+        frame_index (int): Frame to compare
+
+    Returns:
+        bool: True if the seeked frame is identical to the decoded one
+    """
+    capture = cv2.VideoCapture(path)
+    try:
+        for _ in range(frame_index):
+            if not capture.grab():
+                return False
+        ret, expected = capture.read()
+        if not ret or not seek_frame(capture, frame_index):
+            return False
+        ret, frame = capture.read()
+        return ret and frame.shape == expected.shape and (frame == expected).all()
+    finally:
+        capture.release()
+
+def _process_images(task):
+    """
+    Recognize a chunk of images.
+
+    Args:
+        task (list): (frame index, image path, name written to the output) tuples
+
+    Returns:
+        tuple: (rows, images processed)
+    """
+    rows = []
+    processed = 0
+    for frame_index, path, filename in task:
+        frame = cv2.imread(path)
+        if frame is None:
+            print(f"[WARNING] Could not read image: {path}")
+            continue
+        rows.extend(_recognize(frame, frame_index, 0.0, filename))
+        processed += 1
+    return rows, processed
+
+def _process_frames(task):
+    """
+    Recognize a batch of frames that were already decoded.
+
+    Args:
+        task (list): (frame index, timestamp, frame) tuples
+
+    Returns:
+        tuple: (rows, frames processed)
+    """
+    rows = []
+    for frame_index, timestamp, frame in task:
+        rows.extend(_recognize(frame, frame_index, timestamp))
+    return rows, len(task)
+
+def list_images(folder):
+    """
+    List the images in a folder, recursively and in a stable order.
+
+    Args:
+        folder (str): Folder to search
+
+    Returns:
+        list: Image paths
+    """
+    paths = []
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(root, filename))
+    return paths
+
+def read_stream_batches(source, stride=1, batch_size=16, fps=None):
+    """
+    Read a stream on the calling thread and group its frames into batches.
+
+    Args:
+        source (str): Stream URL, or a video that cannot be split into chunks
+        stride (int): Process every stride-th frame
+        batch_size (int): Frames per batch
+        fps (float, optional): Frame rate of a video file, for timestamps
+            in video time instead of seconds since the start of reading
+
+    Yields:
+        list: (frame index, seconds since the start, frame) tuples
+    """
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise IOError(f"Could not open {source}")
+
+    started = time.monotonic()
+    batch = []
+    frame_index = 0
+    try:
+        while True:
+            if frame_index % stride:
+                if not capture.grab():
+                    break
+                frame_index += 1
+                continue
+            ret, frame = capture.read()
+            if not ret:
+                break
+            timestamp = frame_index / fps if fps else time.monotonic() - started
+            batch.append((frame_index, timestamp, frame))
+            frame_index += 1
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    finally:
+        capture.release()
+    if batch:
+        yield batch
+
+def plan_video_chunks(path, stride=1, chunk_size=300):
+    """
+    Split a video file into frame ranges that can be decoded independently.
+
+    Args:
+        path (str): Video file
+        stride (int): Process every stride-th frame
+        chunk_size (int): Frames per chunk (rounded up to a multiple of stride)
+
+    Returns:
+        tuple: (list of tasks, frame count, frames per second), or None if the
+               length of the video is unknown. The tasks are None if seeking
+               in the video is not frame-accurate, so it must be decoded in order
+    """
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise IOError(f"Could not open {path}")
+    frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    capture.release()
+    if frame_count <= 0:
+        return None
+
+    # Keep chunk boundaries on the stride so the same frames are processed
+    # no matter how the video is split.
+    chunk_size = max(stride, -(-chunk_size // stride) * stride)
+    tasks = [(path, start, min(start + chunk_size, frame_count), stride, fps)
+             for start in range(0, frame_count, chunk_size)]
+    if len(tasks) > 1 and not seeking_is_exact(path, chunk_size):
+        return None, frame_count, fps
+    return tasks, frame_count, fps
+
+class ResultWriter:
+    """
+    Writes recognition rows as JSON lines or CSV.
+    """
+
+    def __init__(self, path, output_format):
+        self.file = open(path, "w", newline="")
+        self.format = output_format
+        self.rows = 0
+        if output_format == "csv":
+            self.writer = csv.DictWriter(self.file, fieldnames=OUTPUT_FIELDS)
+            self.writer.writeheader()
+
+    def write(self, rows):
+        """Append rows to the output."""
+        for row in rows:
+            if self.format == "csv":
+                self.writer.writerow(row)
+            else:
+                self.file.write(json.dumps(row) + "\n")
+        self.rows += len(rows)
+
+    def close(self):
+        """Close the output file."""
+        self.file.close()
+
+def _run_tasks(function, tasks, workers, initargs, max_pending=None):
+    """
+    Run tasks on a process pool, yielding results in submission order.
+
+    Args:
+        function (callable): Task function
+        tasks (iterable): Task arguments, consumed lazily
+        workers (int): Number of worker processes (1 runs in this process)
+        initargs (tuple): Arguments for _init_worker
+        max_pending (int, optional): Maximum tasks in flight
+
+    Yields:
+        Result of every task, in order
+    """
+    if workers <= 1:
+        _init_worker(*initargs)
+        yield from map(function, tasks)
+        return
+
+    max_pending = max_pending or workers * 2
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as executor:
+        # A bounded window keeps memory flat on endless streams while every
+        # worker stays busy.
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(function, task))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def run_offline_recognition(source, output, encodings_path=None, tolerance=0.5, nprobe=8, detector="hog",
+                            workers=0, stride=1, scale=0.25, chunk_size=300, output_format=None):
+    """
+    Recognize faces in a video file, stream or image folder without a display.
+
+    Args:
+        source (str): Video file, stream URL or folder of images
+        output (str): Path of the results file
+        encodings_path (str, optional): Path to the gallery file
+        tolerance (float): Recognition tolerance
+        nprobe (int): IVF lists scanned per face (0 for exhaustive matching)
+        detector (str): Face detector backend
+        workers (int): Number of worker processes (0 to use all CPU cores)
+        stride (int): Process every stride-th video frame
+        scale (float): Factor frames are resized by before detection
+        chunk_size (int): Frames per chunk handed to a worker
+        output_format (str, optional): "jsonl" or "csv" (default from the output extension)
+
+    Returns:
+        int: Number of faces written, or None if nothing could be processed
+    """
+    if encodings_path is None:
+        encodings_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "encodings.gallery")
+    if output_format is None:
+        output_format = "csv" if output.lower().endswith(".csv") else "jsonl"
+    workers = workers or os.cpu_count() or 1
+    stride = max(1, stride)
+
+    # Load once here to fail early; every worker loads its own copy.
+    print(f"[INFO] Loading encodings from {encodings_path}...")
+    if load_matcher(encodings_path, tolerance=tolerance, nprobe=nprobe) is None:
+        print("❌ No face encodings found. Please run encode_faces.py first.")
+        return None
+    initargs = (encodings_path, tolerance, nprobe, detector, scale)
+
+    duration = None
+    if os.path.isdir(source):
+        images = list_images(source)
+        if not images:
+            print(f"❌ No images found in {source}")
+            return None
+        indexed = [(i, path, os.path.relpath(path, source)) for i, path in enumerate(images)]
+        chunk = max(1, min(chunk_size, -(-len(indexed) // (workers * 4))))
+        tasks = [indexed[i:i + chunk] for i in range(0, len(indexed), chunk)]
+        function = _process_images
+        print(f"[INFO] Processing {len(images)} images in {len(tasks)} chunks on {workers} workers...")
+    else:
+        plan = None
+        if "://" not in source:
+            if not os.path.exists(source):
+                print(f"❌ Source not found: {source}")
+                return None
+            try:
+                plan = plan_video_chunks(source, stride, chunk_size)
+            except IOError as e:
+                print(f"❌ {e}")
+                return None
+
+        if plan is not None and plan[0] is not None:
+            tasks, frame_count, fps = plan
+            duration = frame_count / fps
+            function = _process_video_chunk
+            print(f"[INFO] Processing {frame_count} frames ({duration:.1f}s of video) "
+                  f"in {len(tasks)} chunks on {workers} workers...")
+        elif plan is not None:
+            _, frame_count, fps = plan
+            duration = frame_count / fps
+            tasks = read_stream_batches(source, stride, batch_size=max(1, min(chunk_size, 16)), fps=fps)
+            function = _process_frames
+            print(f"[INFO] Seeking in {source} is not frame-accurate, so it is decoded in order. "
+                  f"Processing {frame_count} frames ({duration:.1f}s of video) on {workers} workers...")
+        else:
+            # Streams can only be decoded in order, so one reader feeds the workers.
+            tasks = read_stream_batches(source, stride, batch_size=max(1, min(chunk_size, 16)))
+            function = _process_frames
+            print(f"[INFO] Processing stream {source} on {workers} workers...")
+
+    writer = ResultWriter(output, output_format)
+    frames = 0
+    start = time.perf_counter()
+    try:
+        for rows, processed in _run_tasks(function, tasks, workers, initargs):
+            writer.write(rows)
+            frames += processed
+    except KeyboardInterrupt:
+        print("\n[INFO] Interrupted by user.")
+    except IOError as e:
+        print(f"❌ {e}")
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"[INFO] Processed {frames} frames in {elapsed:.1f}s ({frames / max(elapsed, 1e-9):.1f} frames/s).")
+    if duration:
+        print(f"[INFO] {duration / max(elapsed, 1e-9):.1f}x real time.")
+    print(f"[INFO] Wrote {writer.rows} faces to {output}")
+    return writer.rows
+
+def main():
+    """Parse arguments and run offline recognition."""
+    from cli import main as cli_main
+    return cli_main(command="offline")
+
+if __name__ == "__main__":
+    sys.exit(main())
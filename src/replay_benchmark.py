@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark over a recorded camera session.
+This script replays a .frec recording through the attendance or the live
+detection pipeline without a camera or a window, several times in a row,
+and reports the frame rate, the capture-to-result latency percentiles and
+the per-stage timings of each run. Every run also gets a digest of the
+faces it reported per frame: replayed as fast as possible, runs over the
+same recording must produce identical digests, so a change that alters
+the results is caught next to its effect on speed.
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import tempfile
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.metrics import PipelineMetrics
+from utils.recording import read_recording
+from recognize_faces import run_attendance_system
+from detect_faces_live import run_face_detection
+
+PIPELINES = ("attendance", "detect")
+
+def _result_row(faces):
+    """Turn one frame's faces into a JSON-serializable row."""
+    row = []
+    for box, value in faces:
+        # The attendance pipeline reports names, detection reports confidences
+        row.append([int(v) for v in box] + [round(float(value), 4) if isinstance(value, (float, np.floating)) else value])
+    return row
+
+def results_digest(results):
+    """
+    Hash the per-frame results of a run.
+
+    Args:
+        results (list): (sequence number, faces) pairs
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+    digest = hashlib.sha256()
+    for seq, row in sorted(results, key=lambda result: result[0]):
+        digest.update(json.dumps([seq, row], separators=(",", ":")).encode("utf-8"))
+    return digest.hexdigest()
+
+def run_replay(recording, pipeline="attendance", speed=0.0, encodings_path=None, tolerance=0.5, detector=None,
+               prototxt=None, model=None):
+    """
+    Replay a recording once through a pipeline.
+
+    The pipeline runs in a temporary working directory so attendance logs
+    from earlier runs do not change what is logged.
+
+    Args:
+        recording (str): .frec file
+        pipeline (str): "attendance" or "detect"
+        speed (float): Playback speed (0 for as fast as possible, every frame processed)
+        encodings_path (str, optional): Gallery for the attendance pipeline
+        tolerance (float): Recognition tolerance
+        detector (str, optional): Face detector backend
+        prototxt (str, optional): Caffe prototxt for the DNN detector
+        model (str, optional): Caffe model for the DNN detector
+
+    Returns:
+        dict: Frames, FPS, latency percentiles, stage timings and the results digest
+    """
+    results = []
+    latencies = []
+
+    def on_result(*args):
+        # (camera, seq, timestamp, faces) or (seq, timestamp, faces)
+        seq, timestamp, faces = args[-3:]
+        latencies.append((time.monotonic() - timestamp) * 1000.0)
+        results.append((seq, _result_row(faces)))
+
+    # Paths must survive the change of working directory
+    recording = os.path.abspath(recording)
+    encodings_path = os.path.abspath(encodings_path) if encodings_path else None
+    prototxt = os.path.abspath(prototxt) if prototxt else None
+    model = os.path.abspath(model) if model else None
+
+    metrics = PipelineMetrics(pipeline)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        start = time.monotonic()
+        try:
+            if pipeline == "attendance":
+                run_attendance_system(encodings_path, tolerance=tolerance, detector=detector or "hog",
+                                      metrics=metrics, sources=[recording], workers=1, reload_interval=0,
+                                      replay_speed=speed, display=False, on_result=on_result)
+            else:
+                run_face_detection(prototxt, model, detector=detector or "dnn", metrics=metrics,
+                                   source=recording, replay_speed=speed, display=False, on_result=on_result)
+        finally:
+            elapsed = time.monotonic() - start
+            os.chdir(cwd)
+
+    latency = np.array(latencies) if latencies else np.zeros(1)
+    return {
+        "frames": len(results),
+        "faces": sum(len(row) for _, row in results),
+        "elapsed_s": round(elapsed, 3),
+        "fps": round(len(results) / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "mean": round(float(latency.mean()), 3),
+            "p50": round(float(np.percentile(latency, 50)), 3),
+            "p95": round(float(np.percentile(latency, 95)), 3),
+            "p99": round(float(np.percentile(latency, 99)), 3),
+            "max": round(float(latency.max()), 3),
+        },
+        "stages": {name: hist.summary() for name, hist in metrics.stages.items()},
+        "digest": results_digest(results),
+    }
+
+def run_benchmark(recording, pipeline="attendance", runs=2, speed=0.0, encodings_path=None, tolerance=0.5,
+                  detector=None, prototxt=None, model=None, output=None, expect=None):
+    """
+    Replay a recording several times and check the runs agree.
+
+    Args:
+        recording (str): .frec file
+        pipeline (str): "attendance" or "detect"
+        runs (int): Number of replays
+        speed (float): Playback speed (0 for as fast as possible)
+        encodings_path (str, optional): Gallery for the attendance pipeline
+        tolerance (float): Recognition tolerance
+        detector (str, optional): Face detector backend
+        prototxt (str, optional): Caffe prototxt for the DNN detector
+        model (str, optional): Caffe model for the DNN detector
+        output (str, optional): Write the JSON report to this file
+        expect (str, optional): Earlier report whose results this run must reproduce
+
+    Returns:
+        int: 0 if all runs (and the expected report) produced identical results, 1 otherwise
+    """
+    if not os.path.exists(recording):
+        print(f"❌ Recording not found: {recording}")
+        return 1
+    recorded = sum(1 for _ in read_recording(recording))
+    print(f"[INFO] Replaying {recorded} recorded frames through the {pipeline} pipeline, {runs} run(s)...")
+    if speed > 0:
+        print("[WARNING] Frames can be dropped at a fixed speed; results are only comparable at --speed 0.")
+
+    report = {
+        "recording": os.path.abspath(recording),
+        "pipeline": pipeline,
+        "detector": detector,
+        "speed": speed,
+        "recorded_frames": recorded,
+        "runs": [],
+    }
+    for i in range(runs):
+        result = run_replay(recording, pipeline, speed, encodings_path, tolerance, detector, prototxt, model)
+        report["runs"].append(result)
+        latency = result["latency_ms"]
+        print(f"[INFO] Run {i + 1}: {result['frames']} frames, {result['fps']} FPS, latency p50 {latency['p50']} ms, "
+              f"p95 {latency['p95']} ms, p99 {latency['p99']} ms, digest {result['digest'][:12]}")
+
+    digests = {result["digest"] for result in report["runs"]}
+    report["identical"] = len(digests) == 1
+    report["digest"] = report["runs"][0]["digest"] if report["identical"] else None
+    ok = report["identical"]
+    if not ok:
+        print("❌ Runs produced different results.")
+
+    if expect:
+        with open(expect) as f:
+            baseline = json.load(f)
+        report["baseline"] = {"file": expect, "digest": baseline.get("digest"),
+                              "fps": baseline["runs"][-1]["fps"] if baseline.get("runs") else None}
+        if baseline.get("digest") != report["digest"]:
+            print(f"❌ Results differ from {expect}.")
+            ok = False
+        else:
+            print(f"[INFO] Results match {expect}.")
+        if report["baseline"]["fps"]:
+            change = (report["runs"][-1]["fps"] / report["baseline"]["fps"] - 1.0) * 100.0
+            print(f"[INFO] FPS {report['baseline']['fps']} -> {report['runs'][-1]['fps']} ({change:+.1f}%)")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[INFO] Report written to {output}")
+    if ok:
+        print("[✅] All runs produced identical results.")
+    return 0 if ok else 1
+
+def main():
+    """Parse arguments and run the replay benchmark."""
+    from cli import main as cli_main
+    return cli_main(command="replay")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Startup time report for the command-line tools.
+Every measurement starts a fresh interpreter, the way a user runs a
+command, and reports the median wall time over several runs: the bare
+interpreter, --help of every command, an argument validation error, an
+attendance report on an empty database, and the import time of each heavy
+dependency. The fast paths must stay under a budget (200 ms by default).
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+
+CLI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py")
+
+# Dependencies that are only imported once a command needs them.
+HEAVY_MODULES = ["numpy", "cv2", "dlib", "face_recognition"]
+
+def _time_command(cmd, runs):
+    """Median wall time in milliseconds of a command, and its last exit code."""
+    timings = []
+    code = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        code = subprocess.call(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    timings.sort()
+    return timings[len(timings) // 2], code
+
+def run_startup_report(runs=5, budget=200.0, output=None):
+    """
+    Measure and print the startup times.
+
+    Args:
+        runs (int): Runs per measurement
+        budget (float): Milliseconds the fast commands must stay under
+        output (str, optional): Write the JSON report to this file
+
+    Returns:
+        int: 0, or 1 if a fast command is over budget
+    """
+    from cli import COMMANDS
+
+    with tempfile.TemporaryDirectory() as workdir:
+        fast = [("facerec --help", [CLI, "--help"])]
+        fast += [(f"facerec {name} --help", [CLI, name, "--help"]) for name in COMMANDS]
+        fast.append(("attendance, missing encodings", [CLI, "attendance", "--encodings",
+                                                       os.path.join(workdir, "missing.gallery")]))
+        fast.append(("encode, missing dataset", [CLI, "encode", "--dataset", os.path.join(workdir, "missing")]))
+        fast.append(("report range", [CLI, "report", "--db", os.path.join(workdir, "attendance.db"), "range"]))
+
+        print(f"[INFO] Measuring startup times (median of {runs} runs)...")
+        baseline, _ = _time_command([sys.executable, "-c", "pass"], runs)
+        results = {"python_ms": round(baseline, 1), "commands": [], "imports": []}
+        print(f"{'command':<44}{'ms':>10}")
+        print(f"{'python -c pass':<44}{baseline:>10.1f}")
+
+        over = 0
+        for label, args in fast:
+            ms, code = _time_command([sys.executable] + args, runs)
+            flag = "  ❌" if ms > budget else ""
+            over += ms > budget
+            results["commands"].append({"command": label, "ms": round(ms, 1), "exit_code": code,
+                                        "over_budget": ms > budget})
+            print(f"{label:<44}{ms:>10.1f}{flag}")
+
+    print(f"\n{'import (on top of the interpreter)':<44}{'ms':>10}")
+    for module in HEAVY_MODULES:
+        ms, code = _time_command([sys.executable, "-c", f"import {module}"], runs)
+        if code != 0:
+            print(f"{module:<44}{'missing':>10}")
+            results["imports"].append({"module": module, "ms": None})
+            continue
+        results["imports"].append({"module": module, "ms": round(ms - baseline, 1)})
+        print(f"{module:<44}{ms - baseline:>10.1f}")
+
+    results["budget_ms"] = budget
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"[INFO] Report written to {output}")
+    if over:
+        print(f"❌ {over} command(s) took longer than {budget:.0f} ms.")
+        return 1
+    print(f"[✅] All help, validation and report commands start in under {budget:.0f} ms.")
+    return 0
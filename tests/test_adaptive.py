@@ -0,0 +1,46 @@
+"""
+Tests of the adaptive detection scale and cadence controller.
+"""
+from utils.adaptive import AdaptiveController, scale_frame_box
+
+def test_box_is_scaled_back_to_the_frame():
+    assert scale_frame_box((10, 40, 30, 20), (120, 160), (480, 640)) == (40, 160, 120, 80)
+
+def test_without_a_budget_the_controller_is_fixed():
+    controller = AdaptiveController(scale=0.3)
+    for _ in range(5):
+        assert controller.should_detect()
+        controller.update(1.0, [20])
+    assert controller.scale == 0.3 and controller.interval == 1
+
+def test_scale_follows_the_smallest_recent_face():
+    controller = AdaptiveController(target_fps=10, min_face_px=40, face_memory=3)
+    controller.update(0.001, [100, 400])
+    assert controller.scale == 0.4
+
+    # A face further away needs a larger scale
+    controller.update(0.001, [80])
+    assert controller.smallest_face == 80 and controller.scale == 0.5
+
+    # Once the small face has left the window, a closer face lowers the scale again
+    for _ in range(3):
+        controller.update(0.001, [200])
+    assert controller.smallest_face == 200 and controller.scale == 0.2
+
+def test_scale_returns_to_the_default_when_nobody_is_seen():
+    controller = AdaptiveController(target_fps=10, scale=0.25, face_memory=2)
+    controller.update(0.001, [50])
+    assert controller.scale == 0.8
+    controller.update(0.001)
+    assert controller.smallest_face == 50
+    controller.update(0.001)
+    assert controller.smallest_face is None and controller.scale == 0.25
+
+def test_slow_detection_is_run_less_often():
+    controller = AdaptiveController(target_fps=10, scale=0.5, max_interval=5)
+    # 250 ms per detection against a 100 ms budget
+    for _ in range(3):
+        controller.update(0.25)
+    assert controller.interval == 3
+    decisions = [controller.should_detect() for _ in range(6)]
+    assert decisions.count(True) == 2
@@ -0,0 +1,97 @@
+"""
+Tests of the buffered attendance writer: de-duplication, midnight rollover
+and failed writes.
+"""
+import csv
+from datetime import datetime, timedelta
+
+import utils.attendance as attendance
+from utils.attendance import AttendanceWriter, CsvAttendanceSink
+
+class MemorySink:
+    """Sink that keeps rows in memory and fails the first `failures` writes."""
+
+    def __init__(self, failures=0, logged=()):
+        self.failures = failures
+        self.rows = []
+        self.logged = set(logged)
+        self.location = "memory"
+
+    def logged_names(self, date):
+        return set(self.logged)
+
+    def write(self, rows):
+        if self.failures:
+            self.failures -= 1
+            raise IOError("disk full")
+        self.rows.extend(rows)
+
+    def close(self):
+        pass
+
+class FakeClock:
+    """Stands in for datetime in utils.attendance, with a settable now()."""
+
+    current = datetime(2024, 3, 1, 23, 59, 0)
+
+    @classmethod
+    def now(cls):
+        return cls.current
+
+def names(rows):
+    return [row[0] for row in rows]
+
+def test_deduplicates_and_restores_state_from_the_sink():
+    sink = MemorySink(logged={"alice"})
+    writer = AttendanceWriter(sink=sink, flush_interval=0.01)
+    assert not writer.log("alice")
+    assert writer.log("bob")
+    assert not writer.log("bob")
+    writer.close()
+    assert names(sink.rows) == ["bob"]
+
+def test_batch_that_fails_once_is_retried():
+    sink = MemorySink(failures=1)
+    writer = AttendanceWriter(sink=sink, flush_interval=0.01, retry_delay=0.01)
+    writer.log("carol")
+    writer.close()
+    assert names(sink.rows) == ["carol"]
+    assert writer.written == 1 and writer.failed == 0
+
+def test_given_up_batch_is_logged_again_when_seen():
+    sink = MemorySink(failures=2)
+    writer = AttendanceWriter(sink=sink, flush_interval=0.01, retries=1, retry_delay=0.01)
+    writer.log("dave")
+    writer.close()
+    assert sink.rows == [] and writer.failed == 1
+    assert "dave" not in writer.logged_names
+
+    retry = AttendanceWriter(sink=sink, flush_interval=0.01)
+    retry.logged_names = set(writer.logged_names)
+    assert retry.log("dave")
+    retry.close()
+    assert names(sink.rows) == ["dave"]
+
+def test_rollover_at_midnight(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(attendance, "datetime", FakeClock)
+    FakeClock.current = datetime(2024, 3, 1, 23, 59, 0)
+    writer = AttendanceWriter(sink=CsvAttendanceSink(), flush_interval=0.01)
+    assert writer.log("erin")
+    assert not writer.log("erin")
+
+    FakeClock.current += timedelta(minutes=2)
+    assert writer.log("erin")
+    writer.close()
+
+    for day in ("2024-03-01", "2024-03-02"):
+        with open(tmp_path / f"attendance_{day}.csv", newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == ["Name", "Time"]
+        assert names(rows[1:]) == ["erin"]
+        assert rows[1][1].startswith(day)
+
+    # A restart on the new day does not log the person again
+    restarted = AttendanceWriter(sink=CsvAttendanceSink(), flush_interval=0.01)
+    assert not restarted.log("erin")
+    restarted.close()
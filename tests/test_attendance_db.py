@@ -0,0 +1,64 @@
+"""
+Tests of the SQLite attendance store: de-duplication, reports and CSV round trips.
+"""
+from datetime import date, datetime
+
+from utils.attendance import AttendanceWriter
+from utils.attendance_db import AttendanceDatabase
+
+EVENTS = [
+    ("alice", "2024-03-01 09:00:00", "door"),
+    ("bob", "2024-03-01 09:05:00", "door"),
+    ("alice", "2024-03-01 17:30:00", "lobby"),
+    ("alice", "2024-03-02 08:55:00", None),
+]
+
+def test_unique_index_ignores_duplicate_events(tmp_path):
+    db = AttendanceDatabase(str(tmp_path / "attendance.db"))
+    assert db.insert(EVENTS) == 4
+    assert db.insert(EVENTS) == 0
+    # The same person at the same second is one event, whatever the camera
+    assert db.insert([("bob", datetime(2024, 3, 1, 9, 5, 0), "lobby")]) == 0
+    assert db.insert([("bob", datetime(2024, 3, 1, 9, 5, 1), "lobby")]) == 1
+    assert db.connection.execute("SELECT COUNT(*) FROM attendance").fetchone()[0] == 5
+    db.close()
+
+def test_reports(tmp_path):
+    db = AttendanceDatabase(str(tmp_path / "attendance.db"))
+    db.insert(EVENTS)
+    assert db.logged_names(date(2024, 3, 1)) == {"alice", "bob"}
+    assert db.logged_names("2024-03-02") == {"alice"}
+    assert db.day_report("2024-03-01") == [
+        ("alice", "2024-03-01 09:00:00", "2024-03-01 17:30:00", 2),
+        ("bob", "2024-03-01 09:05:00", "2024-03-01 09:05:00", 1),
+    ]
+    assert [row[0] for row in db.person_report("alice")] == ["2024-03-01", "2024-03-02"]
+    assert [row[0] for row in db.person_report("alice", start="2024-03-02")] == ["2024-03-02"]
+    assert db.range_report(end="2024-03-01") == [
+        ("alice", 1, "2024-03-01 09:00:00", "2024-03-01 17:30:00"),
+        ("bob", 1, "2024-03-01 09:05:00", "2024-03-01 09:05:00"),
+    ]
+    db.close()
+
+def test_csv_export_and_import(tmp_path):
+    db = AttendanceDatabase(str(tmp_path / "attendance.db"))
+    db.insert(EVENTS)
+    written = db.export_csv(str(tmp_path / "csv"))
+    assert [path.rsplit("_", 1)[1] for path in written] == ["2024-03-01.csv", "2024-03-02.csv"]
+    db.close()
+
+    copy = AttendanceDatabase(str(tmp_path / "copy.db"))
+    assert copy.import_csv([str(tmp_path / "csv")]) == (2, 4)
+    # Importing again adds nothing
+    assert copy.import_csv(written) == (2, 0)
+    copy.close()
+
+def test_works_as_an_attendance_writer_sink(tmp_path):
+    path = str(tmp_path / "attendance.db")
+    writer = AttendanceWriter(sink=AttendanceDatabase(path), flush_interval=0.01)
+    assert writer.log("carol", camera="door")
+    writer.close()
+
+    restarted = AttendanceWriter(sink=AttendanceDatabase(path), flush_interval=0.01)
+    assert not restarted.log("carol")
+    restarted.close()
@@ -0,0 +1,41 @@
+"""
+Tests of the threaded frame grabber on a video file.
+"""
+import cv2
+import numpy as np
+
+from utils.capture import FrameGrabber
+from utils.recording import FrameRecorder, read_recording
+
+def write_video(path, frames=5):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (32, 24))
+    for i in range(frames):
+        writer.write(np.full((24, 32, 3), i * 40, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+def test_video_file_frames_are_all_handed_over(tmp_path):
+    video = write_video(tmp_path / "clip.avi")
+    recorder = FrameRecorder(str(tmp_path / "clip.frec"))
+    grabber = FrameGrabber(video, recorder=recorder)
+    seqs = []
+    while True:
+        frame = grabber.read(timeout=2.0)
+        if not frame.ok:
+            break
+        seqs.append(frame.seq)
+    assert seqs == [1, 2, 3, 4, 5]
+    assert grabber.finished and grabber.dropped == 0
+    grabber.release()
+    assert recorder.file is None
+    assert len(list(read_recording(recorder.path))) == 5
+
+def test_read_after_release_does_not_restart_the_reader(tmp_path):
+    grabber = FrameGrabber(write_video(tmp_path / "clip.avi"))
+    assert grabber.read(timeout=2.0).ok
+    grabber.release()
+    assert grabber._thread is None
+    assert not grabber.read(timeout=0.1).ok
+    grabber.peek(timeout=0.1)
+    assert grabber._thread is None
+    grabber.release()
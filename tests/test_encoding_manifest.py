@@ -0,0 +1,111 @@
+"""
+Tests of the per-image manifest cache behind incremental encoding.
+"""
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from utils.encoding_manifest import (MANIFEST_VERSION, find_cached_entry, get_manifest_path, load_manifest,
+                                     save_manifest)
+
+def write_image(path, content=b"image"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    return str(path)
+
+def test_unchanged_image_is_a_hit_without_hashing(tmp_path, monkeypatch):
+    image = write_image(tmp_path / "a.jpg")
+    entry, cached = find_cached_entry(None, image)
+    assert cached is None
+    entry["encodings"] = np.zeros((1, 128), dtype=np.float32)
+
+    monkeypatch.setattr("utils.encoding_manifest.hash_file", lambda path: pytest.fail("hashed"))
+    fresh, cached = find_cached_entry(entry, image)
+    assert cached is entry
+    assert fresh["sha1"] == entry["sha1"] and "encodings" not in fresh
+
+def test_touched_image_with_the_same_content_is_a_hit(tmp_path):
+    image = write_image(tmp_path / "a.jpg")
+    entry, _ = find_cached_entry(None, image)
+    os.utime(image, ns=(entry["mtime"] + 10 ** 9, entry["mtime"] + 10 ** 9))
+    fresh, cached = find_cached_entry(entry, image)
+    assert cached is entry and fresh["mtime"] != entry["mtime"]
+
+def test_changed_image_is_a_miss(tmp_path):
+    image = write_image(tmp_path / "a.jpg")
+    entry, _ = find_cached_entry(None, image)
+    write_image(image, b"other")
+    fresh, cached = find_cached_entry(entry, image)
+    assert cached is None and fresh["sha1"] != entry["sha1"]
+
+def test_manifest_round_trip_and_old_versions(tmp_path):
+    path = get_manifest_path(str(tmp_path / "encodings.gallery"))
+    assert load_manifest(path) == {}
+    images = {"alice/1.jpg": {"size": 1, "mtime": 2, "sha1": "x", "person": "alice"}}
+    save_manifest(path, images)
+    assert load_manifest(path) == images
+    assert not os.path.exists(path + ".tmp")
+
+    with open(path, "wb") as f:
+        pickle.dump({"version": MANIFEST_VERSION - 1, "images": images}, f)
+    assert load_manifest(path) == {}
+    with open(path, "wb") as f:
+        f.write(b"garbage")
+    assert load_manifest(path) == {}
+
+@pytest.fixture
+def encoder(monkeypatch):
+    """encode_face_images with a fake encoder that records what it was asked to encode."""
+    pytest.importorskip("face_recognition")
+    import utils.face_utils as face_utils
+    calls = []
+
+    def encode_images(paths, workers=1, detector="hog"):
+        calls.append((detector, sorted(os.path.basename(path) for path in paths)))
+        for path in paths:
+            if path.endswith("broken.jpg"):
+                yield np.empty((0, 128), dtype=np.float32), "unreadable"
+            else:
+                yield np.full((1, 128), len(path), dtype=np.float32), None
+
+    monkeypatch.setattr(face_utils, "encode_images", encode_images)
+    return face_utils.encode_face_images, calls
+
+def test_only_new_changed_or_failed_images_are_encoded(tmp_path, encoder):
+    encode_face_images, calls = encoder
+    dataset = tmp_path / "dataset"
+    output = str(tmp_path / "encodings.gallery")
+    write_image(dataset / "alice" / "1.jpg")
+    write_image(dataset / "bob" / "1.jpg")
+    write_image(dataset / "bob" / "broken.jpg")
+
+    assert encode_face_images(str(dataset), output) == 2
+    assert calls[-1] == ("hog", ["1.jpg", "1.jpg", "broken.jpg"])
+
+    # The failed image is not cached, a changed one is encoded again
+    write_image(dataset / "alice" / "1.jpg", b"new")
+    write_image(dataset / "carol" / "1.jpg")
+    assert encode_face_images(str(dataset), output) == 3
+    assert calls[-1] == ("hog", ["1.jpg", "1.jpg", "broken.jpg"])
+    assert sorted(load_manifest(get_manifest_path(output))) == \
+        [os.path.join("alice", "1.jpg"), os.path.join("bob", "1.jpg"), os.path.join("carol", "1.jpg")]
+
+    os.remove(dataset / "bob" / "broken.jpg")
+    assert encode_face_images(str(dataset), output) == 3
+    assert len(calls) == 2
+
+def test_changing_the_detector_invalidates_the_cache(tmp_path, encoder):
+    encode_face_images, calls = encoder
+    dataset = tmp_path / "dataset"
+    output = str(tmp_path / "encodings.gallery")
+    write_image(dataset / "alice" / "1.jpg")
+
+    encode_face_images(str(dataset), output, detector="hog")
+    encode_face_images(str(dataset), output, detector="haar")
+    encode_face_images(str(dataset), output, detector="haar")
+    assert [detector for detector, _ in calls] == ["hog", "haar"]
+    entry = load_manifest(get_manifest_path(output))[os.path.join("alice", "1.jpg")]
+    assert entry["detector"] == "haar"
@@ -0,0 +1,79 @@
+"""
+Tests of the gallery file format: round trips, legacy pickles and stores.
+"""
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from utils.gallery import Gallery, convert_pickle_to_gallery, file_signature, load_gallery, save_gallery
+from utils.gallery_store import GalleryStore
+
+def encodings(seed, count=3):
+    return np.random.default_rng(seed).normal(size=(count, 128)).astype(np.float32)
+
+def sample_gallery():
+    rows = list(encodings(1)) + list(encodings(2, 2))
+    return Gallery.from_encodings(rows, ["alice"] * 3 + ["zoë"] * 2), np.vstack(rows)
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_round_trip(tmp_path, mmap):
+    gallery, rows = sample_gallery()
+    gallery.sections["weights"] = np.arange(5, dtype="<i4")
+    path = str(tmp_path / "encodings.gallery")
+    save_gallery(gallery, path)
+    assert not os.path.exists(path + ".tmp")
+
+    loaded = load_gallery(path, mmap=mmap)
+    assert isinstance(loaded.embeddings, np.memmap) == mmap
+    assert np.array_equal(loaded.embeddings, rows)
+    assert loaded.names == ["alice", "zoë"]
+    assert loaded.row_names() == ["alice"] * 3 + ["zoë"] * 2
+    assert np.array_equal(loaded.sections["weights"], np.arange(5))
+    assert loaded.meta["created"] == gallery.meta["created"] and loaded.path == path
+
+def test_empty_gallery_round_trip(tmp_path):
+    path = str(tmp_path / "empty.gallery")
+    save_gallery(Gallery.from_encodings([], []), path)
+    loaded = load_gallery(path)
+    assert loaded.count == 0 and loaded.dim == 128 and loaded.names == []
+
+def test_saving_changes_the_signature(tmp_path):
+    gallery, _ = sample_gallery()
+    path = str(tmp_path / "encodings.gallery")
+    assert file_signature(path) is None
+    save_gallery(gallery, path)
+    first = file_signature(path)
+    save_gallery(gallery, path)
+    assert file_signature(path) != first
+
+def test_legacy_pickle_is_loaded_and_converted(tmp_path):
+    _, rows = sample_gallery()
+    legacy = str(tmp_path / "encodings.pickle")
+    with open(legacy, "wb") as f:
+        pickle.dump({"encodings": [row.astype(np.float64) for row in rows],
+                     "names": ["alice"] * 3 + ["zoë"] * 2}, f)
+
+    loaded = load_gallery(legacy)
+    assert loaded.embeddings.dtype == np.float32
+    assert np.array_equal(loaded.embeddings, rows)
+    assert loaded.names == ["alice", "zoë"]
+
+    converted = convert_pickle_to_gallery(legacy, str(tmp_path / "encodings.gallery"))
+    assert np.array_equal(load_gallery(converted.path).embeddings, rows)
+
+def test_unreadable_files_load_as_empty(tmp_path):
+    garbage = tmp_path / "encodings.pickle"
+    garbage.write_bytes(b"not a pickle")
+    assert load_gallery(str(garbage)).count == 0
+    assert load_gallery(str(tmp_path / "missing.gallery")).count == 0
+    assert load_gallery(str(tmp_path)).count == 0
+
+def test_store_directory_loads_like_a_file(tmp_path):
+    gallery, rows = sample_gallery()
+    store = GalleryStore.create(str(tmp_path / "store"), gallery)
+    loaded = load_gallery(store.path)
+    assert sorted(map(bytes, loaded.embeddings)) == sorted(map(bytes, rows))
+    assert sorted(loaded.row_names()) == sorted(gallery.row_names())
+    assert file_signature(store.path) is not None
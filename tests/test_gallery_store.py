@@ -0,0 +1,117 @@
+"""
+Tests of gallery store visibility across add, remove, re-add and compaction.
+"""
+import os
+from collections import Counter
+
+import numpy as np
+
+from utils.gallery import Gallery, load_gallery
+from utils.gallery_store import GalleryStore
+
+def encodings(seed, count=3):
+    return np.random.default_rng(seed).normal(size=(count, 128)).astype(np.float32)
+
+def visible(store):
+    """Every loaded row as (name, row bytes), counted."""
+    gallery = store.load()
+    return Counter((gallery.name_of(row), np.asarray(gallery.embeddings[row]).tobytes())
+                   for row in range(gallery.count))
+
+def rows(name, array):
+    return Counter((name, row.tobytes()) for row in array)
+
+def segment_files(path):
+    return sorted(name for name in os.listdir(path) if name.startswith("segment-"))
+
+def test_add_remove_and_re_add(tmp_path):
+    alice, bob, alice_again = encodings(1), encodings(2), encodings(3)
+    initial = Gallery.from_encodings(list(alice) + list(bob), ["alice"] * 3 + ["bob"] * 3)
+    store = GalleryStore.create(str(tmp_path / "store"), initial)
+    assert visible(store) == rows("alice", alice) + rows("bob", bob)
+
+    assert store.remove_person("alice") == 3
+    assert store.people() == {"bob": 3}
+    assert visible(store) == rows("bob", bob)
+    assert store.remove_person("alice") == 0
+
+    # A tombstone only hides rows older than itself
+    store.add_person("alice", alice_again)
+    assert store.people() == {"bob": 3, "alice": 3}
+    assert visible(store) == rows("bob", bob) + rows("alice", alice_again)
+    assert store.stats()["dead_rows"] == 3
+
+def test_replace_hides_earlier_rows(tmp_path):
+    store = GalleryStore.create(str(tmp_path / "store"))
+    store.add_person("carol", encodings(4))
+    store.add_person("carol", encodings(5, 2))
+    assert store.people() == {"carol": 5}
+    store.add_person("carol", encodings(6, 1), replace=True)
+    assert visible(store) == rows("carol", encodings(6, 1))
+
+def test_compaction_keeps_the_visible_rows(tmp_path):
+    store = GalleryStore.create(str(tmp_path / "store"))
+    for seed, name in enumerate(["dan", "eve", "dan", "fay"]):
+        store.add_person(name, encodings(seed))
+    store.remove_person("dan")
+    store.add_person("dan", encodings(10))
+    store.remove_person("fay")
+    before = visible(store)
+
+    result = store.compact()
+    assert result["after"] == {"segments": 1, "tombstones": 0, "rows": 6, "live_rows": 6, "dead_rows": 0}
+    assert visible(store) == before
+    assert len(segment_files(store.path)) == 1
+    assert store.compact() is None
+
+    # Sequence numbers keep working after compaction
+    store.remove_person("eve")
+    store.add_person("fay", encodings(11))
+    assert visible(store) == rows("dan", encodings(10)) + rows("fay", encodings(11))
+
+def test_changes_during_compaction_are_kept(tmp_path):
+    store = GalleryStore.create(str(tmp_path / "store"))
+    store.add_person("gus", encodings(1))
+    store.add_person("hal", encodings(2))
+    store.remove_person("gus")
+    store.add_person("gus", encodings(3))
+
+    merge = store._load
+    def merge_then_change(manifest):
+        merged = merge(manifest)
+        # Written after the compaction read the manifest
+        store.remove_person("hal")
+        store.add_person("ivy", encodings(4))
+        return merged
+    store._load = merge_then_change
+    store.compact()
+    del store._load
+
+    assert visible(store) == rows("gus", encodings(3)) + rows("ivy", encodings(4))
+    assert store.stats()["dead_rows"] == 3
+    store.compact()
+    assert visible(store) == rows("gus", encodings(3)) + rows("ivy", encodings(4))
+    assert store.stats()["tombstones"] == 0
+
+def test_unlisted_segments_are_ignored_and_removed(tmp_path):
+    store = GalleryStore.create(str(tmp_path / "store"))
+    store.add_person("jan", encodings(1))
+    store.add_person("kim", encodings(2))
+    # Left over by a writer that crashed before committing the manifest
+    orphan = os.path.join(store.path, "segment-00000099-deadbeef.gallery")
+    with open(orphan, "wb") as f:
+        f.write(b"partial")
+    assert visible(store) == rows("jan", encodings(1)) + rows("kim", encodings(2))
+
+    store.compact()
+    assert not os.path.exists(orphan)
+    assert len(segment_files(store.path)) == 1
+
+def test_load_gallery_accepts_a_store(tmp_path):
+    store = GalleryStore.create(str(tmp_path / "store"))
+    store.add_person("lee", encodings(1))
+    store.remove_person("lee")
+    store.add_person("max", encodings(2))
+    gallery = load_gallery(store.path)
+    assert gallery.names == ["max"]
+    assert gallery.count == 3
@@ -0,0 +1,158 @@
+"""
+Tests of the voting rule, and that the sharded, quantized and IVF matchers
+return the Matches of one exhaustive float32 FaceMatcher.
+"""
+import numpy as np
+import pytest
+
+from utils.ann_index import IVFIndex
+from utils.gallery import Gallery
+from utils.matcher import UNKNOWN_NAME, FaceMatcher, Match, ShardedMatcher, shard_bounds
+from utils.quantize import QuantizedScan, quantize_embeddings
+from utils.synthetic import synthetic_gallery, synthetic_queries
+
+TOLERANCE = 0.5
+
+def make_gallery(seed=0, people=40, rows_per_person=12, boundary_rows=4, faces=8, shuffle=False, weights=False):
+    """
+    Build a random gallery and faces to match, with some rows exactly at the tolerance.
+
+    Returns:
+        tuple: (Gallery, (faces, 128) float32 queries)
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(people, 128)).astype(np.float32) * 0.1
+    embeddings = np.repeat(centers, rows_per_person, axis=0)
+    embeddings += rng.normal(size=embeddings.shape).astype(np.float32) * 0.03
+    labels = np.repeat(np.arange(people), rows_per_person).astype(np.int32)
+    queries = centers[rng.integers(0, people, faces)] + rng.normal(size=(faces, 128)).astype(np.float32) * 0.03
+
+    # Rows at the tolerance are where differently rounded scans disagree
+    for query in queries:
+        for row in rng.integers(0, len(embeddings), boundary_rows):
+            direction = rng.normal(size=128).astype(np.float32)
+            embeddings[row] = query + direction / np.linalg.norm(direction) * np.float32(TOLERANCE)
+
+    if shuffle:
+        order = rng.permutation(len(labels))
+        embeddings, labels = embeddings[order], labels[order]
+    sections = {"weights": rng.integers(1, 5, len(labels)).astype("<i4")} if weights else {}
+    names = [f"person{i}" for i in range(people)]
+    return Gallery(np.ascontiguousarray(embeddings), labels, names, sections=sections), queries
+
+def offsets(*distances):
+    """Gallery rows at the given distances from the origin, along different axes."""
+    rows = np.zeros((len(distances), 128), dtype=np.float32)
+    rows[np.arange(len(distances)), np.arange(len(distances))] = distances
+    return rows
+
+def test_distances_match_numpy():
+    gallery, queries = make_gallery()
+    exact = np.linalg.norm(gallery.embeddings[None, :, :] - queries[:, None, :], axis=2)
+    assert np.allclose(FaceMatcher(gallery, TOLERANCE).distances(queries), exact, atol=1e-5)
+
+def test_most_votes_win_over_the_closest_row():
+    gallery = Gallery(offsets(0.1, 0.3, 0.35, 0.4, 0.9), np.array([0, 1, 1, 1, 1], dtype=np.int32), ["near", "many"])
+    match = FaceMatcher(gallery, TOLERANCE).match(np.zeros((1, 128), dtype=np.float32))[0]
+    assert match.name == "many"
+    assert match.distance == pytest.approx(0.3)
+    assert match.votes == {"near": 1, "many": 3}
+
+def test_tied_votes_go_to_the_closest_identity():
+    gallery = Gallery(offsets(0.2, 0.45, 0.3, 0.35), np.array([0, 0, 1, 1], dtype=np.int32), ["a", "b"])
+    match = FaceMatcher(gallery, TOLERANCE).match(np.zeros((1, 128), dtype=np.float32))[0]
+    assert match.name == "a" and match.distance == pytest.approx(0.2)
+
+def test_prototype_weights_are_votes():
+    gallery = Gallery(offsets(0.1, 0.3), np.array([0, 1], dtype=np.int32), ["a", "b"],
+                      sections={"weights": np.array([2, 5], dtype="<i4")})
+    match = FaceMatcher(gallery, TOLERANCE).match(np.zeros((1, 128), dtype=np.float32))[0]
+    assert match.name == "b" and match.votes == {"a": 2, "b": 5}
+
+def test_faces_beyond_the_tolerance_are_unknown():
+    gallery = Gallery(offsets(0.6, 0.8), np.array([0, 1], dtype=np.int32), ["a", "b"])
+    match = FaceMatcher(gallery, TOLERANCE).match(np.zeros((1, 128), dtype=np.float32))[0]
+    assert match.name == UNKNOWN_NAME and match.votes == {}
+    assert match.distance == pytest.approx(0.6)
+
+def test_empty_inputs():
+    gallery, queries = make_gallery()
+    assert FaceMatcher(gallery, TOLERANCE).match([]) == []
+    empty = Gallery.from_encodings([], [])
+    assert FaceMatcher(empty, TOLERANCE).match(queries[:2]) == [Match(UNKNOWN_NAME, float("inf"), {})] * 2
+
+def test_batch_matches_one_face_at_a_time():
+    gallery, queries = make_gallery(weights=True)
+    matcher = FaceMatcher(gallery, TOLERANCE)
+    assert matcher.match(list(queries)) == [matcher.match(query[None, :])[0] for query in queries]
+
+def test_shard_bounds_split_at_person_boundaries():
+    labels = np.repeat(np.arange(5), [3, 1, 4, 2, 2])
+    bounds = shard_bounds(labels, 3)
+    assert bounds[0][0] == 0 and bounds[-1][1] == len(labels)
+    for start, stop in bounds:
+        assert start == 0 or labels[start] != labels[start - 1]
+    assert all(a[1] == b[0] for a, b in zip(bounds, bounds[1:]))
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("shards", [2, 3, 7])
+def test_sharded_matches_single_matcher(seed, shards):
+    gallery, queries = make_gallery(seed)
+    assert ShardedMatcher(gallery, TOLERANCE, shards=shards).match(queries) == \
+        FaceMatcher(gallery, TOLERANCE).match(queries)
+
+@pytest.mark.parametrize("seed", range(3))
+def test_sharded_matches_single_matcher_with_unsorted_labels_and_weights(seed):
+    gallery, queries = make_gallery(seed, shuffle=True, weights=True)
+    assert ShardedMatcher(gallery, TOLERANCE, shards=4).match(queries) == \
+        FaceMatcher(gallery, TOLERANCE).match(queries)
+
+def test_more_shards_than_people():
+    gallery, queries = make_gallery(people=3, rows_per_person=5)
+    matcher = ShardedMatcher(gallery, TOLERANCE, shards=8)
+    assert len(matcher.shards) <= 3
+    assert matcher.match(queries) == FaceMatcher(gallery, TOLERANCE).match(queries)
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_quantized_error_bounds_hold(precision):
+    gallery, queries = make_gallery()
+    scan = QuantizedScan(quantize_embeddings(gallery.embeddings, precision))
+    exact = np.linalg.norm(gallery.embeddings[None, :, :] - queries[:, None, :], axis=2)
+    assert np.all(np.abs(scan.distances(queries) - exact) <= scan.errors[None, :])
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_quantized_matches_float32(seed, precision):
+    gallery, queries = make_gallery(seed, weights=seed % 2 == 1)
+    expected = FaceMatcher(gallery, TOLERANCE).match(queries)
+    assert FaceMatcher(gallery, TOLERANCE, precision=precision).match(queries) == expected
+    # One face at a time is a different float32 scan, with the same result
+    assert [FaceMatcher(gallery, TOLERANCE).match(query[None, :])[0] for query in queries] == expected
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_stored_quantized_sections_are_used(precision):
+    gallery, queries = make_gallery()
+    expected = FaceMatcher(gallery, TOLERANCE).match(queries)
+    gallery.sections.update(quantize_embeddings(gallery.embeddings, precision))
+    matcher = FaceMatcher(gallery, TOLERANCE)
+    assert matcher.precision == precision
+    assert matcher.match(queries) == expected
+    assert ShardedMatcher(gallery, TOLERANCE, shards=3).match(queries) == expected
+
+@pytest.mark.parametrize("seed", range(3))
+def test_ivf_probing_every_list_matches_exhaustive(seed):
+    gallery, queries = make_gallery(seed, rows_per_person=80, weights=seed == 1)
+    index = IVFIndex.build(gallery.embeddings, nlist=16)
+    expected = FaceMatcher(gallery, TOLERANCE).match(queries)
+    # More than the old cap of 64 rows per face are within tolerance
+    assert max(sum(match.votes.values()) for match in expected) > 64
+    assert FaceMatcher(gallery, TOLERANCE, index=index, nprobe=index.nlist).match(queries) == expected
+
+def test_ivf_agreement_with_exhaustive():
+    gallery = synthetic_gallery(4000, rows_per_person=100)
+    queries = synthetic_queries(gallery, 100)[0]
+    index = IVFIndex.build(gallery.embeddings, nlist=16)
+    exhaustive = FaceMatcher(gallery, TOLERANCE).match(queries)
+    approximate = FaceMatcher(gallery, TOLERANCE, index=index, nprobe=4).match(queries)
+    agreement = np.mean([a.name == b.name for a, b in zip(exhaustive, approximate)])
+    assert agreement >= 0.95
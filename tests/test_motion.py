@@ -0,0 +1,60 @@
+"""
+Tests of the motion gate's thresholds.
+"""
+import numpy as np
+
+from utils.motion import MotionGate
+
+def frame(value=100, patch=None, patch_value=255):
+    """A flat 128x96 BGR frame, optionally with a square patch (top, left, size)."""
+    image = np.full((96, 128, 3), value, dtype=np.uint8)
+    if patch is not None:
+        top, left, size = patch
+        image[top:top + size, left:left + size] = patch_value
+    return image
+
+def test_static_scene_is_skipped_after_the_first_frame():
+    gate = MotionGate(min_area=0.01, recheck_interval=0)
+    assert gate.should_process(frame())
+    assert not any(gate.should_process(frame()) for _ in range(9))
+    assert gate.skipped == 9 and gate.skip_ratio == 0.9
+
+def test_changed_area_threshold():
+    gate = MotionGate(min_area=0.01, recheck_interval=0)
+    gate.should_process(frame())
+    # A single changed pixel is noise
+    assert gate.motion(frame(patch=(10, 10, 1)))[0] < 0.01
+    assert not gate.should_process(frame(patch=(10, 10, 1)))
+    # Someone walking in is not
+    assert gate.motion(frame(patch=(40, 60, 32)))[0] > 0.01
+    assert gate.should_process(frame(patch=(40, 60, 32)))
+
+def test_pixel_threshold():
+    gate = MotionGate(min_area=0.01, pixel_threshold=25, recheck_interval=0)
+    gate.should_process(frame(100))
+    # Lighting flicker below the pixel threshold
+    assert not gate.should_process(frame(120))
+    assert gate.should_process(frame(130))
+
+def test_slow_changes_add_up():
+    gate = MotionGate(min_area=0.01, pixel_threshold=25, recheck_interval=0)
+    gate.should_process(frame(100))
+    # Compared with the processed frame, not the previous one
+    assert not gate.should_process(frame(110))
+    assert not gate.should_process(frame(120))
+    assert gate.should_process(frame(130))
+
+def test_recheck_interval_forces_detection():
+    gate = MotionGate(min_area=0.01, recheck_interval=3)
+    decisions = [gate.should_process(frame()) for _ in range(9)]
+    assert decisions == [True, False, False, False, True, False, False, False, True]
+
+def test_disabled_gate_and_invalidate():
+    gate = MotionGate(min_area=0)
+    assert all(gate.should_process(frame()) for _ in range(3))
+    assert gate.skipped == 0
+
+    gate = MotionGate(min_area=0.01, recheck_interval=0)
+    gate.should_process(frame())
+    gate.invalidate()
+    assert gate.should_process(frame())
@@ -0,0 +1,52 @@
+"""
+Tests of per-identity prototype compression and its held-out evaluation.
+"""
+import numpy as np
+import pytest
+
+from utils.prototypes import compress_gallery, compress_identity, evaluate_compression
+from utils.synthetic import synthetic_gallery
+
+def spread_identity(seed, modes=3, rows_per_mode=10):
+    """One person's embeddings around a few well separated modes."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(modes, 128)).astype(np.float32) * 0.1
+    rows = np.repeat(centres, rows_per_mode, axis=0)
+    return rows + rng.normal(size=rows.shape).astype(np.float32) * 0.01
+
+@pytest.mark.parametrize("seed", range(3))
+def test_prototypes_cover_every_embedding_within_the_radius(seed):
+    points = spread_identity(seed)
+    prototypes, weights = compress_identity(points, max_radius=0.3, max_prototypes=8)
+    assert 1 < len(prototypes) < 8
+    distances = np.linalg.norm(points[:, None, :] - prototypes[None, :, :], axis=2)
+    assert distances.min(axis=1).max() <= 0.3
+    assert weights.sum() == len(points)
+
+def test_close_embeddings_become_their_mean():
+    points = spread_identity(0, modes=1)
+    prototypes, weights = compress_identity(points, max_radius=0.3)
+    assert np.allclose(prototypes[0], points.mean(axis=0))
+    assert weights.tolist() == [len(points)]
+
+def test_prototype_cap_keeps_every_embedding_weighted():
+    points = spread_identity(1, modes=6, rows_per_mode=4)
+    prototypes, weights = compress_identity(points, max_radius=0.01, max_prototypes=3)
+    assert len(prototypes) == 3
+    assert weights.sum() == len(points)
+
+def test_compressed_gallery_keeps_the_weights():
+    gallery = synthetic_gallery(200, rows_per_person=20)
+    compressed = compress_gallery(gallery)
+    assert compressed.count < gallery.count
+    weights = compressed.sections["weights"]
+    labels = np.asarray(compressed.labels)
+    for label in range(len(gallery.names)):
+        assert weights[labels == label].sum() == np.count_nonzero(np.asarray(gallery.labels) == label)
+
+def test_held_out_faces_are_recognized_identically():
+    gallery = synthetic_gallery(300, rows_per_person=15)
+    compressed = compress_gallery(gallery)
+    assert evaluate_compression(gallery, compressed, tolerance=0.5, sample=100) >= 0.95
+    # Nothing matches at a zero tolerance, so both galleries agree on every face
+    assert evaluate_compression(gallery, compressed, tolerance=0.0, sample=100) == 1.0
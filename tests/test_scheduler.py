@@ -0,0 +1,64 @@
+"""
+Tests of the fair camera scheduler.
+"""
+from collections import Counter
+
+from utils.scheduler import CameraStream, FairScheduler
+
+class FakeGrabber:
+    """Grabber stand-in with a frame always (or never) waiting."""
+
+    def __init__(self, backlog=1):
+        self.backlog = backlog
+        self.dropped = 0
+        self.finished = False
+
+def camera(name, backlog=1):
+    return CameraStream(name, FakeGrabber(backlog), tracker=None, metrics=None)
+
+def run(scheduler, rounds, faces=()):
+    """Acquire and release cameras one at a time, counting the turns of each."""
+    turns = Counter()
+    for _ in range(rounds):
+        cam = scheduler.acquire(timeout=0)
+        turns[cam.name] += 1
+        scheduler.release(cam, faces=1 if cam.name in faces else 0)
+    return turns
+
+def test_idle_cameras_get_equal_shares():
+    scheduler = FairScheduler([camera("a"), camera("b"), camera("c")])
+    assert run(scheduler, 300) == {"a": 100, "b": 100, "c": 100}
+
+def test_cameras_with_faces_get_the_active_share():
+    scheduler = FairScheduler([camera("door"), camera("corridor")], active_weight=4.0)
+    turns = run(scheduler, 500, faces={"door"})
+    assert abs(turns["door"] - 4 * turns["corridor"]) <= 5
+
+def test_a_camera_is_held_by_one_worker_at_a_time():
+    scheduler = FairScheduler([camera("a"), camera("b")])
+    first = scheduler.acquire(timeout=0)
+    second = scheduler.acquire(timeout=0)
+    assert {first.name, second.name} == {"a", "b"}
+    assert scheduler.acquire(timeout=0) is None
+    scheduler.release(first)
+    assert scheduler.acquire(timeout=0) is first
+
+def test_cameras_without_a_frame_are_skipped():
+    empty = camera("empty", backlog=0)
+    scheduler = FairScheduler([empty, camera("live")])
+    assert run(scheduler, 10) == {"live": 10}
+    empty.grabber.backlog = 1
+    # The camera that was idle does not catch up in a burst
+    turns = run(scheduler, 10)
+    assert abs(turns["empty"] - turns["live"]) <= 2
+
+def test_added_camera_starts_at_the_current_time():
+    scheduler = FairScheduler([camera("a")])
+    run(scheduler, 50)
+    scheduler.add(camera("b"))
+    assert run(scheduler, 20) == {"a": 10, "b": 10}
+
+def test_stop_wakes_workers():
+    scheduler = FairScheduler([camera("a")])
+    scheduler.stop()
+    assert scheduler.acquire(timeout=1.0) is None
@@ -0,0 +1,52 @@
+"""
+Tests that tracked faces keep their identity across frames.
+"""
+from utils.matcher import UNKNOWN_NAME, Match
+from utils.tracker import FaceTracker
+
+def shifted(box, dy=0, dx=0):
+    top, right, bottom, left = box
+    return (top + dy, right + dx, bottom + dy, left + dx)
+
+ALICE = (100, 200, 200, 100)
+BOB = (100, 500, 200, 400)
+
+def test_moving_faces_keep_their_tracks():
+    tracker = FaceTracker()
+    alice, bob = tracker.update([ALICE, BOB], 0)
+    alice.assign(Match("alice", 0.3, {"alice": 3}), 0)
+    bob.assign(Match("bob", 0.4, {"bob": 2}), 0)
+
+    # Detections come back in another order and have moved a little
+    for frame in range(1, 10):
+        tracks = tracker.update([shifted(BOB, dx=5 * frame), shifted(ALICE, dy=4 * frame)], frame)
+        assert [track.name for track in tracks] == ["bob", "alice"]
+    assert tracks[0] is bob and tracks[1] is alice
+    assert len(tracker.tracks) == 2
+
+def test_fast_movement_falls_back_to_the_centroid():
+    tracker = FaceTracker(iou_threshold=0.3, max_centroid_shift=0.8)
+    (track,) = tracker.update([ALICE], 0)
+    # IoU 0.25 is below the threshold, but the centre moved only 0.6 face sizes
+    (same,) = tracker.update([shifted(ALICE, dx=60)], 1)
+    assert same is track
+    (other,) = tracker.update([shifted(ALICE, dx=200)], 2)
+    assert other is not track
+
+def test_tracks_survive_missed_detections_then_expire():
+    tracker = FaceTracker(max_missed=3)
+    (track,) = tracker.update([ALICE], 0)
+    tracker.update([], 1)
+    tracker.update([], 2)
+    assert tracker.update([ALICE], 3)[0] is track
+    tracker.update([], 4)
+    assert tracker.update([ALICE], 8)[0] is not track
+
+def test_reverification_schedule():
+    tracker = FaceTracker(reverify_interval=30, unknown_retry_interval=5)
+    known, unknown = tracker.update([ALICE, BOB], 0)
+    assert tracker.needs_encoding(known, 0)
+    known.assign(Match("alice", 0.3, {"alice": 1}), 0)
+    unknown.assign(Match(UNKNOWN_NAME, 0.7, {}), 0)
+    assert not tracker.needs_encoding(known, 29) and tracker.needs_encoding(known, 30)
+    assert not tracker.needs_encoding(unknown, 4) and tracker.needs_encoding(unknown, 5)
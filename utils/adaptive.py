@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Adaptive detection scale and cadence.
+Detection cost grows with the number of pixels, so the controller models
+the measured detect/encode/match time per frame as a cost per unit of
+scale squared. From that model, a latency budget (or FPS target) and the
+size of the faces seen recently, it picks the smallest detection scale
+that still resolves those faces and, when even that is too expensive,
+runs detection only every N frames. Small faces far away get a larger
+scale, large faces close up a smaller one, and a slow machine holds its
+FPS target by skipping detections instead of falling behind.
+"""
+import math
+from collections import deque
+
+def scale_frame_box(box, small_shape, frame_shape):
+    """
+    Map a (top, right, bottom, left) box from a resized frame back to the original.
+
+    Args:
+        box (tuple): Box in the resized frame
+        small_shape (tuple): Shape of the resized frame
+        frame_shape (tuple): Shape of the original frame
+
+    Returns:
+        tuple: Box in original frame coordinates
+    """
+    fy = frame_shape[0] / float(small_shape[0])
+    fx = frame_shape[1] / float(small_shape[1])
+    top, right, bottom, left = box
+    return (int(round(top * fy)), int(round(right * fx)), int(round(bottom * fy)), int(round(left * fx)))
+
+class AdaptiveController:
+    """
+    Chooses the detection scale and detect-every-N-frames cadence.
+
+    With no budget the controller is fixed: it always returns the initial
+    scale and detects on every frame.
+
+    Usage:
+        controller = AdaptiveController(target_fps=15)
+        if controller.should_detect():
+            small = cv2.resize(frame, (0, 0), fx=controller.scale, fy=controller.scale)
+            ...
+            controller.update(elapsed_seconds, face_heights)
+    """
+
+    def __init__(self, target_fps=0.0, target_latency_ms=0.0, scale=0.25, min_scale=0.15, max_scale=1.0,
+                 min_face_px=40, max_interval=5, smoothing=0.2, face_memory=30):
+        """
+        Configure the controller.
+
+        Args:
+            target_fps (float): Frames per second to hold (0 for no FPS target)
+            target_latency_ms (float): Processing budget per frame in milliseconds,
+                used when no FPS target is given (0 for none)
+            scale (float): Initial scale, and the scale used while no faces are in view
+            min_scale (float): Smallest detection scale
+            max_scale (float): Largest detection scale
+            min_face_px (int): Face height in pixels the detector needs after scaling
+            max_interval (int): Largest number of frames per detection
+            smoothing (float): Weight of a new measurement in the cost estimate
+            face_memory (int): Detections a seen face size keeps influencing the scale
+        """
+        if target_fps and target_fps > 0:
+            self.budget_ms = 1000.0 / target_fps
+        elif target_latency_ms and target_latency_ms > 0:
+            self.budget_ms = float(target_latency_ms)
+        else:
+            self.budget_ms = None
+        self.base_scale = scale
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.min_face_px = min_face_px
+        self.max_interval = max_interval
+        self.smoothing = smoothing
+        self.face_memory = face_memory
+
+        self.scale = scale
+        self.interval = 1
+        self.unit_cost_ms = None
+        self.smallest_face = None
+        # Smallest face of each of the last face_memory detections (None if none)
+        self._recent_faces = deque(maxlen=max(1, face_memory))
+        self._since_detection = 0
+        self.detections = 0
+        self.skipped = 0
+
+    @property
+    def enabled(self):
+        """bool: True if the controller adapts to a budget."""
+        return self.budget_ms is not None
+
+    def should_detect(self):
+        """
+        Decide whether to run detection on the current frame.
+
+        Returns:
+            bool: True on every interval-th frame
+        """
+        self._since_detection += 1
+        if self._since_detection >= self.interval:
+            self._since_detection = 0
+            self.detections += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def update(self, elapsed, face_heights=()):
+        """
+        Feed back one detection frame and choose the next scale and interval.
+
+        Args:
+            elapsed (float): Seconds spent on detection, encoding and matching
+            face_heights (iterable): Heights of the faces found, in original frame pixels
+        """
+        if not self.enabled:
+            return
+
+        cost = elapsed * 1000.0 / (self.scale * self.scale)
+        if self.unit_cost_ms is None:
+            self.unit_cost_ms = cost
+        else:
+            self.unit_cost_ms += self.smoothing * (cost - self.unit_cost_ms)
+
+        heights = [h for h in face_heights if h > 0]
+        self._recent_faces.append(min(heights) if heights else None)
+        recent = [h for h in self._recent_faces if h is not None]
+        self.smallest_face = min(recent) if recent else None
+
+        # The scale that keeps the smallest recent face detectable, or the
+        # configured scale while nobody is in view.
+        if self.smallest_face is not None:
+            wanted = self.min_face_px / float(self.smallest_face)
+        else:
+            wanted = self.base_scale
+        wanted = min(max(wanted, self.min_scale), self.max_scale)
+
+        # Detect less often when that scale does not fit the budget, and only
+        # give up resolution when even the longest interval is not enough.
+        frame_cost = self.unit_cost_ms * wanted * wanted
+        interval = min(self.max_interval, max(1, int(math.ceil(frame_cost / self.budget_ms))))
+        if frame_cost / interval > self.budget_ms:
+            wanted = max(self.min_scale, math.sqrt(self.budget_ms * interval / self.unit_cost_ms))
+
+        # Move in 5% steps and ignore small changes, so the scale does not jitter.
+        wanted = round(wanted * 20.0) / 20.0 or self.min_scale
+        if abs(wanted - self.scale) / self.scale >= 0.1:
+            self.scale = wanted
+        self.interval = interval
+
+    def status(self):
+        """
+        Summarize the controller.
+
+        Returns:
+            dict: scale, interval, estimated cost and detections/skips
+        """
+        return {
+            "scale": round(self.scale, 3),
+            "interval": self.interval,
+            "frame_cost_ms": round(self.unit_cost_ms * self.scale * self.scale, 2) if self.unit_cost_ms else None,
+            "budget_ms": self.budget_ms,
+            "detections": self.detections,
+            "skipped": self.skipped,
+        }
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Approximate nearest-neighbour index for very large galleries.
+An IVF (inverted file) index clusters the gallery with k-means and keeps
+the row ids of each cluster in an inverted list. A query only scans the
+``nprobe`` lists whose centroids are closest, so the cost of a search
+grows with nprobe / nlist of the gallery instead of all of it. Candidates
+are scored with exact distances, so the accept/reject decision at the
+recognition tolerance is unchanged for every row the index returns.
+"""
+import os
+import time
+
+import numpy as np
+
+INDEX_VERSION = 1
+ASSIGN_BATCH = 16384
+
+def get_index_path(gallery_path):
+    """
+    Return the path of the IVF index that belongs to a gallery file.
+
+    Args:
+        gallery_path (str): Path of the gallery file
+
+    Returns:
+        str: Path of the index file
+    """
+    return gallery_path + ".ivf"
+
+def _squared_distances(points, centroids, centroid_norms):
+    """Squared Euclidean distances between points and centroids."""
+    squared = points @ centroids.T
+    squared *= -2.0
+    squared += centroid_norms[None, :]
+    squared += np.einsum("ij,ij->i", points, points)[:, None]
+    return squared
+
+def _assign(points, centroids):
+    """Return the index of the nearest centroid for every point."""
+    centroid_norms = np.einsum("ij,ij->i", centroids, centroids)
+    assignment = np.empty(len(points), dtype=np.int32)
+    for start in range(0, len(points), ASSIGN_BATCH):
+        batch = points[start:start + ASSIGN_BATCH]
+        assignment[start:start + ASSIGN_BATCH] = _squared_distances(batch, centroids, centroid_norms).argmin(axis=1)
+    return assignment
+
+def train_kmeans(points, k, iterations=20, seed=0):
+    """
+    Train k-means centroids with Lloyd's algorithm.
+
+    Args:
+        points (np.ndarray): (n, dim) float32 training points
+        k (int): Number of clusters
+        iterations (int): Number of Lloyd iterations
+        seed (int): Random seed, so the same gallery gives the same index
+
+    Returns:
+        np.ndarray: (k, dim) float32 centroids
+    """
+    rng = np.random.default_rng(seed)
+    centroids = points[rng.choice(len(points), size=k, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignment = _assign(points, centroids)
+        counts = np.bincount(assignment, minlength=k)
+        empty = counts == 0
+
+        # Sum each cluster's points as contiguous runs of the sorted points.
+        order = np.argsort(assignment, kind="stable")
+        starts = (np.cumsum(counts) - counts)[~empty]
+        sums = np.add.reduceat(points[order], starts, axis=0)
+        centroids[~empty] = sums / counts[~empty, None]
+        # Re-seed empty clusters with random points so every list is used.
+        if empty.any():
+            centroids[empty] = points[rng.choice(len(points), size=int(empty.sum()), replace=False)]
+
+    return centroids
+
+class IVFIndex:
+    """
+    Inverted-file index over the rows of a gallery.
+
+    Attributes:
+        centroids (np.ndarray): (nlist, dim) float32 coarse cluster centres
+        offsets (np.ndarray): (nlist + 1,) start of every list in row_ids
+        row_ids (np.ndarray): Gallery row ids grouped by cluster
+        gallery_created (float): Creation time of the gallery it was built for
+    """
+
+    def __init__(self, centroids, offsets, row_ids, gallery_created=None):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.centroid_norms = np.einsum("ij,ij->i", self.centroids, self.centroids)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.row_ids = np.asarray(row_ids, dtype=np.int64)
+        self.gallery_created = gallery_created
+
+    @property
+    def nlist(self):
+        """int: Number of inverted lists."""
+        return int(self.centroids.shape[0])
+
+    @classmethod
+    def build(cls, embeddings, nlist=None, sample_size=None, seed=0):
+        """
+        Build an IVF index for a gallery embedding matrix.
+
+        Args:
+            embeddings (np.ndarray): (count, dim) gallery embeddings
+            nlist (int, optional): Number of clusters (default 4 * sqrt(count))
+            sample_size (int, optional): Number of rows used to train k-means
+                (default 256 per cluster)
+            seed (int): Random seed for training
+
+        Returns:
+            IVFIndex: The built index
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        count = len(embeddings)
+        if nlist is None:
+            nlist = int(4 * np.sqrt(count))
+        nlist = max(1, min(nlist, count))
+
+        if sample_size is None:
+            sample_size = 256 * nlist
+        rng = np.random.default_rng(seed)
+        if count > sample_size:
+            training = embeddings[np.sort(rng.choice(count, size=sample_size, replace=False))]
+        else:
+            training = embeddings
+
+        centroids = train_kmeans(training, nlist, seed=seed)
+        assignment = _assign(embeddings, centroids)
+
+        row_ids = np.argsort(assignment, kind="stable")
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=nlist), out=offsets[1:])
+        return cls(centroids, offsets, row_ids)
+
+    def candidates(self, query, nprobe):
+        """
+        Return the gallery rows in the nprobe lists closest to a query.
+
+        Args:
+            query (np.ndarray): (dim,) float32 query encoding
+            nprobe (int): Number of inverted lists to scan
+
+        Returns:
+            np.ndarray: Candidate gallery row ids
+        """
+        nprobe = min(nprobe, self.nlist)
+        coarse = self.centroid_norms - 2.0 * (self.centroids @ query)
+        if nprobe < self.nlist:
+            probes = np.argpartition(coarse, nprobe - 1)[:nprobe]
+        else:
+            probes = np.arange(self.nlist)
+        return np.concatenate([self.row_ids[self.offsets[p]:self.offsets[p + 1]] for p in probes])
+
+    def search(self, embeddings, queries, k, nprobe):
+        """
+        Find the approximate k nearest gallery rows for every query.
+
+        Args:
+            embeddings (np.ndarray): (count, dim) gallery embeddings
+            queries (np.ndarray): (faces, dim) query encodings
+            k (int or None): Number of neighbours to return (None returns every candidate)
+            nprobe (int): Number of inverted lists to scan per query
+
+        Returns:
+            list: (row_ids, distances) per query, sorted by distance
+        """
+        results = []
+        for query in np.asarray(queries, dtype=np.float32):
+            rows = self.candidates(query, nprobe)
+            distances = np.linalg.norm(embeddings[rows] - query, axis=1)
+            if k is not None and len(rows) > k:
+                keep = np.argpartition(distances, k - 1)[:k]
+                rows, distances = rows[keep], distances[keep]
+            order = np.argsort(distances, kind="stable")
+            results.append((rows[order], distances[order]))
+        return results
+
+def save_index(index, path):
+    """
+    Atomically write an IVF index next to its gallery.
+
+    Args:
+        index (IVFIndex): Index to save
+        path (str): Destination path
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, version=INDEX_VERSION, centroids=index.centroids, offsets=index.offsets,
+                 row_ids=index.row_ids, gallery_created=np.float64(index.gallery_created or 0.0))
+    os.replace(tmp_path, path)
+
+def load_index(path, gallery=None):
+    """
+    Load an IVF index, checking that it belongs to the given gallery.
+
+    Args:
+        path (str): Path to the index file
+        gallery (Gallery, optional): Gallery the index must have been built for
+
+    Returns:
+        IVFIndex or None: The index, or None if it is missing or stale
+    """
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with np.load(path) as data:
+            if int(data["version"]) != INDEX_VERSION:
+                raise ValueError(f"unsupported index version {int(data['version'])}")
+            index = IVFIndex(data["centroids"], data["offsets"], data["row_ids"],
+                             float(data["gallery_created"]))
+    except Exception as e:
+        print(f"[WARNING] Ignoring unreadable index {path}: {e}")
+        return None
+
+    if gallery is not None:
+        if len(index.row_ids) != gallery.count or index.gallery_created != gallery.meta.get("created"):
+            print(f"[WARNING] Index {path} is out of date with the gallery; re-encode with --index ivf.")
+            return None
+
+    return index
+
+def report_recall(embeddings, index, k=10, nprobes=(1, 2, 4, 8, 16, 32), sample=200, seed=0):
+    """
+    Measure recall and speed of the index against exhaustive search.
+
+    Gallery rows are used as queries; recall@k is the fraction of the true
+    k nearest neighbours that the index returns.
+
+    Args:
+        embeddings (np.ndarray): (count, dim) gallery embeddings
+        index (IVFIndex): Index to evaluate
+        k (int): Number of neighbours compared
+        nprobes (tuple): nprobe values to evaluate
+        sample (int): Number of query rows
+        seed (int): Random seed for picking queries
+
+    Returns:
+        list: (nprobe, recall, speedup) tuples
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    k = min(k, len(embeddings))
+    rng = np.random.default_rng(seed)
+    queries = embeddings[rng.choice(len(embeddings), size=min(sample, len(embeddings)), replace=False)]
+
+    start = time.perf_counter()
+    truth = []
+    for query in queries:
+        distances = np.linalg.norm(embeddings - query, axis=1)
+        truth.append(set(np.argpartition(distances, k - 1)[:k].tolist()))
+    exhaustive_time = time.perf_counter() - start
+
+    report = []
+    print(f"[INFO] IVF recall@{k} over {len(queries)} queries (nlist={index.nlist}):")
+    for nprobe in nprobes:
+        if nprobe > index.nlist:
+            break
+        start = time.perf_counter()
+        results = index.search(embeddings, queries, k, nprobe)
+        elapsed = time.perf_counter() - start
+
+        hits = sum(len(expected & set(rows.tolist())) for expected, (rows, _) in zip(truth, results))
+        recall = hits / float(k * len(queries))
+        speedup = exhaustive_time / elapsed if elapsed > 0 else float("inf")
+        print(f"[INFO]   nprobe={nprobe:<4} recall={recall:.3f} speedup={speedup:.1f}x")
+        report.append((nprobe, recall, speedup))
+    return report
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Attendance logging off the frame-processing thread.
+Recognitions are de-duplicated in memory and queued; a background writer
+hands them to a sink in batches, flushing on an interval and at shutdown.
+The default sink appends to one CSV file per day; utils.attendance_db
+provides a SQLite sink. The de-duplication state is rebuilt from the sink
+on startup, so a restart does not log everyone again, and it is reset
+when the date changes so the log rolls over at midnight.
+"""
+import csv
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+ATTENDANCE_HEADER = ["Name", "Time"]
+
+def get_attendance_file(date=None):
+    """
+    Create and return the path to a day's attendance file.
+
+    Args:
+        date (datetime.date, optional): Day of the file (default today)
+
+    Returns:
+        str: Path to the attendance CSV file for the day
+    """
+    today_str = (date or datetime.now()).strftime("%Y-%m-%d")
+    filename = f"attendance_{today_str}.csv"
+
+    if not os.path.exists(filename):
+        with open(filename, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(ATTENDANCE_HEADER)
+
+    return filename
+
+def load_logged_names(attendance_file):
+    """
+    Read the names already logged in an attendance file.
+
+    Args:
+        attendance_file (str): Path to the CSV file
+
+    Returns:
+        set: Logged names (empty if the file does not exist)
+    """
+    names = set()
+    if not os.path.exists(attendance_file):
+        return names
+    with open(attendance_file, newline="") as f:
+        for row in csv.reader(f):
+            if row and row != ATTENDANCE_HEADER:
+                names.add(row[0])
+    return names
+
+class CsvAttendanceSink:
+    """
+    Writes attendance rows to attendance_YYYY-MM-DD.csv in the working directory.
+    """
+
+    def __init__(self):
+        self.location = get_attendance_file()
+
+    def logged_names(self, date):
+        """
+        Names already logged on a day.
+
+        Args:
+            date (datetime.date): Day to read
+
+        Returns:
+            set: Logged names
+        """
+        return load_logged_names(get_attendance_file(date))
+
+    def write(self, rows):
+        """
+        Append rows to the files of their days.
+
+        Args:
+            rows (list): (name, datetime, camera) tuples
+        """
+        by_day = {}
+        for name, when, _ in rows:
+            by_day.setdefault(when.date(), []).append([name, when.strftime("%Y-%m-%d %H:%M:%S")])
+        for day, day_rows in sorted(by_day.items()):
+            attendance_file = get_attendance_file(day)
+            with open(attendance_file, "a", newline="") as f:
+                csv.writer(f).writerows(day_rows)
+            self.location = attendance_file
+
+    def close(self):
+        """Nothing to release; files are closed after every batch."""
+
+class AttendanceWriter:
+    """
+    De-duplicating attendance log with a background batch writer.
+
+    log() only touches an in-memory set and a queue, so it never waits on
+    the disk. Safe to share between cameras and worker threads.
+
+    Usage:
+        attendance = AttendanceWriter()
+        attendance.log("Alice")
+        ...
+        attendance.close()
+    """
+
+    def __init__(self, flush_interval=1.0, batch_size=100, sink=None, retries=3, retry_delay=0.5):
+        """
+        Load today's de-duplication state and start the writer thread.
+
+        Args:
+            flush_interval (float): Maximum seconds a row waits before it is written
+            batch_size (int): Rows that trigger an early flush
+            sink (optional): Where rows go (default CsvAttendanceSink)
+            retries (int): Times a failed batch is written again before it is given up
+            retry_delay (float): Seconds before the first retry, doubled after every failure
+        """
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.sink = sink if sink is not None else CsvAttendanceSink()
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.written = 0
+        self.failed = 0
+
+        self.date = datetime.now().date()
+        self.logged_names = self.sink.logged_names(self.date)
+
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._writer, name="attendance-writer", daemon=True)
+        self._thread.start()
+
+    def log(self, name, camera=None):
+        """
+        Log a recognized person unless they were already logged today.
+
+        Args:
+            name (str): Recognized name
+            camera (str, optional): Camera that saw the person
+
+        Returns:
+            bool: True if a row was queued
+        """
+        now = datetime.now()
+        with self._lock:
+            if now.date() != self.date:
+                # Midnight: start a new day with an empty log
+                self.date = now.date()
+                self.logged_names = set()
+            if name in self.logged_names:
+                return False
+            self.logged_names.add(name)
+
+        self._queue.put((name, now, camera))
+        print(f"[LOGGED] {name} at {now.strftime('%Y-%m-%d %H:%M:%S')}" + (f" ({camera})" if camera else ""))
+        return True
+
+    def _writer(self):
+        """Collect queued rows and write them in batches."""
+        batch = []
+        deadline = None
+        running = True
+        while running:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+                if item is None:
+                    running = False
+                else:
+                    batch.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+            except queue.Empty:
+                pass
+
+            if batch and (not running or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+                deadline = None
+
+    def _flush(self, batch):
+        """
+        Hand a batch of rows to the sink, retrying with backoff.
+
+        Args:
+            batch (list): (name, datetime, camera) tuples
+
+        Returns:
+            bool: True if the rows were written
+        """
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            try:
+                self.sink.write(batch)
+                self.written += len(batch)
+                return True
+            except Exception as e:
+                error = e
+            if attempt < self.retries:
+                print(f"[WARNING] Could not write {len(batch)} attendance rows ({error}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                delay *= 2
+
+        # Forget the names so they are logged again the next time they are seen
+        print(f"❌ Could not write {len(batch)} attendance rows: {error}. They will be logged when next seen.")
+        self.failed += len(batch)
+        with self._lock:
+            for name, when, _ in batch:
+                if when.date() == self.date:
+                    self.logged_names.discard(name)
+        return False
+
+    @property
+    def location(self):
+        """str: File or database the rows are written to."""
+        return self.sink.location
+
+    def close(self):
+        """Write every queued row and stop the writer thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+            self.sink.close()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+SQLite attendance store.
+Attendance events are kept in one table indexed on (name, time) and on
+date, so per-person, per-day and date range reports are index lookups
+instead of a scan over one CSV file per day. The store also works as a
+sink for AttendanceWriter, and can import and export the CSV layout
+written by utils.attendance.
+"""
+import csv
+import glob
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from utils.attendance import ATTENDANCE_HEADER
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attendance (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    time TEXT NOT NULL,
+    date TEXT NOT NULL,
+    camera TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_name_time ON attendance (name, time);
+CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance (date, name, time);
+"""
+
+class AttendanceDatabase:
+    """
+    Attendance events in a SQLite database.
+
+    Times are stored as "YYYY-MM-DD HH:MM:SS" text, which sorts
+    chronologically, with the date in its own indexed column.
+    """
+
+    def __init__(self, path="attendance.db"):
+        """
+        Open (and create if needed) the database.
+
+        Args:
+            path (str): Path to the SQLite file
+        """
+        self.location = path
+        # The attendance writer inserts from its own thread.
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def insert(self, rows):
+        """
+        Insert events in a single transaction, ignoring exact duplicates.
+
+        Args:
+            rows (iterable): (name, datetime or time string, camera) tuples
+
+        Returns:
+            int: Number of new events
+        """
+        records = []
+        for name, when, camera in rows:
+            time_str = when.strftime(TIME_FORMAT) if isinstance(when, datetime) else str(when)
+            records.append((name, time_str, time_str[:10], camera))
+
+        with self._lock, self.connection:
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO attendance (name, time, date, camera) VALUES (?, ?, ?, ?)", records)
+            return self.connection.total_changes - before
+
+    # AttendanceWriter sink interface
+    def write(self, rows):
+        """Insert a batch from AttendanceWriter."""
+        self.insert(rows)
+
+    def logged_names(self, date):
+        """
+        Names logged on a day.
+
+        Args:
+            date (datetime.date or str): Day to read
+
+        Returns:
+            set: Logged names
+        """
+        day = date if isinstance(date, str) else date.strftime("%Y-%m-%d")
+        with self._lock:
+            return {row[0] for row in self.connection.execute(
+                "SELECT DISTINCT name FROM attendance WHERE date = ?", (day,))}
+
+    def day_report(self, date):
+        """
+        Everyone present on a day.
+
+        Args:
+            date (str): Day as YYYY-MM-DD
+
+        Returns:
+            list: (name, first seen, last seen, events) tuples ordered by first seen
+        """
+        with self._lock:
+            return self.connection.execute(
+                "SELECT name, MIN(time), MAX(time), COUNT(*) FROM attendance WHERE date = ? "
+                "GROUP BY name ORDER BY MIN(time)", (date,)).fetchall()
+
+    def person_report(self, name, start=None, end=None):
+        """
+        The days one person attended.
+
+        Args:
+            name (str): Person to report on
+            start (str, optional): First day as YYYY-MM-DD
+            end (str, optional): Last day as YYYY-MM-DD
+
+        Returns:
+            list: (date, first seen, last seen, events) tuples ordered by date
+        """
+        low, high = _time_bounds(start, end)
+        with self._lock:
+            return self.connection.execute(
+                "SELECT date, MIN(time), MAX(time), COUNT(*) FROM attendance "
+                "WHERE name = ? AND time >= ? AND time < ? GROUP BY date ORDER BY date",
+                (name, low, high)).fetchall()
+
+    def range_report(self, start=None, end=None):
+        """
+        Attendance per person over a range of days.
+
+        Args:
+            start (str, optional): First day as YYYY-MM-DD
+            end (str, optional): Last day as YYYY-MM-DD
+
+        Returns:
+            list: (name, days attended, first seen, last seen) tuples ordered by name
+        """
+        low, high = _time_bounds(start, end)
+        with self._lock:
+            return self.connection.execute(
+                "SELECT name, COUNT(DISTINCT date), MIN(time), MAX(time) FROM attendance "
+                "WHERE date >= ? AND date <= ? GROUP BY name ORDER BY name",
+                (low[:10], high[:10])).fetchall()
+
+    def import_csv(self, paths):
+        """
+        Import attendance CSV files in the attendance_YYYY-MM-DD.csv layout.
+
+        Args:
+            paths (list): CSV files, or directories searched for attendance_*.csv
+
+        Returns:
+            tuple: (files read, new events)
+        """
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                files.extend(sorted(glob.glob(os.path.join(path, "attendance_*.csv"))))
+            else:
+                files.append(path)
+
+        added = 0
+        for path in files:
+            with open(path, newline="") as f:
+                rows = [(row[0], row[1], None) for row in csv.reader(f)
+                        if len(row) >= 2 and row[:2] != ATTENDANCE_HEADER]
+            added += self.insert(rows)
+        return len(files), added
+
+    def export_csv(self, directory, start=None, end=None):
+        """
+        Export events as one attendance_YYYY-MM-DD.csv file per day.
+
+        Args:
+            directory (str): Output directory
+            start (str, optional): First day as YYYY-MM-DD
+            end (str, optional): Last day as YYYY-MM-DD
+
+        Returns:
+            list: Paths of the files written
+        """
+        os.makedirs(directory, exist_ok=True)
+        low, high = _time_bounds(start, end)
+        with self._lock:
+            events = self.connection.execute(
+                "SELECT date, name, time FROM attendance WHERE date >= ? AND date <= ? ORDER BY date, time",
+                (low[:10], high[:10])).fetchall()
+
+        written = []
+        current = None
+        f = writer = None
+        try:
+            for date, name, time_str in events:
+                if date != current:
+                    if f is not None:
+                        f.close()
+                    current = date
+                    path = os.path.join(directory, f"attendance_{date}.csv")
+                    f = open(path, "w", newline="")
+                    writer = csv.writer(f)
+                    writer.writerow(ATTENDANCE_HEADER)
+                    written.append(path)
+                writer.writerow([name, time_str])
+        finally:
+            if f is not None:
+                f.close()
+        return written
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            self.connection.close()
+
+def _time_bounds(start=None, end=None):
+    """Turn an inclusive YYYY-MM-DD day range into half-open time string bounds."""
+    low = start or "0000-00-00"
+    # "~" sorts after every digit, so the whole end day is included.
+    high = (end or "9999-99-99") + "~"
+    return low, high
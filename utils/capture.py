@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Threaded video capture with latest-frame semantics.
+A dedicated reader thread keeps pulling frames from the camera so the
+driver buffer never backs up behind slow processing. The processing loop
+always receives the freshest frame together with its sequence number and
+capture timestamp; frames that were replaced before anyone read them are
+dropped and counted. Video files are not live, so their frames are
+handed over one by one instead and the end of the file finishes the
+source.
+"""
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+
+CapturedFrame = namedtuple("CapturedFrame", ["ok", "frame", "seq", "timestamp"])
+CapturedFrame.__doc__ = """
+A frame handed to the processing loop.
+
+Attributes:
+    ok (bool): False if no new frame arrived (timeout or shutdown)
+    frame (np.ndarray or None): BGR image
+    seq (int): Sequence number of the frame, increasing by one per captured frame
+    timestamp (float): time.monotonic() when the frame was captured
+"""
+
+def is_file_source(source):
+    """
+    Check whether a video source is a file rather than a camera or stream.
+
+    Args:
+        source (int or str): Camera index, video file or stream URL
+
+    Returns:
+        bool: True for video files
+    """
+    return isinstance(source, str) and "://" not in source and not source.startswith("/dev/")
+
+class FrameGrabber:
+    """
+    Camera reader running on its own thread.
+
+    The interface mirrors cv2.VideoCapture (isOpened, read, release) so the
+    live loops only change where they create the capture.
+    """
+
+    def __init__(self, source=0, retry_delay=0.5, on_frame=None, recorder=None):
+        """
+        Open the video source.
+
+        Args:
+            source (int or str): Camera index, video file or stream URL
+            retry_delay (float): Seconds to wait after a failed grab
+            on_frame (callable, optional): Called on the reader thread after
+                every new frame, e.g. to wake a scheduler
+            recorder (FrameRecorder, optional): Saves every captured frame
+        """
+        self.source = source
+        self.retry_delay = retry_delay
+        self.on_frame = on_frame
+        self.recorder = recorder
+        self.is_file = is_file_source(source)
+        self.capture = cv2.VideoCapture(source)
+        # Keep the driver queue short; not every backend supports this.
+        self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self._init_state()
+
+    def _init_state(self):
+        """Reset the frame hand-over state."""
+        self.finished = False
+        self.dropped = 0
+        self.failures = 0
+        self._frame = None
+        self._seq = 0
+        self._timestamp = None
+        self._last_read = 0
+        self._running = False
+        self._released = False
+        self._thread = None
+        self._condition = threading.Condition()
+
+    def isOpened(self):
+        """
+        Check whether the source was opened.
+
+        Returns:
+            bool: True if frames can be read
+        """
+        return self.capture.isOpened()
+
+    @property
+    def seq(self):
+        """int: Sequence number of the newest captured frame."""
+        return self._seq
+
+    @property
+    def backlog(self):
+        """int: Frames captured since the last one returned by read."""
+        return self._seq - self._last_read
+
+    def start(self):
+        """
+        Start the reader thread. Does nothing once the grabber was released.
+
+        Returns:
+            FrameGrabber: self, for chaining
+        """
+        if self._thread is None and not self._released:
+            self._running = True
+            self._thread = threading.Thread(target=self._reader, name="frame-grabber", daemon=True)
+            self._thread.start()
+        return self
+
+    def _reader(self):
+        """Continuously grab frames, keeping only the newest one."""
+        try:
+            while self._running:
+                if self.is_file:
+                    # Recorded footage: hand over every frame instead of dropping
+                    with self._condition:
+                        self._condition.wait_for(lambda: self._last_read >= self._seq or not self._running)
+                    if not self._running:
+                        break
+                ret, frame = self.capture.read()
+                if not ret and self.is_file:
+                    self._finish()
+                    break
+                if not ret:
+                    self.failures += 1
+                    print("⚠️ Failed to grab frame. Retrying...")
+                    time.sleep(self.retry_delay)
+                    continue
+
+                self._publish(frame)
+        finally:
+            # Closed on this thread so it never happens during a read() or a write
+            self._close_sources()
+
+    def _close_sources(self):
+        """Release the video source and finish the recording."""
+        if self.capture is not None:
+            self.capture.release()
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def _publish(self, frame):
+        """Make a frame the newest one, dropping the previous one if it was never read."""
+        timestamp = time.monotonic()
+        with self._condition:
+            if self._frame is not None and self._seq > self._last_read:
+                self.dropped += 1
+            self._frame = frame
+            self._seq += 1
+            self._timestamp = timestamp
+            self._condition.notify_all()
+        if self.recorder is not None:
+            self.recorder.write(frame, timestamp)
+        if self.on_frame is not None:
+            self.on_frame()
+
+    def _finish(self):
+        """Mark the source as finished and wake everyone waiting for a frame."""
+        with self._condition:
+            self.finished = True
+            self._condition.notify_all()
+        if self.on_frame is not None:
+            self.on_frame()
+
+    def read(self, timeout=1.0):
+        """
+        Return the newest frame that has not been returned yet.
+
+        Blocks until a new frame arrives, the timeout expires, the source
+        is finished or the grabber is released.
+
+        Args:
+            timeout (float or None): Maximum seconds to wait (None waits forever)
+
+        Returns:
+            CapturedFrame: The frame, or ok=False if none arrived in time
+        """
+        self.start()
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq > self._last_read or not self._running or self.finished,
+                                     timeout)
+            if self._seq <= self._last_read:
+                return CapturedFrame(False, None, self._last_read, None)
+            self._last_read = self._seq
+            # Lets a reader that hands over every frame publish the next one
+            self._condition.notify_all()
+            return CapturedFrame(True, self._frame, self._seq, self._timestamp)
+
+    def peek(self, timeout=1.0):
+        """
+        Return the newest frame without marking it as read.
+
+        Args:
+            timeout (float or None): Maximum seconds to wait for a first frame
+
+        Returns:
+            CapturedFrame: The frame, or ok=False if none arrived in time
+        """
+        self.start()
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq > 0 or not self._running or self.finished, timeout)
+            if self._seq == 0:
+                return CapturedFrame(False, None, 0, None)
+            return CapturedFrame(True, self._frame, self._seq, self._timestamp)
+
+    def release(self):
+        """Stop the reader thread and release the video source."""
+        with self._condition:
+            released = self._released
+            self._released = True
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            # The reader closes the sources once its current read() returns
+            self._thread.join(timeout=2.0)
+            if self._thread.is_alive():
+                print("⚠️ Video source did not stop in time; it is released when its read returns.")
+                return
+            self._thread = None
+        elif not released:
+            self._close_sources()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
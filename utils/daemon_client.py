@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Wire protocol and thin client for the recognition daemon.
+Every message is a little-endian uint32 header length, a UTF-8 JSON
+header and, if the header has a "size", that many payload bytes (an
+encoded image in requests). The same framing runs over a Unix socket or
+a localhost TCP port. This module only uses the standard library, so a
+client starts in milliseconds and never loads a model itself.
+"""
+import json
+import os
+import socket
+import struct
+
+DEFAULT_SOCKET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "recognizer.sock")
+
+_LENGTH = struct.Struct("<I")
+# Upper bound on a header, so a bad client cannot make the daemon allocate gigabytes.
+MAX_HEADER_BYTES = 1 << 20
+
+def encode_message(header, payload=b""):
+    """
+    Frame a message.
+
+    Args:
+        header (dict): JSON-serializable header
+        payload (bytes): Optional payload
+
+    Returns:
+        bytes: The framed message
+    """
+    if payload:
+        header = dict(header, size=len(payload))
+    body = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    return _LENGTH.pack(len(body)) + body + payload
+
+def _recv_exactly(sock, size):
+    """Read exactly size bytes from a blocking socket."""
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed by the recognition daemon")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+def read_message(sock):
+    """
+    Read one framed message from a blocking socket.
+
+    Args:
+        sock (socket.socket): Connected socket
+
+    Returns:
+        tuple: (header dict, payload bytes)
+    """
+    (length,) = _LENGTH.unpack(_recv_exactly(sock, _LENGTH.size))
+    if length > MAX_HEADER_BYTES:
+        raise ValueError(f"Message header too large ({length} bytes)")
+    header = json.loads(_recv_exactly(sock, length).decode("utf-8"))
+    payload = _recv_exactly(sock, header["size"]) if header.get("size") else b""
+    return header, payload
+
+class RecognitionClient:
+    """
+    Client for a running recognition daemon.
+
+    The connection is opened on the first request and reused, so only the
+    first call pays for connecting.
+
+    Usage:
+        with RecognitionClient() as client:
+            for face in client.recognize("photo.jpg"):
+                print(face["name"], face["box"])
+    """
+
+    def __init__(self, socket_path=None, host="127.0.0.1", port=None, timeout=10.0):
+        """
+        Configure the client.
+
+        Args:
+            socket_path (str, optional): Unix socket of the daemon (default recognizer.sock)
+            host (str): Host of the daemon when using TCP
+            port (int, optional): TCP port; when given, TCP is used instead of the Unix socket
+            timeout (float): Seconds to wait for a reply
+        """
+        self.socket_path = socket_path or DEFAULT_SOCKET
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.sock = None
+
+    def connect(self):
+        """Open the connection if it is not open yet."""
+        if self.sock is not None:
+            return
+        if self.port:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+        self.sock = sock
+
+    def request(self, header, payload=b""):
+        """
+        Send a request and wait for its reply.
+
+        Args:
+            header (dict): Request header with an "op"
+            payload (bytes): Optional payload
+
+        Returns:
+            dict: Reply header
+
+        Raises:
+            RuntimeError: If the daemon reports an error
+        """
+        self.connect()
+        try:
+            self.sock.sendall(encode_message(header, payload))
+            reply, _ = read_message(self.sock)
+        except (OSError, ValueError):
+            self.close()
+            raise
+        if not reply.get("ok"):
+            raise RuntimeError(reply.get("error", "Unknown error from the recognition daemon"))
+        return reply
+
+    def recognize(self, image, scale=None):
+        """
+        Recognize the faces in an image.
+
+        Args:
+            image (str, bytes or np.ndarray): Image file, encoded image bytes
+                (JPEG, PNG, ...) or a BGR frame
+            scale (float, optional): Factor the daemon resizes the image by
+                before detection (default: the daemon's --scale)
+
+        Returns:
+            list: One dict per face with "box" (top, right, bottom, left),
+                  "name" and "distance"
+        """
+        if isinstance(image, str):
+            with open(image, "rb") as f:
+                payload = f.read()
+        elif isinstance(image, (bytes, bytearray, memoryview)):
+            payload = bytes(image)
+        else:
+            # Only frames need OpenCV, so image files and bytes stay dependency-free
+            import cv2
+            ok, buffer = cv2.imencode(".jpg", image)
+            if not ok:
+                raise ValueError("Could not encode the frame")
+            payload = buffer.tobytes()
+
+        header = {"op": "recognize"}
+        if scale is not None:
+            header["scale"] = scale
+        return self.request(header, payload)["faces"]
+
+    def ping(self):
+        """
+        Check that the daemon is up.
+
+        Returns:
+            bool: True if it replied
+        """
+        return bool(self.request({"op": "ping"}).get("ok"))
+
+    def status(self):
+        """
+        Ask the daemon for its gallery and batching statistics.
+
+        Returns:
+            dict: Status reply
+        """
+        return self.request({"op": "status"})
+
+    def reload(self):
+        """Ask the daemon to reload the gallery."""
+        self.request({"op": "reload"})
+
+    def close(self):
+        """Close the connection."""
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Pluggable face detector backends.
+Every detector takes a BGR frame and returns face boxes in the
+(top, right, bottom, left) format used by face_recognition, so the
+encode, attendance and detection tools can switch backends freely.
+
+Available backends:
+    hog   dlib HOG detector via face_recognition (accurate, slow)
+    dnn   OpenCV DNN ResNet-10 SSD from models/ (fast, robust)
+    haar  OpenCV Haar cascade (fastest, least accurate)
+"""
+import os
+import time
+
+import cv2
+import face_recognition
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PROTOTXT = os.path.join(BASE_DIR, "models", "deploy.prototxt")
+DEFAULT_MODEL = os.path.join(BASE_DIR, "models", "res10_300x300_ssd_iter_140000_fp16.caffemodel")
+
+class FaceDetector:
+    """
+    Base class for face detectors.
+
+    Subclasses override detect, or detect_with_scores when the backend
+    reports a confidence per face.
+    """
+    name = "base"
+
+    def detect_with_scores(self, image, rgb=None):
+        """
+        Detect faces and report a confidence per box.
+
+        Args:
+            image (np.ndarray): BGR frame
+            rgb (np.ndarray, optional): The same frame already converted to RGB
+
+        Returns:
+            tuple: (list of (top, right, bottom, left) boxes, list of scores)
+        """
+        boxes = self.detect(image, rgb)
+        return boxes, [1.0] * len(boxes)
+
+    def detect(self, image, rgb=None):
+        """
+        Detect faces.
+
+        Args:
+            image (np.ndarray): BGR frame
+            rgb (np.ndarray, optional): The same frame already converted to RGB
+
+        Returns:
+            list: (top, right, bottom, left) boxes
+        """
+        return self.detect_with_scores(image, rgb)[0]
+
+class HogDetector(FaceDetector):
+    """
+    dlib HOG detector, the face_recognition default.
+    """
+    name = "hog"
+
+    def __init__(self, upsample=1):
+        self.upsample = upsample
+
+    def detect(self, image, rgb=None):
+        if rgb is None:
+            rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        return face_recognition.face_locations(rgb, number_of_times_to_upsample=self.upsample, model="hog")
+
+class DnnDetector(FaceDetector):
+    """
+    OpenCV DNN ResNet-10 SSD detector. The network is loaded once and reused.
+    """
+    name = "dnn"
+
+    def __init__(self, prototxt=None, model=None, confidence=0.5):
+        # Imported here because utils.face_utils imports this module.
+        from utils.face_utils import setup_dnn_network
+
+        prototxt = prototxt or DEFAULT_PROTOTXT
+        model = model or DEFAULT_MODEL
+        for path in (prototxt, model):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"DNN model file not found: {path} (run scripts/download_models.py)")
+
+        self.net = setup_dnn_network(prototxt, model)
+        self.confidence = confidence
+
+    def use_cpu(self):
+        """Switch the network to the OpenCV CPU backend."""
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+
+    def detect_with_scores(self, image, rgb=None):
+        h, w = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(image, 1.0, (300, 300), (104.0, 117.0, 123.0), False, False)
+        self.net.setInput(blob)
+        detections = self.net.forward()
+
+        boxes = []
+        scores = []
+        for i in range(detections.shape[2]):
+            confidence = float(detections[0, 0, i, 2])
+            if confidence <= self.confidence:
+                continue
+            x1, y1, x2, y2 = (detections[0, 0, i, 3:7] * [w, h, w, h]).astype("int")
+            x1, y1 = max(0, x1), max(0, y1)
+            x2, y2 = min(w - 1, x2), min(h - 1, y2)
+            if x2 <= x1 or y2 <= y1:
+                continue
+            boxes.append((int(y1), int(x2), int(y2), int(x1)))
+            scores.append(confidence)
+        return boxes, scores
+
+class HaarDetector(FaceDetector):
+    """
+    OpenCV Haar cascade detector.
+    """
+    name = "haar"
+
+    def __init__(self, cascade_path=None, scale_factor=1.1, min_neighbors=5):
+        cascade_path = cascade_path or os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise FileNotFoundError(f"Haar cascade not found: {cascade_path}")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+
+    def detect(self, image, rgb=None):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        faces = self.cascade.detectMultiScale(gray, scaleFactor=self.scale_factor,
+                                              minNeighbors=self.min_neighbors)
+        return [(int(y), int(x + w), int(y + h), int(x)) for (x, y, w, h) in faces]
+
+DETECTORS = {
+    "hog": HogDetector,
+    "dnn": DnnDetector,
+    "haar": HaarDetector,
+}
+
+_detector_cache = {}
+
+def create_detector(name="hog", **kwargs):
+    """
+    Create a detector backend by name.
+
+    Args:
+        name (str): One of "hog", "dnn" or "haar"
+        **kwargs: Backend specific options
+
+    Returns:
+        FaceDetector: The detector
+    """
+    if name not in DETECTORS:
+        raise ValueError(f"Unknown detector '{name}', choose from {', '.join(DETECTORS)}")
+    return DETECTORS[name](**kwargs)
+
+def get_detector(name="hog"):
+    """
+    Return a detector with default options, created once per process.
+
+    Args:
+        name (str): One of "hog", "dnn" or "haar"
+
+    Returns:
+        FaceDetector: The shared detector
+    """
+    if name not in _detector_cache:
+        _detector_cache[name] = create_detector(name)
+    return _detector_cache[name]
+
+def benchmark_detectors(detectors, frames, repeat=3):
+    """
+    Time every detector on the same frames.
+
+    Args:
+        detectors (list): FaceDetector instances to compare
+        frames (list): BGR frames
+        repeat (int): Passes over the frames per detector
+
+    Returns:
+        list: One dict per detector with mean/p50/p95 milliseconds and faces found
+    """
+    results = []
+    for detector in detectors:
+        # One untimed call so lazy initialisation does not skew the numbers.
+        detector.detect(frames[0])
+
+        timings = []
+        faces = 0
+        for _ in range(repeat):
+            for frame in frames:
+                start = time.perf_counter()
+                boxes = detector.detect(frame)
+                timings.append((time.perf_counter() - start) * 1000.0)
+                faces += len(boxes)
+
+        timings = np.asarray(timings)
+        results.append({
+            "detector": detector.name,
+            "frames": len(frames),
+            "mean_ms": float(timings.mean()),
+            "p50_ms": float(np.percentile(timings, 50)),
+            "p95_ms": float(np.percentile(timings, 95)),
+            "fps": float(1000.0 / timings.mean()) if timings.mean() > 0 else float("inf"),
+            "faces_per_frame": faces / float(len(timings)),
+        })
+    return results
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Per-image manifest cache for incremental face encoding.
+The manifest records, for every image in the dataset, its path, size,
+modification time and content hash next to the embeddings it produced,
+so a re-encode only has to process new or changed images.
+"""
+import hashlib
+import os
+import pickle
+
+MANIFEST_VERSION = 1
+
+def get_manifest_path(encoding_file):
+    """
+    Return the path of the manifest that belongs to an encodings file.
+
+    Args:
+        encoding_file (str): Path of the encodings file
+
+    Returns:
+        str: Path of the manifest file
+    """
+    return encoding_file + ".manifest"
+
+def load_manifest(manifest_path):
+    """
+    Load an encoding manifest.
+
+    Args:
+        manifest_path (str): Path to the manifest file
+
+    Returns:
+        dict: Mapping of dataset-relative image path to manifest entry
+              (empty if the manifest is missing, unreadable or outdated)
+    """
+    try:
+        with open(manifest_path, "rb") as f:
+            manifest = pickle.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"[WARNING] Ignoring unreadable manifest {manifest_path}: {e}")
+        return {}
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        print(f"[INFO] Manifest {manifest_path} has an old format, re-encoding everything.")
+        return {}
+
+    return manifest["images"]
+
+def save_manifest(manifest_path, images):
+    """
+    Atomically write an encoding manifest.
+
+    Args:
+        manifest_path (str): Path to the manifest file
+        images (dict): Mapping of dataset-relative image path to manifest entry
+    """
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump({"version": MANIFEST_VERSION, "images": images}, f)
+    os.replace(tmp_path, manifest_path)
+
+def hash_file(path, chunk_size=1 << 20):
+    """
+    Compute the SHA-1 digest of a file's contents.
+
+    Args:
+        path (str): Path to the file
+        chunk_size (int): Number of bytes read at a time
+
+    Returns:
+        str: Hex digest of the file contents
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def find_cached_entry(entry, image_path):
+    """
+    Check whether a manifest entry is still valid for an image on disk.
+
+    Size and modification time are compared first; the content hash is
+    only computed when they differ, so an unchanged dataset is never read.
+
+    Args:
+        entry (dict or None): Previous manifest entry for the image
+        image_path (str): Path to the image file
+
+    Returns:
+        tuple: (fresh manifest entry without encodings, cached entry or None)
+    """
+    stat = os.stat(image_path)
+    fresh = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+    if entry is not None and entry["size"] == fresh["size"] and entry["mtime"] == fresh["mtime"]:
+        fresh["sha1"] = entry["sha1"]
+        return fresh, entry
+
+    fresh["sha1"] = hash_file(image_path)
+    if entry is not None and entry["size"] == fresh["size"] and entry["sha1"] == fresh["sha1"]:
+        return fresh, entry
+
+    return fresh, None
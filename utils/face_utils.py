@@ -2,53 +2,70 @@
 """
 Common utilities for face recognition and detection.
 This module provides helper functions for working with face recognition,
-including loading and saving encodings, managing attendance logs,
+including loading and saving encoding galleries, managing attendance logs,
 setting up neural networks, and processing face images.
 """
 import face_recognition
 import cv2
+import numpy as np
 import os
-import pickle
-from datetime import datetime
-import csv
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from utils.adaptive import scale_frame_box
+from utils.detectors import get_detector
+from utils.gallery import Gallery, load_gallery, save_gallery
+from utils.ann_index import IVFIndex, get_index_path, load_index, save_index, report_recall
+from utils.matcher import FaceMatcher, ShardedMatcher
+from utils.prototypes import compress_gallery, evaluate_compression
+from utils.quantize import quantize_embeddings
+from utils.metrics import PipelineMetrics
+from utils.encoding_manifest import get_manifest_path, load_manifest, save_manifest, find_cached_entry
 
-def load_encodings(encoding_file="encodings.pickle"):
+def load_encodings(encoding_file="encodings.gallery"):
     """
-    Load face encodings from a pickle file.
+    Load face encodings from a gallery file.
     
     Args:
-        encoding_file (str): Path to the pickle file containing encodings
+        encoding_file (str): Path to the gallery file (legacy pickles are also accepted)
         
     Returns:
-        dict: Dictionary with 'encodings' and 'names' keys
+        Gallery: Gallery with a memory-mapped embedding matrix, label ids and names
     """
-    try:
-        with open(encoding_file, "rb") as f:
-            data = pickle.load(f)
-        return data
-    except FileNotFoundError:
-        print(f"[ERROR] Encodings file {encoding_file} not found.")
-        return {"encodings": [], "names": []}
-    except Exception as e:
-        print(f"[ERROR] Failed to load encodings: {e}")
-        return {"encodings": [], "names": []}
+    return load_gallery(encoding_file)
 
-def get_attendance_file():
+def load_matcher(encodings_path, tolerance=0.5, nprobe=8, verbose=True, shards=1):
     """
-    Create and return the path to today's attendance file.
+    Load a gallery and build a matcher for it, using its IVF index if present.
     
+    Args:
+        encodings_path (str): Path to the gallery file
+        tolerance (float): Recognition tolerance
+        nprobe (int): IVF lists scanned per face (0 for exhaustive matching)
+        verbose (bool): Print what was loaded
+        shards (int): Split exhaustive matching into this many shards scored in parallel
+        
     Returns:
-        str: Path to the attendance CSV file for today
+        FaceMatcher, ShardedMatcher or None: The matcher, or None if the gallery is empty
     """
-    today_str = datetime.now().strftime("%Y-%m-%d")
-    filename = f"attendance_{today_str}.csv"
-    
-    if not os.path.exists(filename):
-        with open(filename, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(["Name", "Time"])
+    gallery = load_encodings(encodings_path)
+    if gallery.count == 0:
+        return None
     
-    return filename
+    index = load_index(get_index_path(encodings_path), gallery) if nprobe > 0 else None
+    if verbose:
+        print(f"[INFO] Loaded {gallery.count} face encodings for {len(gallery.names)} people.")
+    if verbose and index is not None:
+        print(f"[INFO] Using IVF index with {index.nlist} lists (nprobe={nprobe}).")
+    if shards > 1 and index is not None:
+        print(f"[WARNING] --shards {shards} is ignored because the IVF index is used; "
+              f"pass --nprobe 0 to match exhaustively on shards.")
+    if shards > 1 and index is None:
+        matcher = ShardedMatcher(gallery, tolerance=tolerance, shards=shards)
+        if verbose:
+            print(f"[INFO] Matching on {len(matcher.shards)} shards in parallel.")
+        return matcher
+    return FaceMatcher(gallery, tolerance=tolerance, index=index, nprobe=nprobe)
 
 def setup_dnn_network(prototxt_path, model_path):
     """
@@ -78,48 +95,226 @@ def setup_dnn_network(prototxt_path, model_path):
     
     return net
 
-def encode_face_images(dataset_path, encoding_file):
+def list_dataset_images(dataset_path):
+    """
+    List every image in the dataset in a stable order.
+    
+    Args:
+        dataset_path (str): Path to the directory containing face images
+        
+    Returns:
+        list: (person_name, image_path) tuples sorted by person then image
+    """
+    images = []
+    for person_name in sorted(os.listdir(dataset_path)):
+        person_folder = os.path.join(dataset_path, person_name)
+        
+        if not os.path.isdir(person_folder):
+            continue
+            
+        for image_name in sorted(os.listdir(person_folder)):
+            images.append((person_name, os.path.join(person_folder, image_name)))
+    
+    return images
+
+def encode_image(image_path, detector="hog"):
+    """
+    Detect and encode every face in a single image.
+    
+    This runs inside worker processes, so it only returns plain data:
+    a compact float32 array instead of a list of float64 arrays.
+    
+    Args:
+        image_path (str): Path to the image file
+        detector (str): Face detector backend ("hog", "dnn" or "haar")
+        
+    Returns:
+        tuple: (float32 array of shape (faces, 128), error message or None)
+    """
+    try:
+        image = cv2.imread(image_path)
+        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        
+        # The detector is created once per process and reused
+        boxes = get_detector(detector).detect(image, rgb)
+        encodings = face_recognition.face_encodings(rgb, boxes)
+        
+        return np.asarray(encodings, dtype=np.float32).reshape(-1, 128), None
+    except Exception as e:
+        return np.empty((0, 128), dtype=np.float32), str(e)
+
+def encode_images(image_paths, workers=1, detector="hog"):
+    """
+    Encode a list of images, optionally on a pool of worker processes.
+    
+    Args:
+        image_paths (list): Paths of the images to encode
+        workers (int): Number of encoding processes
+        detector (str): Face detector backend ("hog", "dnn" or "haar")
+        
+    Yields:
+        tuple: (float32 encodings array, error message or None) per image,
+               in the same order as image_paths
+    """
+    encode = partial(encode_image, detector=detector)
+    if workers > 1 and len(image_paths) > 1:
+        # map() yields results in submission order, so the output does not
+        # depend on which worker finishes first.
+        chunksize = max(1, len(image_paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(encode, image_paths, chunksize=chunksize)
+    else:
+        yield from map(encode, image_paths)
+
+def recognize_frame(frame, detector, matcher, scale=0.25):
+    """
+    Detect, encode and match every face in a BGR frame.
+    
+    Args:
+        frame (np.ndarray): BGR frame
+        detector (FaceDetector): Face detector backend
+        matcher (FaceMatcher): Matcher for the gallery
+        scale (float): Factor the frame is resized by before detection
+        
+    Returns:
+        list: (box, match) pairs, with (top, right, bottom, left) boxes in
+              the coordinates of the original frame
+    """
+    small_frame = cv2.resize(frame, (0, 0), fx=scale, fy=scale) if scale != 1.0 else frame
+    rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+    
+    boxes = detector.detect(small_frame, rgb_small_frame)
+    if not boxes:
+        return []
+    
+    encodings = face_recognition.face_encodings(rgb_small_frame, boxes)
+    matches = matcher.match(encodings)
+    return [(scale_frame_box(box, small_frame.shape, frame.shape), match) for box, match in zip(boxes, matches)]
+
+def encode_face_images(dataset_path, encoding_file, workers=1, incremental=True, index=None, nlist=None,
+                       prototypes=False, max_radius=0.3, max_prototypes=8, detector="hog", metrics=None,
+                       precision="float32", tolerance=0.5):
     """
     Encode all face images in the dataset directory.
     
+    A manifest stored next to the encodings file remembers every image's
+    size, modification time, content hash and embeddings, so only new or
+    changed images are encoded again. Images that were deleted from the
+    dataset are dropped from the output.
+    
     Args:
         dataset_path (str): Path to the directory containing face images
         encoding_file (str): Path where encodings should be saved
+        workers (int): Number of encoding processes (0 uses every CPU core)
+        incremental (bool): Reuse cached embeddings for unchanged images
+        index (str, optional): ANN index to build next to the gallery ("ivf")
+        nlist (int, optional): Number of IVF lists (default 4 * sqrt(count))
+        prototypes (bool): Compress each person's embeddings to weighted prototypes
+        max_radius (float): Maximum distance from an embedding to its prototype
+        max_prototypes (int): Upper bound on prototypes per person
+        detector (str): Face detector backend ("hog", "dnn" or "haar")
+        metrics (PipelineMetrics, optional): Instrumentation to record stage timings in
+        precision (str): Also store a "float16" or "int8" copy for the matcher to scan
+        tolerance (float): Recognition tolerance the prototypes are evaluated at
         
     Returns:
         int: Number of faces encoded
     """
-    known_encodings = []
-    known_names = []
+    if workers is None or workers <= 0:
+        workers = os.cpu_count() or 1
+    if metrics is None:
+        metrics = PipelineMetrics("encode")
     
-    print("[INFO] Encoding faces...")
+    manifest_path = get_manifest_path(encoding_file)
+    previous = load_manifest(manifest_path) if incremental else {}
     
-    for person_name in os.listdir(dataset_path):
-        person_folder = os.path.join(dataset_path, person_name)
-        
-        if not os.path.isdir(person_folder):
+    images = list_dataset_images(dataset_path)
+    manifest = {}
+    pending = []
+    
+    for person_name, image_path in images:
+        key = os.path.relpath(image_path, dataset_path)
+        try:
+            with metrics.stage("fingerprint"):
+                entry, cached = find_cached_entry(previous.get(key), image_path)
+        except OSError as e:
+            print(f"[ERROR] Failed to read {image_path}: {e}")
             continue
-            
-        for image_name in os.listdir(person_folder):
-            image_path = os.path.join(person_folder, image_name)
+        
+        entry["person"] = person_name
+        entry["detector"] = detector
+        manifest[key] = entry
+        # Embeddings from another detector backend are not reused
+        if cached is not None and cached.get("detector", "hog") == detector:
+            entry["encodings"] = cached["encodings"]
+        else:
+            pending.append((key, image_path))
+    
+    removed = len(set(previous) - set(manifest))
+    print(f"[INFO] {len(images)} images in dataset: {len(pending)} to encode, "
+          f"{len(manifest) - len(pending)} cached, {removed} removed.")
+    
+    if pending:
+        print(f"[INFO] Encoding faces from {len(pending)} images using {workers} worker(s) "
+              f"and the {detector} detector...")
+        start = time.perf_counter()
+        
+        pending_paths = [image_path for _, image_path in pending]
+        last = start
+        for (key, image_path), (encodings, error) in zip(pending, encode_images(pending_paths, workers, detector)):
             print(f"[INFO] Processing image: {image_path}")
             
-            try:
-                image = cv2.imread(image_path)
-                rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-                
-                boxes = face_recognition.face_locations(rgb, model="hog")
-                encodings = face_recognition.face_encodings(rgb, boxes)
-                
-                for encoding in encodings:
-                    known_encodings.append(encoding)
-                    known_names.append(person_name)
-            except Exception as e:
-                print(f"[ERROR] Failed to process {image_path}: {e}")
-    
-    data = {"encodings": known_encodings, "names": known_names}
-    with open(encoding_file, "wb") as f:
-        pickle.dump(data, f)
+            # With several workers this is the interval between finished images
+            now = time.perf_counter()
+            metrics.observe("encode", now - last)
+            last = now
+            metrics.frame_done(faces=len(encodings))
+            metrics.maybe_dump()
+            
+            if error is not None:
+                print(f"[ERROR] Failed to process {image_path}: {error}")
+                # Not cached, so the image is encoded again next run
+                del manifest[key]
+                continue
+            manifest[key]["encodings"] = encodings
+        
+        elapsed = time.perf_counter() - start
+        rate = len(pending) / elapsed if elapsed > 0 else 0.0
+        print(f"[INFO] Encoded {len(pending)} images in {elapsed:.1f}s ({rate:.1f} images/s)")
+    
+    known_encodings = []
+    known_names = []
+    for entry in manifest.values():
+        known_encodings.append(entry["encodings"])
+        known_names.extend([entry["person"]] * len(entry["encodings"]))
+    
+    gallery = Gallery.from_encodings(known_encodings, known_names)
+    if prototypes and gallery.count > 0:
+        compressed = compress_gallery(gallery, max_radius=max_radius, max_prototypes=max_prototypes)
+        agreement = evaluate_compression(gallery, compressed, tolerance=tolerance, max_radius=max_radius,
+                                         max_prototypes=max_prototypes)
+        print(f"[INFO] Compressed {gallery.count} encodings to {compressed.count} prototypes "
+              f"({gallery.count / max(compressed.count, 1):.1f}x smaller, "
+              f"{agreement * 100:.1f}% of held-out faces recognized identically)")
+        gallery = compressed
+    if precision != "float32" and gallery.count > 0:
+        gallery.sections.update(quantize_embeddings(gallery.embeddings, precision))
+        scanned = sum(gallery.sections[name].nbytes for name in ("quantized", "quantized_norms", "quantized_errors"))
+        print(f"[INFO] Stored {precision} rows for matching: {scanned / 1e6:.1f} MB scanned per face "
+              f"instead of {gallery.embeddings.nbytes / 1e6:.1f} MB")
+    with metrics.stage("save"):
+        save_gallery(gallery, encoding_file)
+        save_manifest(manifest_path, manifest)
     
     print(f"[INFO] Encoded faces saved to {encoding_file}")
-    return len(known_names)
\ No newline at end of file
+    
+    if index == "ivf" and gallery.count > 0:
+        print("[INFO] Building IVF index...")
+        ivf = IVFIndex.build(gallery.embeddings, nlist=nlist)
+        ivf.gallery_created = gallery.meta["created"]
+        save_index(ivf, get_index_path(encoding_file))
+        print(f"[INFO] IVF index with {ivf.nlist} lists saved to {get_index_path(encoding_file)}")
+        report_recall(gallery.embeddings, ivf)
+    
+    metrics.close()
+    return gallery.count
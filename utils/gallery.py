@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Memory-mappable columnar gallery format for face encodings.
+A gallery file stores one contiguous float32 embedding matrix, an int32
+label id per row and a separate table of person names, behind a small
+JSON header carrying the format version and embedding dimension. Sections
+are aligned so they can be memory-mapped directly, which makes loading
+close to O(1) and lets every process share the same pages.
+
+File layout:
+    8 bytes   magic (b"FRGALLRY")
+    4 bytes   little-endian uint32 header length
+    N bytes   UTF-8 JSON header
+    ...       64-byte aligned sections described by the header
+"""
+import json
+import os
+import pickle
+import struct
+import time
+
+import numpy as np
+
+GALLERY_MAGIC = b"FRGALLRY"
+GALLERY_VERSION = 1
+SECTION_ALIGNMENT = 64
+EMBEDDING_DIM = 128
+
+class Gallery:
+    """
+    In-memory view of a face gallery.
+
+    Attributes:
+        embeddings (np.ndarray): (count, dim) float32 embedding matrix
+        labels (np.ndarray): (count,) int32 label id for every row
+        names (list): Person name for every label id
+        sections (dict): Optional extra arrays stored alongside the gallery
+        meta (dict): Header metadata (version, dim, count, created)
+        path (str or None): File the gallery was loaded from
+    """
+
+    def __init__(self, embeddings, labels, names, sections=None, meta=None, path=None):
+        self.embeddings = embeddings
+        self.labels = labels
+        self.names = list(names)
+        self.sections = dict(sections or {})
+        self.meta = dict(meta or {})
+        self.path = path
+
+    @classmethod
+    def from_encodings(cls, encodings, row_names):
+        """
+        Build a gallery from a list of encodings and a parallel list of names.
+
+        Args:
+            encodings (list): Face encodings, one per row
+            row_names (list): Person name for every encoding
+
+        Returns:
+            Gallery: The assembled gallery
+        """
+        names = []
+        label_ids = {}
+        labels = np.empty(len(row_names), dtype=np.int32)
+        for i, name in enumerate(row_names):
+            if name not in label_ids:
+                label_ids[name] = len(names)
+                names.append(name)
+            labels[i] = label_ids[name]
+
+        if len(encodings):
+            embeddings = np.ascontiguousarray(np.vstack(encodings), dtype=np.float32)
+        else:
+            embeddings = np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+
+        return cls(embeddings, labels, names)
+
+    @property
+    def count(self):
+        """int: Number of embeddings in the gallery."""
+        return int(self.embeddings.shape[0])
+
+    @property
+    def dim(self):
+        """int: Embedding dimension."""
+        return int(self.embeddings.shape[1])
+
+    def name_of(self, row):
+        """
+        Return the person name for a gallery row.
+
+        Args:
+            row (int): Row index into the embedding matrix
+
+        Returns:
+            str: Person name
+        """
+        return self.names[self.labels[row]]
+
+    def row_names(self):
+        """
+        Expand label ids into one name per row.
+
+        Returns:
+            list: Person name for every embedding
+        """
+        return [self.names[label] for label in self.labels]
+
+def _align(offset):
+    """Round an offset up to the next section boundary."""
+    return (offset + SECTION_ALIGNMENT - 1) // SECTION_ALIGNMENT * SECTION_ALIGNMENT
+
+def file_signature(path):
+    """
+    Identify the current version of a file without reading it.
+
+    A gallery replaced by save_gallery gets a new inode, so a changed
+    signature means readers should reload. For a gallery store this is
+    the signature of its manifest, which every change replaces.
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        tuple or None: (inode, size, mtime) or None if the file does not exist
+    """
+    if os.path.isdir(path):
+        from utils.gallery_store import STORE_MANIFEST
+        path = os.path.join(path, STORE_MANIFEST)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+def is_gallery_file(path):
+    """
+    Check whether a file starts with the gallery magic bytes.
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        bool: True if the file is a gallery file
+    """
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(GALLERY_MAGIC)) == GALLERY_MAGIC
+    except OSError:
+        return False
+
+def save_gallery(gallery, path):
+    """
+    Atomically write a gallery file.
+
+    The file is written next to its destination and renamed into place,
+    so readers never observe a partially written gallery. The gallery's
+    metadata is updated to match what was written.
+
+    Args:
+        gallery (Gallery): Gallery to write
+        path (str): Destination path
+    """
+    arrays = {
+        "embeddings": np.ascontiguousarray(gallery.embeddings, dtype="<f4"),
+        "labels": np.ascontiguousarray(gallery.labels, dtype="<i4"),
+    }
+    for name, array in gallery.sections.items():
+        arrays[name] = np.ascontiguousarray(array)
+    names_blob = json.dumps(gallery.names, ensure_ascii=False).encode("utf-8")
+
+    sections = {}
+    meta = dict(gallery.meta)
+    meta.update({
+        "version": GALLERY_VERSION,
+        "dim": gallery.dim,
+        "count": gallery.count,
+        "created": time.time(),
+    })
+
+    # The header size depends on the section offsets and vice versa, so
+    # reserve generous room for the header before laying out sections.
+    header_room = _align(len(json.dumps(meta)) + 256 * (len(arrays) + 1) + 64)
+    offset = _align(len(GALLERY_MAGIC) + 4 + header_room)
+    for name, array in arrays.items():
+        sections[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        offset = _align(offset + array.nbytes)
+    sections["names"] = {"offset": offset, "length": len(names_blob)}
+    meta["sections"] = sections
+
+    header = json.dumps(meta).encode("utf-8")
+    if len(GALLERY_MAGIC) + 4 + len(header) > sections[next(iter(arrays))]["offset"]:
+        raise ValueError("Gallery header does not fit in the reserved space")
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(GALLERY_MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(sections[name]["offset"])
+            f.write(array.tobytes())
+        f.seek(sections["names"]["offset"])
+        f.write(names_blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    gallery.meta = {key: value for key, value in meta.items() if key != "sections"}
+    gallery.path = path
+
+def read_gallery_header(path):
+    """
+    Read only the header of a gallery file.
+
+    Args:
+        path (str): Path to the gallery file
+
+    Returns:
+        dict: Header metadata
+    """
+    with open(path, "rb") as f:
+        if f.read(len(GALLERY_MAGIC)) != GALLERY_MAGIC:
+            raise ValueError(f"{path} is not a gallery file")
+        (header_len,) = struct.unpack("<I", f.read(4))
+        return json.loads(f.read(header_len).decode("utf-8"))
+
+def load_gallery(path, mmap=True):
+    """
+    Load a gallery file, memory-mapping its arrays.
+
+    Legacy ``encodings.pickle`` files are still accepted and converted in
+    memory; run the converter once to get the fast loading path. A gallery
+    store directory is loaded as the merge of its live segments.
+
+    Args:
+        path (str): Path to the gallery file
+        mmap (bool): Memory-map the arrays instead of reading them into memory
+
+    Returns:
+        Gallery: The loaded gallery (empty if the file is missing or invalid)
+    """
+    if not os.path.exists(path):
+        print(f"[ERROR] Gallery file {path} not found.")
+        return Gallery.from_encodings([], [])
+
+    if os.path.isdir(path):
+        from utils.gallery_store import GalleryStore, is_gallery_store
+        if not is_gallery_store(path):
+            print(f"[ERROR] {path} is a directory but not a gallery store.")
+            return Gallery.from_encodings([], [])
+        return GalleryStore(path).load()
+
+    if not is_gallery_file(path):
+        print(f"[WARNING] {path} is not a gallery file, loading it as a legacy pickle.")
+        print("[INFO] Convert it once with 'python scripts/convert.py' for faster loading.")
+        try:
+            data = load_legacy_encodings(path)
+            return Gallery.from_encodings(data["encodings"], data["names"])
+        except Exception as e:
+            print(f"[ERROR] Failed to load encodings {path}: {e}")
+            return Gallery.from_encodings([], [])
+
+    try:
+        meta = read_gallery_header(path)
+        if meta.get("version", 0) > GALLERY_VERSION:
+            raise ValueError(f"unsupported gallery version {meta['version']}")
+
+        arrays = {}
+        for name, section in meta["sections"].items():
+            if name == "names":
+                continue
+            shape = tuple(section["shape"])
+            if mmap and int(np.prod(shape)) > 0:
+                arrays[name] = np.memmap(path, dtype=section["dtype"], mode="r",
+                                         offset=section["offset"], shape=shape)
+            else:
+                with open(path, "rb") as f:
+                    f.seek(section["offset"])
+                    count = int(np.prod(shape))
+                    arrays[name] = np.fromfile(f, dtype=section["dtype"], count=count).reshape(shape)
+
+        with open(path, "rb") as f:
+            f.seek(meta["sections"]["names"]["offset"])
+            names = json.loads(f.read(meta["sections"]["names"]["length"]).decode("utf-8"))
+    except Exception as e:
+        print(f"[ERROR] Failed to load gallery {path}: {e}")
+        return Gallery.from_encodings([], [])
+
+    embeddings = arrays.pop("embeddings")
+    labels = arrays.pop("labels")
+    meta = {key: value for key, value in meta.items() if key != "sections"}
+    return Gallery(embeddings, labels, names, sections=arrays, meta=meta, path=path)
+
+def load_legacy_encodings(encoding_file):
+    """
+    Load face encodings from a legacy pickle file.
+
+    Args:
+        encoding_file (str): Path to the pickle file containing encodings
+
+    Returns:
+        dict: Dictionary with 'encodings' and 'names' keys
+    """
+    with open(encoding_file, "rb") as f:
+        return pickle.load(f)
+
+def convert_pickle_to_gallery(pickle_path, gallery_path):
+    """
+    Convert a legacy encodings pickle into a gallery file.
+
+    Args:
+        pickle_path (str): Path to the existing encodings pickle
+        gallery_path (str): Path of the gallery file to write
+
+    Returns:
+        Gallery: The converted gallery
+    """
+    data = load_legacy_encodings(pickle_path)
+    gallery = Gallery.from_encodings(data["encodings"], data["names"])
+    save_gallery(gallery, gallery_path)
+    return gallery
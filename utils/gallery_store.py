@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Append-only gallery store made of immutable segments and tombstones.
+A store is a directory of small gallery files (segments) and a JSON
+manifest listing the live segments and the tombstones. Adding a person
+writes one new segment with only their encodings; removing a person
+writes a tombstone into the manifest. Both cost O(change), however large
+the gallery is. Compaction merges the segments into one and drops the
+rows hidden by tombstones, off the enrollment path.
+
+Every segment and tombstone gets a sequence number from one counter. A
+tombstone hides the rows of its person in all segments older than it,
+so a person who is removed and enrolled again is visible again.
+
+The manifest is the only mutable file and is replaced atomically after
+the segments it lists are on disk, so a crash at any point leaves either
+the old or the new state. Segment files the manifest does not list are
+left-overs of an interrupted write and are removed by the next compaction.
+
+Store layout:
+    MANIFEST.json                    live segments and tombstones
+    segment-<seq>-<random>.gallery   immutable segments
+"""
+import json
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from utils.gallery import EMBEDDING_DIM, Gallery, load_gallery, save_gallery
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are not serialized
+    fcntl = None
+
+STORE_MANIFEST = "MANIFEST.json"
+STORE_VERSION = 1
+
+def is_gallery_store(path):
+    """
+    Check whether a path is a gallery store directory.
+
+    Args:
+        path (str): Path to check
+
+    Returns:
+        bool: True if the path holds a store manifest
+    """
+    return os.path.isfile(os.path.join(path, STORE_MANIFEST))
+
+def _fsync_directory(path):
+    """Make renames in a directory durable (a no-op where unsupported)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _write_json(path, data):
+    """Atomically write a JSON file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class GalleryStore:
+    """
+    A segmented gallery store on disk.
+
+    Usage:
+        store = GalleryStore.create("encodings.store")
+        store.add_person("Jane Doe", encodings)
+        store.remove_person("John Doe")
+        gallery = store.load()
+        store.compact()
+    """
+
+    def __init__(self, path):
+        """
+        Open an existing store.
+
+        Args:
+            path (str): Store directory
+        """
+        if not is_gallery_store(path):
+            raise ValueError(f"{path} is not a gallery store")
+        self.path = path
+
+    @classmethod
+    def create(cls, path, gallery=None):
+        """
+        Create an empty store, optionally starting from a gallery.
+
+        Args:
+            path (str): Store directory (created if missing, must not hold a store)
+            gallery (Gallery, optional): Gallery to import as the first segment
+
+        Returns:
+            GalleryStore: The new store
+        """
+        if is_gallery_store(path):
+            raise ValueError(f"{path} already holds a gallery store")
+        os.makedirs(path, exist_ok=True)
+        manifest = {"version": STORE_VERSION, "next_seq": 1, "segments": [], "tombstones": {}}
+        _write_json(os.path.join(path, STORE_MANIFEST), manifest)
+        store = cls(path)
+        if gallery is not None and gallery.count > 0:
+            with store._locked("LOCK"):
+                manifest = store.read_manifest()
+                manifest["segments"].append(store._write_segment(gallery, manifest))
+                store._commit(manifest)
+        return store
+
+    def read_manifest(self):
+        """
+        Read the current manifest.
+
+        Returns:
+            dict: Manifest with "segments", "tombstones" and "next_seq"
+        """
+        with open(os.path.join(self.path, STORE_MANIFEST)) as f:
+            manifest = json.load(f)
+        if manifest.get("version", 0) > STORE_VERSION:
+            raise ValueError(f"unsupported store version {manifest['version']}")
+        return manifest
+
+    def _commit(self, manifest):
+        """Atomically replace the manifest."""
+        manifest["updated"] = time.time()
+        _write_json(os.path.join(self.path, STORE_MANIFEST), manifest)
+        _fsync_directory(self.path)
+
+    @contextmanager
+    def _locked(self, name, blocking=True):
+        """
+        Hold a lock file in the store.
+
+        "LOCK" serializes manifest updates; "COMPACT.lock" allows one
+        compaction at a time without blocking enrollment.
+
+        Yields:
+            bool: True if the lock is held (always True when blocking)
+        """
+        if fcntl is None:
+            yield True
+            return
+        with open(os.path.join(self.path, name), "a") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _write_segment(self, gallery, manifest, seq=None):
+        """
+        Write a gallery as a new immutable segment.
+
+        Args:
+            gallery (Gallery): Rows of the segment
+            manifest (dict): Manifest to take the sequence number from
+            seq (int, optional): Sequence number (default the next one)
+
+        Returns:
+            dict: Manifest entry of the segment
+        """
+        if seq is None:
+            seq = manifest["next_seq"]
+            manifest["next_seq"] += 1
+        file_name = f"segment-{seq:08d}-{os.urandom(4).hex()}.gallery"
+        save_gallery(gallery, os.path.join(self.path, file_name))
+        counts = np.bincount(np.asarray(gallery.labels), minlength=len(gallery.names))
+        return {
+            "file": file_name,
+            "seq": seq,
+            "count": gallery.count,
+            "people": {name: int(count) for name, count in zip(gallery.names, counts) if count},
+        }
+
+    def add_person(self, name, encodings, replace=False):
+        """
+        Enroll a person by writing a segment with their encodings.
+
+        Args:
+            name (str): Person name
+            encodings (array-like): (count, dim) face encodings
+            replace (bool): Hide the person's earlier encodings
+
+        Returns:
+            dict: Manifest entry of the new segment
+        """
+        gallery = Gallery.from_encodings(list(np.asarray(encodings, dtype=np.float32)), [name] * len(encodings))
+        with self._locked("LOCK"):
+            manifest = self.read_manifest()
+            if replace:
+                manifest["tombstones"][name] = manifest["next_seq"]
+                manifest["next_seq"] += 1
+            entry = self._write_segment(gallery, manifest)
+            manifest["segments"].append(entry)
+            self._commit(manifest)
+        return entry
+
+    def remove_person(self, name):
+        """
+        Remove a person by writing a tombstone.
+
+        Args:
+            name (str): Person name
+
+        Returns:
+            int: Number of encodings hidden (0 if the person is not enrolled)
+        """
+        with self._locked("LOCK"):
+            manifest = self.read_manifest()
+            hidden = self.people(manifest).get(name, 0)
+            if hidden:
+                manifest["tombstones"][name] = manifest["next_seq"]
+                manifest["next_seq"] += 1
+                self._commit(manifest)
+        return hidden
+
+    def people(self, manifest=None):
+        """
+        Count the live encodings per person from the manifest alone.
+
+        Args:
+            manifest (dict, optional): Manifest to use (default the current one)
+
+        Returns:
+            dict: Person name to number of live encodings
+        """
+        manifest = manifest or self.read_manifest()
+        tombstones = manifest["tombstones"]
+        people = {}
+        for entry in manifest["segments"]:
+            for name, count in entry["people"].items():
+                if tombstones.get(name, 0) <= entry["seq"]:
+                    people[name] = people.get(name, 0) + count
+        return people
+
+    def stats(self, manifest=None):
+        """
+        Summarize the store.
+
+        Args:
+            manifest (dict, optional): Manifest to use (default the current one)
+
+        Returns:
+            dict: Segment, tombstone, row and live row counts
+        """
+        manifest = manifest or self.read_manifest()
+        rows = sum(entry["count"] for entry in manifest["segments"])
+        live = sum(self.people(manifest).values())
+        return {
+            "segments": len(manifest["segments"]),
+            "tombstones": len(manifest["tombstones"]),
+            "rows": rows,
+            "live_rows": live,
+            "dead_rows": rows - live,
+        }
+
+    def load(self):
+        """
+        Load the live rows of every segment into one gallery.
+
+        Returns:
+            Gallery: The store's gallery, with tombstoned rows left out
+        """
+        for _ in range(3):
+            manifest = self.read_manifest()
+            gallery = self._load(manifest)
+            # A compaction may have replaced segments while they were read
+            if self.read_manifest()["segments"] == manifest["segments"]:
+                break
+        return gallery
+
+    def _load(self, manifest):
+        """Merge the segments listed in a manifest, applying its tombstones."""
+        tombstones = manifest["tombstones"]
+        names = []
+        label_ids = {}
+        embeddings, labels, weights = [], [], []
+        weighted = False
+        for entry in manifest["segments"]:
+            segment = load_gallery(os.path.join(self.path, entry["file"]))
+            if segment.count == 0:
+                continue
+            hidden = [i for i, name in enumerate(segment.names) if tombstones.get(name, 0) > entry["seq"]]
+            keep = ~np.isin(segment.labels, hidden) if hidden else np.ones(segment.count, dtype=bool)
+            # Only people with live rows get a label id
+            live = np.bincount(np.asarray(segment.labels)[keep], minlength=len(segment.names))
+            remap = np.array([label_ids.setdefault(name, len(label_ids)) if count else -1
+                              for name, count in zip(segment.names, live)], dtype=np.int32)
+            embeddings.append(np.asarray(segment.embeddings, dtype=np.float32)[keep])
+            labels.append(remap[np.asarray(segment.labels)[keep]])
+            segment_weights = segment.sections.get("weights")
+            weighted = weighted or segment_weights is not None
+            weights.append(np.ones(segment.count, dtype=np.int32)[keep] if segment_weights is None
+                           else np.asarray(segment_weights, dtype=np.int32)[keep])
+        names = list(label_ids)
+
+        if embeddings:
+            embeddings = np.ascontiguousarray(np.concatenate(embeddings))
+            labels = np.concatenate(labels).astype(np.int32)
+        else:
+            embeddings = np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+            labels = np.empty(0, dtype=np.int32)
+        sections = {"weights": np.concatenate(weights).astype("<i4")} if weighted else {}
+        meta = {"created": manifest.get("updated", 0.0), "segments": len(manifest["segments"])}
+        return Gallery(embeddings, labels, names, sections=sections, meta=meta, path=self.path)
+
+    def compact(self):
+        """
+        Merge all segments into one and drop tombstoned rows.
+
+        The merged segment is written without holding up enrollment;
+        segments and tombstones added meanwhile are kept. Unlisted segment
+        files are removed afterwards.
+
+        Returns:
+            dict or None: Stats before and after, or None if another
+                compaction is running or there is nothing to do
+        """
+        with self._locked("COMPACT.lock", blocking=False) as acquired:
+            if not acquired:
+                return None
+            manifest = self.read_manifest()
+            before = self.stats(manifest)
+            if before["segments"] <= 1 and before["dead_rows"] == 0:
+                with self._locked("LOCK"):
+                    self._remove_unlisted(self.read_manifest())
+                return None
+
+            merged = self._load(manifest)
+            # The merged rows are at least as new as every segment they came
+            # from, and older than anything enrolled meanwhile
+            seq = max(entry["seq"] for entry in manifest["segments"])
+            entry = self._write_segment(merged, manifest, seq=seq) if merged.count else None
+
+            with self._locked("LOCK"):
+                current = self.read_manifest()
+                compacted = {segment["file"] for segment in manifest["segments"]}
+                current["segments"] = ([entry] if entry else []) + [
+                    segment for segment in current["segments"] if segment["file"] not in compacted]
+                # Tombstones from before the compaction are applied to the
+                # merged rows; ones written meanwhile may still hide some
+                current["tombstones"] = {name: tomb for name, tomb in current["tombstones"].items()
+                                         if tomb >= manifest["next_seq"]}
+                self._commit(current)
+                self._remove_unlisted(current)
+            return {"before": before, "after": self.stats(current)}
+
+    def _remove_unlisted(self, manifest):
+        """Delete segment files the manifest does not list (holding LOCK)."""
+        listed = {entry["file"] for entry in manifest["segments"]}
+        for file_name in os.listdir(self.path):
+            if file_name.startswith("segment-") and file_name not in listed:
+                try:
+                    # Readers that mapped the file keep their copy
+                    os.unlink(os.path.join(self.path, file_name))
+                except OSError:
+                    pass
+
+class StoreCompactor:
+    """
+    Compacts a store in the background once it has too many segments or
+    too many dead rows.
+
+    Usage:
+        compactor = StoreCompactor(GalleryStore("encodings.store")).start()
+        ...
+        compactor.stop()
+    """
+
+    def __init__(self, store, interval=30.0, max_segments=8, max_dead_ratio=0.2):
+        """
+        Args:
+            store (GalleryStore): Store to compact
+            interval (float): Seconds between checks of the manifest
+            max_segments (int): Compact when the store has more segments
+            max_dead_ratio (float): Compact when this fraction of rows is tombstoned
+        """
+        self.store = store
+        self.interval = interval
+        self.max_segments = max_segments
+        self.max_dead_ratio = max_dead_ratio
+        self.compactions = 0
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+
+    def needs_compaction(self, stats=None):
+        """
+        Check the thresholds.
+
+        Args:
+            stats (dict, optional): Store stats (default the current ones)
+
+        Returns:
+            bool: True if the store should be compacted
+        """
+        stats = stats or self.store.stats()
+        return (stats["segments"] > self.max_segments
+                or (stats["rows"] > 0 and stats["dead_rows"] / float(stats["rows"]) > self.max_dead_ratio))
+
+    def start(self):
+        """
+        Start the compaction thread.
+
+        Returns:
+            StoreCompactor: self, for chaining
+        """
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._watch, name="store-compactor", daemon=True)
+            self._thread.start()
+        return self
+
+    def _watch(self):
+        while self._running:
+            try:
+                if self.needs_compaction():
+                    result = self.store.compact()
+                    if result is not None:
+                        self.compactions += 1
+                        before, after = result["before"], result["after"]
+                        print(f"[INFO] Compacted {before['segments']} segments ({before['rows']} rows) "
+                              f"into {after['segments']} ({after['rows']} rows).")
+            except Exception as e:
+                print(f"[WARNING] Compaction of {self.store.path} failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def stop(self):
+        """Stop the compaction thread."""
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
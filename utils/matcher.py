@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Vectorized face matching against a gallery.
+The matcher is built once at startup: it keeps the gallery as one
+contiguous float32 matrix with precomputed squared norms and label ids,
+and scores every face found in a frame against the whole gallery with a
+single matrix multiplication instead of one compare_faces call per face.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from utils.quantize import (QUANTIZED_DIM_SECTIONS, QUANTIZED_ROW_SECTIONS, QuantizedScan, quantize_embeddings,
+                            quantized_precision)
+
+UNKNOWN_NAME = "Unknown"
+
+# Rows whose scanned distance is this close to the tolerance (or to the
+# closest row) are recomputed in float64 before voting; it is far larger
+# than the float32 rounding of any scan
+REFINE_MARGIN = 1e-3
+
+Match = namedtuple("Match", ["name", "distance", "votes"])
+Match.__doc__ = """
+Result of matching one face.
+
+Attributes:
+    name (str): Best identity, or "Unknown" if nothing is within tolerance
+    distance (float): Closest distance to the chosen identity (or to any
+        gallery row when the face is unknown)
+    votes (dict): Number of gallery rows (or prototype weights) within
+        tolerance per identity
+"""
+
+class FaceMatcher:
+    """
+    Batched nearest-neighbour voting matcher.
+
+    A face is recognized as the identity with the most gallery rows within
+    ``tolerance`` (Euclidean distance), which is what the attendance loop
+    used to compute with compare_faces and a vote dictionary. Ties are
+    broken by the closest distance.
+
+    Prototype galleries carry a "weights" section; each prototype then
+    casts as many votes as the embeddings it replaced.
+
+    With an IVF index, only the rows in the nprobe lists closest to a face
+    are scanned; every one of them within tolerance votes, so a face gets
+    the same Match as from an exhaustive scan unless some of its rows are
+    in lists that were not probed.
+
+    Without one, a gallery quantized to float16 or int8 is scanned in that
+    precision, and only the rows whose error bounds reach the tolerance (or
+    the closest row) are re-ranked with exact distances.
+
+    However the rows were scanned, the distances that decide the Match
+    (rows within tolerance and the closest row) are recomputed in float64
+    before voting. The float32 scan, the re-ranking and the shards round
+    differently, so without this a row at the tolerance could vote in one
+    and not in another; with it every scan returns the same Match.
+    """
+
+    def __init__(self, gallery, tolerance=0.5, index=None, nprobe=8, top_k=None, precision=None):
+        """
+        Build the matcher.
+
+        Args:
+            gallery (Gallery): Gallery to match against
+            tolerance (float): Maximum distance for a gallery row to vote
+            index (IVFIndex, optional): ANN index for the gallery
+            nprobe (int): Inverted lists scanned per face (0 disables the index)
+            top_k (int, optional): Only let the top_k nearest candidates of the
+                index vote (default: every candidate within tolerance)
+            precision (str, optional): Scan precision, "float32", "float16" or
+                "int8" (default: the gallery's quantized rows if it has any)
+        """
+        # Memory-mapped float32/int32 sections are used as they are, so
+        # processes attached to a shared gallery do not copy it.
+        self.embeddings = np.ascontiguousarray(gallery.embeddings, dtype=np.float32)
+        sections = gallery.sections
+        if precision is None:
+            precision = quantized_precision(sections) or "float32"
+        if precision != "float32" and quantized_precision(sections) != precision:
+            sections = dict(sections, **quantize_embeddings(self.embeddings, precision))
+        self.precision = precision
+        self.scan = None if precision == "float32" else QuantizedScan(sections)
+
+        norms = gallery.sections.get("norms")
+        if norms is not None and len(norms) == len(self.embeddings):
+            self.norms = np.asarray(norms, dtype=np.float32)
+        elif self.scan is None:
+            self.norms = np.einsum("ij,ij->i", self.embeddings, self.embeddings)
+        else:
+            # Only the re-ranked rows are read at full precision
+            self.norms = None
+        self.labels = np.ascontiguousarray(gallery.labels, dtype=np.int32)
+        self.names = list(gallery.names)
+        weights = gallery.sections.get("weights")
+        self.weights = None if weights is None else np.asarray(weights)
+        self.tolerance = tolerance
+        self.index = index if nprobe > 0 else None
+        self.nprobe = nprobe
+        self.top_k = top_k
+
+    @property
+    def count(self):
+        """int: Number of gallery rows."""
+        return int(self.embeddings.shape[0])
+
+    def distances(self, encodings):
+        """
+        Compute Euclidean distances from faces to every gallery row.
+
+        Args:
+            encodings (array-like): (faces, dim) face encodings
+
+        Returns:
+            np.ndarray: (faces, count) float32 distance matrix
+        """
+        queries = np.asarray(encodings, dtype=np.float32).reshape(-1, self.embeddings.shape[1])
+        query_norms = np.einsum("ij,ij->i", queries, queries)
+        norms = self.norms
+        if norms is None:
+            norms = np.einsum("ij,ij->i", self.embeddings, self.embeddings)
+        # (count, dim) @ (dim, faces) streams the gallery once, which is
+        # faster than the transposed product for a handful of faces.
+        squared = (self.embeddings @ queries.T).T
+        squared *= -2.0
+        squared += norms[None, :]
+        squared += query_norms[:, None]
+        np.maximum(squared, 0.0, out=squared)
+        return np.sqrt(squared, out=squared)
+
+    def match(self, encodings):
+        """
+        Match every face in a frame against the gallery in one batch.
+
+        Args:
+            encodings (array-like): (faces, dim) face encodings
+
+        Returns:
+            list: One Match per face, in input order
+        """
+        if len(encodings) == 0:
+            return []
+        if self.count == 0:
+            return [Match(UNKNOWN_NAME, float("inf"), {}) for _ in range(len(encodings))]
+
+        queries = np.asarray(encodings, dtype=np.float32).reshape(-1, self.embeddings.shape[1])
+        if self.index is not None:
+            results = self.index.search(self.embeddings, queries, self.top_k, self.nprobe)
+            return [self._vote(*self._refine(query, distances, rows))
+                    for query, (rows, distances) in zip(queries, results)]
+
+        if self.scan is not None:
+            return self._match_quantized(queries)
+
+        rows = np.arange(self.count)
+        return [self._vote(*self._refine(query, distances, rows))
+                for query, distances in zip(queries, self.distances(queries))]
+
+    def _match_quantized(self, queries):
+        """
+        Scan the quantized rows, then re-rank the candidates exactly.
+
+        Args:
+            queries (np.ndarray): (faces, dim) float32 face encodings
+
+        Returns:
+            list: One Match per face
+        """
+        approx = self.scan.distances(queries)
+        # Rows that may be within tolerance, or may be the closest row
+        limits = np.maximum((approx + self.scan.errors).min(axis=1), self.tolerance)
+        approx -= self.scan.errors
+        candidates_of = approx <= limits[:, None]
+        matches = []
+        for query, candidate_rows in zip(queries, candidates_of):
+            rows = np.flatnonzero(candidate_rows)
+            candidates = self.embeddings[rows]
+            norms = (self.norms[rows] if self.norms is not None
+                     else np.einsum("ij,ij->i", candidates, candidates))
+            squared = candidates @ query
+            squared *= -2.0
+            squared += norms
+            squared += query @ query
+            np.maximum(squared, 0.0, out=squared)
+            matches.append(self._vote(*self._refine(query, np.sqrt(squared, out=squared), rows)))
+        return matches
+
+    def _refine(self, query, distances, rows):
+        """
+        Recompute the distances that decide a Match in float64.
+
+        Args:
+            query (np.ndarray): (dim,) float32 face encoding
+            distances (np.ndarray): Scanned distances to the candidate rows
+            rows (np.ndarray): Gallery row id of every candidate
+
+        Returns:
+            tuple: (float64 distances, rows) of the rows within tolerance
+                or next to the closest one
+        """
+        if len(distances) == 0:
+            return distances, rows
+        limit = max(self.tolerance, float(distances.min())) + REFINE_MARGIN
+        rows = np.asarray(rows)[np.flatnonzero(distances <= limit)]
+        difference = self.embeddings[rows].astype(np.float64) - query.astype(np.float64)
+        return np.sqrt(np.einsum("ij,ij->i", difference, difference)), rows
+
+    def _vote(self, distances, rows):
+        """
+        Turn one face's distances to candidate rows into a Match.
+
+        Args:
+            distances (np.ndarray): Distances to the candidate rows
+            rows (np.ndarray): Gallery row id of every candidate
+
+        Returns:
+            Match: The voting result
+        """
+        within = distances <= self.tolerance
+        if not within.any():
+            closest = float(distances.min()) if len(distances) else float("inf")
+            return Match(UNKNOWN_NAME, closest, {})
+
+        matched_rows = rows[within]
+        matched_labels = self.labels[matched_rows]
+        matched_distances = distances[within]
+        matched_weights = None if self.weights is None else self.weights[matched_rows]
+        votes = np.bincount(matched_labels, weights=matched_weights, minlength=len(self.names))
+
+        # Ties on votes are broken by the closest distance.
+        top = np.flatnonzero(votes == votes.max())
+        closest = [float(matched_distances[matched_labels == i].min()) for i in top]
+        best = int(np.argmin(closest))
+        vote_counts = {self.names[i]: int(votes[i]) for i in np.flatnonzero(votes)}
+        return Match(self.names[int(top[best])], closest[best], vote_counts)
+
+def shard_bounds(labels, shards):
+    """
+    Split gallery rows into contiguous shards at label boundaries.
+
+    Args:
+        labels (np.ndarray): (count,) label ids, grouped so that the rows of
+            a person are contiguous
+        shards (int): Desired number of shards
+
+    Returns:
+        list: (start, stop) row ranges, at most one per person
+    """
+    count = len(labels)
+    # Row indices where a new person starts; shards may only begin there
+    starts = np.flatnonzero(np.diff(labels)) + 1
+    bounds = [0]
+    for i in range(1, shards):
+        position = np.searchsorted(starts, count * i // shards)
+        if position < len(starts) and starts[position] > bounds[-1]:
+            bounds.append(int(starts[position]))
+    bounds.append(count)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+class ShardedMatcher:
+    """
+    Scatter-gather matcher over a gallery split into shards by person.
+
+    Every person's rows live in exactly one shard, so a shard can count
+    all of that person's votes on its own. Shards are scored in parallel
+    on a thread pool (the distance computation runs in NumPy/BLAS, which
+    releases the GIL), and each face's per-shard winners are merged with
+    the same rule FaceMatcher uses: most votes, then the closest distance,
+    then the lowest label id. The result is identical to one FaceMatcher
+    over the whole gallery.
+
+    Sharding applies to exhaustive matching; the shards are zero-copy
+    views when the rows of each person are contiguous, as written by the
+    encode command.
+    """
+
+    def __init__(self, gallery, tolerance=0.5, shards=2, precision=None):
+        """
+        Build the shard matchers.
+
+        Args:
+            gallery (Gallery): Gallery to match against
+            tolerance (float): Maximum distance for a gallery row to vote
+            shards (int): Number of shards (capped at the number of people)
+            precision (str, optional): Scan precision of every shard, as for FaceMatcher
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from utils.gallery import Gallery
+
+        embeddings = gallery.embeddings
+        labels = np.asarray(gallery.labels)
+        # The per-row sections FaceMatcher uses
+        row_sections = ("norms", "weights") + QUANTIZED_ROW_SECTIONS
+        sections = {name: gallery.sections[name] for name in row_sections if name in gallery.sections}
+        dim_sections = {name: gallery.sections[name] for name in QUANTIZED_DIM_SECTIONS if name in gallery.sections}
+        if len(labels) > 1 and np.any(np.diff(labels) < 0):
+            # Group each person's rows together once; only the order changes
+            order = np.argsort(labels, kind="stable")
+            embeddings = embeddings[order]
+            labels = labels[order]
+            sections = {name: array[order] for name, array in sections.items()}
+
+        self.names = list(gallery.names)
+        self.tolerance = tolerance
+        self.index = None
+        self.label_ids = {name: i for i, name in enumerate(self.names)}
+        self.shards = []
+        for start, stop in shard_bounds(labels, max(1, shards)):
+            shard_sections = {name: array[start:stop] for name, array in sections.items()}
+            shard_sections.update(dim_sections)
+            shard = Gallery(embeddings[start:stop], labels[start:stop], self.names, sections=shard_sections)
+            self.shards.append(FaceMatcher(shard, tolerance=tolerance, nprobe=0, precision=precision))
+        self._count = int(len(labels))
+        self._pool = ThreadPoolExecutor(max_workers=len(self.shards), thread_name_prefix="match-shard")
+
+    @property
+    def count(self):
+        """int: Number of gallery rows."""
+        return self._count
+
+    def match(self, encodings):
+        """
+        Match every face in a frame against all shards in parallel.
+
+        Args:
+            encodings (array-like): (faces, dim) face encodings
+
+        Returns:
+            list: One Match per face, in input order
+        """
+        if len(encodings) == 0:
+            return []
+        encodings = np.asarray(encodings, dtype=np.float32)
+        if len(self.shards) == 1:
+            return self.shards[0].match(encodings)
+
+        futures = [self._pool.submit(shard.match, encodings) for shard in self.shards]
+        per_shard = [future.result() for future in futures]
+        return [self._merge(matches) for matches in zip(*per_shard)]
+
+    def _merge(self, matches):
+        """
+        Merge one face's per-shard Matches into the global Match.
+
+        Args:
+            matches (tuple): One Match per shard
+
+        Returns:
+            Match: The Match a single matcher over the whole gallery returns
+        """
+        votes = {}
+        best = None
+        closest = float("inf")
+        for match in matches:
+            closest = min(closest, match.distance)
+            if match.name == UNKNOWN_NAME:
+                continue
+            votes.update(match.votes)
+            key = (-match.votes[match.name], match.distance, self.label_ids[match.name])
+            if best is None or key < best[0]:
+                best = (key, match)
+        if best is None:
+            return Match(UNKNOWN_NAME, closest, {})
+        return Match(best[1].name, best[1].distance, votes)
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Lightweight instrumentation for the live and batch pipelines.
+Stages are timed with perf_counter into fixed-bucket latency histograms,
+frames, faces per frame and dropped frames are counted, and everything is
+periodically written as JSON lines and as a Prometheus text file. Recording
+a sample is a bisect and two additions under a lock, so instrumentation can
+stay on in production and be shared by the capture, worker and display
+threads.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+
+# Histogram bucket upper bounds in milliseconds.
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Clear all samples."""
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms):
+        """
+        Record one latency sample.
+
+        Args:
+            ms (float): Latency in milliseconds
+        """
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, q):
+        """
+        Estimate a percentile as the upper bound of the bucket containing it.
+
+        Args:
+            q (float): Percentile between 0 and 100
+
+        Returns:
+            float: Latency in milliseconds (0 if there are no samples)
+        """
+        if self.count == 0:
+            return 0.0
+        target = q / 100.0 * self.count
+        seen = 0
+        for bound, bucket in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += bucket
+            if seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def summary(self):
+        """
+        Summarize the histogram.
+
+        Returns:
+            dict: count, mean, p50, p95 and max in milliseconds
+        """
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "max_ms": round(self.max_ms, 3),
+        }
+
+class _StageTimer:
+    """Context manager that times one run of a stage."""
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+
+class PipelineMetrics:
+    """
+    Per-stage latency, FPS, faces per frame and dropped frame counters.
+
+    Usage:
+        metrics = PipelineMetrics("attendance", dump_dir="metrics")
+        with metrics.stage("detect"):
+            ...
+        metrics.frame_done(faces=len(boxes))
+        metrics.maybe_dump()
+    """
+
+    def __init__(self, pipeline, dump_dir=None, interval=10.0, summary=False):
+        """
+        Set up the metrics.
+
+        Args:
+            pipeline (str): Pipeline name used in file names and labels
+            dump_dir (str, optional): Directory for the JSON lines and Prometheus files
+            interval (float): Seconds between dumps
+            summary (bool): Print a rolling summary at every dump
+        """
+        self.pipeline = pipeline
+        self.dump_dir = dump_dir
+        self.interval = interval
+        self.summary = summary
+
+        self.stages = {}
+        self.window = {}
+        # Reentrant so maybe_dump can hold it while building the snapshot
+        self._lock = threading.RLock()
+        self.frames = 0
+        self.faces = 0
+        self.dropped = 0
+        self.backlog = 0
+        self.skipped = 0
+        self.started = time.monotonic()
+        self._window_start = self.started
+        self._window_frames = 0
+        self._window_faces = 0
+        self._last_dump = self.started
+
+        if dump_dir:
+            os.makedirs(dump_dir, exist_ok=True)
+
+    @property
+    def enabled(self):
+        """bool: True if metrics are written or printed."""
+        return bool(self.dump_dir) or self.summary
+
+    def stage(self, name):
+        """
+        Return a context manager that times a stage.
+
+        Args:
+            name (str): Stage name
+
+        Returns:
+            _StageTimer: Timer to use in a with statement (one per use, so
+                threads can time the same stage at once)
+        """
+        return _StageTimer(self, name)
+
+    def observe(self, name, seconds):
+        """
+        Record a stage latency measured elsewhere.
+
+        Args:
+            name (str): Stage name
+            seconds (float): Latency in seconds
+        """
+        ms = seconds * 1000.0
+        with self._lock:
+            if name not in self.stages:
+                self.stages[name] = LatencyHistogram()
+                self.window[name] = LatencyHistogram()
+            self.stages[name].observe(ms)
+            self.window[name].observe(ms)
+
+    def frame_done(self, faces=0):
+        """
+        Mark the end of one processed frame (or image).
+
+        Args:
+            faces (int): Number of faces found in it
+        """
+        with self._lock:
+            self.frames += 1
+            self.faces += faces
+            self._window_frames += 1
+            self._window_faces += faces
+
+    def set_dropped(self, dropped):
+        """
+        Update the number of frames dropped before processing.
+
+        Args:
+            dropped (int): Total dropped frames so far
+        """
+        self.dropped = dropped
+
+    def set_skipped(self, skipped):
+        """
+        Update the number of frames the motion gate let skip detection.
+
+        Args:
+            skipped (int): Total skipped frames so far
+        """
+        self.skipped = skipped
+
+    def set_backlog(self, backlog):
+        """
+        Update the number of frames waiting behind the one being processed.
+
+        Args:
+            backlog (int): Frames captured since the last processed frame
+        """
+        self.backlog = backlog
+
+    def snapshot(self):
+        """
+        Build a snapshot of the current window.
+
+        Returns:
+            dict: Metrics since the previous dump
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = max(now - self._window_start, 1e-9)
+            return {
+                "time": time.time(),
+                "pipeline": self.pipeline,
+                "uptime_s": round(now - self.started, 3),
+                "frames": self.frames,
+                "fps": round(self._window_frames / elapsed, 2),
+                "faces_per_frame": (round(self._window_faces / self._window_frames, 3)
+                                    if self._window_frames else 0.0),
+                "dropped_frames": self.dropped,
+                "backlog": self.backlog,
+                "skipped_frames": self.skipped,
+                "skip_ratio": round(self.skipped / self.frames, 3) if self.frames else 0.0,
+                "stages": {name: hist.summary() for name, hist in self.window.items()},
+            }
+
+    def prometheus_text(self):
+        """
+        Render all cumulative metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Prometheus text
+        """
+        with self._lock:
+            return self._prometheus_text()
+
+    def _prometheus_text(self):
+        label = f'pipeline="{self.pipeline}"'
+        lines = ["# TYPE facerec_stage_latency_seconds histogram"]
+        for name, hist in self.stages.items():
+            stage_label = f'{label},stage="{name}"'
+            cumulative = 0
+            for bound, bucket in zip(LATENCY_BUCKETS_MS, hist.buckets):
+                cumulative += bucket
+                lines.append(f'facerec_stage_latency_seconds_bucket{{{stage_label},le="{bound / 1000.0:g}"}} {cumulative}')
+            lines.append(f'facerec_stage_latency_seconds_bucket{{{stage_label},le="+Inf"}} {hist.count}')
+            lines.append(f"facerec_stage_latency_seconds_sum{{{stage_label}}} {hist.total_ms / 1000.0:.6f}")
+            lines.append(f"facerec_stage_latency_seconds_count{{{stage_label}}} {hist.count}")
+
+        snapshot = self.snapshot()
+        lines += [
+            "# TYPE facerec_frames_total counter",
+            f"facerec_frames_total{{{label}}} {self.frames}",
+            "# TYPE facerec_faces_total counter",
+            f"facerec_faces_total{{{label}}} {self.faces}",
+            "# TYPE facerec_dropped_frames_total counter",
+            f"facerec_dropped_frames_total{{{label}}} {self.dropped}",
+            "# TYPE facerec_skipped_frames_total counter",
+            f"facerec_skipped_frames_total{{{label}}} {self.skipped}",
+            "# TYPE facerec_backlog_frames gauge",
+            f"facerec_backlog_frames{{{label}}} {self.backlog}",
+            "# TYPE facerec_fps gauge",
+            f"facerec_fps{{{label}}} {snapshot['fps']}",
+            "# TYPE facerec_faces_per_frame gauge",
+            f"facerec_faces_per_frame{{{label}}} {snapshot['faces_per_frame']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def maybe_dump(self, force=False):
+        """
+        Write and print metrics if the dump interval has elapsed.
+
+        Args:
+            force (bool): Dump even if the interval has not elapsed
+
+        Returns:
+            dict or None: The snapshot that was dumped
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not self.enabled or (not force and now - self._last_dump < self.interval):
+                return None
+            self._last_dump = now
+
+            # Take the snapshot and start the next window atomically; the
+            # files are written after other threads can record again
+            snapshot = self.snapshot()
+            prometheus = self.prometheus_text() if self.dump_dir else None
+            for hist in self.window.values():
+                hist.reset()
+            self._window_start = now
+            self._window_frames = 0
+            self._window_faces = 0
+
+        if self.dump_dir:
+            with open(os.path.join(self.dump_dir, f"{self.pipeline}_metrics.jsonl"), "a") as f:
+                f.write(json.dumps(snapshot) + "\n")
+            prom_path = os.path.join(self.dump_dir, f"{self.pipeline}_metrics.prom")
+            with open(prom_path + ".tmp", "w") as f:
+                f.write(prometheus)
+            os.replace(prom_path + ".tmp", prom_path)
+
+        if self.summary:
+            print(format_summary(snapshot))
+        return snapshot
+
+    def close(self):
+        """Write the final metrics."""
+        self.maybe_dump(force=True)
+
+def format_summary(snapshot):
+    """
+    Format a metrics snapshot as a one-line rolling summary.
+
+    Args:
+        snapshot (dict): Snapshot from PipelineMetrics.snapshot
+
+    Returns:
+        str: Human readable summary
+    """
+    stages = ", ".join(f"{name} {s['mean_ms']:.1f}/{s['p95_ms']:.1f}ms"
+                       for name, s in snapshot["stages"].items())
+    return (f"[METRICS] {snapshot['pipeline']}: {snapshot['fps']:.1f} fps, "
+            f"{snapshot['faces_per_frame']:.2f} faces/frame, {snapshot['dropped_frames']} dropped, "
+            f"{snapshot['skip_ratio']:.0%} skipped | "
+            f"mean/p95 {stages}")
+
+def add_metrics_arguments(parser):
+    """
+    Add the shared instrumentation options to an argument parser.
+
+    Args:
+        parser (argparse.ArgumentParser): Parser to extend
+    """
+    parser.add_argument("--metrics-dir", type=str,
+                        help="Directory to write metrics JSON lines and Prometheus text files to")
+    parser.add_argument("--metrics-interval", type=float, default=10.0,
+                        help="Seconds between metrics dumps")
+    parser.add_argument("--metrics-summary", action="store_true",
+                        help="Print a rolling metrics summary")
+
+def metrics_from_args(pipeline, args):
+    """
+    Build PipelineMetrics from parsed instrumentation options.
+
+    Args:
+        pipeline (str): Pipeline name
+        args (argparse.Namespace): Parsed arguments from add_metrics_arguments
+
+    Returns:
+        PipelineMetrics: The metrics recorder
+    """
+    return PipelineMetrics(pipeline, dump_dir=args.metrics_dir, interval=args.metrics_interval,
+                           summary=args.metrics_summary)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Motion gating for the live loops.
+Face detection is by far the most expensive stage, and most of the day
+the cameras look at an empty, static scene. The gate compares a heavily
+downscaled, blurred grayscale copy of every frame with the last frame
+that was processed, and only lets a frame through to detection when
+enough pixels changed or when a forced re-check is due.
+"""
+import cv2
+import numpy as np
+
+class MotionGate:
+    """
+    Frame differencing change detector.
+
+    Usage:
+        gate = MotionGate(min_area=0.002, recheck_interval=30)
+        if gate.should_process(frame):
+            ... detect, encode, match ...
+        else:
+            ... reuse the previous results ...
+    """
+
+    def __init__(self, min_area=0.002, pixel_threshold=25, recheck_interval=30, width=96):
+        """
+        Configure the gate.
+
+        Args:
+            min_area (float): Fraction of pixels that must change for a frame
+                to count as motion (lower is more sensitive, 0 disables gating)
+            pixel_threshold (int): Grayscale difference for a pixel to count as changed
+            recheck_interval (int): Maximum frames skipped in a row before a
+                frame is processed anyway (0 never forces one)
+            width (int): Width of the downscaled comparison frame
+        """
+        self.min_area = min_area
+        self.pixel_threshold = pixel_threshold
+        self.recheck_interval = recheck_interval
+        self.width = width
+        self.reference = None
+        self.checked = 0
+        self.skipped = 0
+        self._skipped_in_row = 0
+
+    @property
+    def enabled(self):
+        """bool: False if every frame is processed."""
+        return self.min_area > 0
+
+    @property
+    def skip_ratio(self):
+        """float: Fraction of frames skipped so far."""
+        return self.skipped / self.checked if self.checked else 0.0
+
+    def _thumbnail(self, frame):
+        """Downscaled, blurred grayscale copy of a frame."""
+        h, w = frame.shape[:2]
+        height = max(1, int(round(h * self.width / float(w))))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_LINEAR)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def motion(self, frame):
+        """
+        Measure how much of the frame changed since the last processed frame.
+
+        Args:
+            frame (np.ndarray): BGR frame
+
+        Returns:
+            tuple: (fraction of changed pixels, 1.0 if there is no reference
+                   yet; the thumbnail of the frame)
+        """
+        thumbnail = self._thumbnail(frame)
+        if self.reference is None or self.reference.shape != thumbnail.shape:
+            return 1.0, thumbnail
+        changed = cv2.absdiff(thumbnail, self.reference) > self.pixel_threshold
+        return float(np.count_nonzero(changed)) / changed.size, thumbnail
+
+    def invalidate(self):
+        """Drop the reference frame so the next frame is processed."""
+        self.reference = None
+
+    def should_process(self, frame):
+        """
+        Decide whether a frame needs detection.
+
+        Args:
+            frame (np.ndarray): BGR frame
+
+        Returns:
+            bool: True if the frame changed enough or a re-check is due
+        """
+        self.checked += 1
+        if not self.enabled:
+            return True
+
+        changed, thumbnail = self.motion(frame)
+        recheck = self.recheck_interval and self._skipped_in_row >= self.recheck_interval
+        if changed >= self.min_area or recheck:
+            # Later frames are compared with the frame that was processed, so
+            # slow changes add up until they trigger detection.
+            self.reference = thumbnail
+            self._skipped_in_row = 0
+            return True
+
+        self.skipped += 1
+        self._skipped_in_row += 1
+        return False
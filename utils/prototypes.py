@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Per-identity prototype compression of a gallery.
+Collecting faces saves many near-identical frames, so one person can end
+up with a hundred almost duplicate embeddings. This module reduces each
+person's embeddings to a few prototypes: the mean when every embedding is
+close to it, otherwise k-medoids with the smallest k whose clusters all
+fit within a maximum radius. Each prototype carries a weight equal to the
+number of embeddings it stands for, so voting keeps the same scale.
+"""
+import numpy as np
+
+from utils.gallery import Gallery
+from utils.matcher import FaceMatcher
+
+def _pairwise_distances(points):
+    """Euclidean distance matrix between all points."""
+    norms = np.einsum("ij,ij->i", points, points)
+    squared = norms[:, None] + norms[None, :] - 2.0 * (points @ points.T)
+    np.maximum(squared, 0.0, out=squared)
+    return np.sqrt(squared)
+
+def _kmedoids(points, distances, k, iterations=20):
+    """
+    Cluster points around k medoids.
+
+    Args:
+        points (np.ndarray): (n, dim) points
+        distances (np.ndarray): (n, n) pairwise distances
+        k (int): Number of medoids
+        iterations (int): Maximum number of refinement rounds
+
+    Returns:
+        tuple: (list of medoid indices, cluster assignment per point)
+    """
+    # Deterministic farthest-point initialisation, starting near the mean.
+    medoids = [int(np.argmin(np.linalg.norm(points - points.mean(axis=0), axis=1)))]
+    while len(medoids) < k:
+        medoids.append(int(np.argmax(distances[:, medoids].min(axis=1))))
+
+    for _ in range(iterations):
+        assignment = np.argmin(distances[:, medoids], axis=1)
+        updated = []
+        for cluster in range(k):
+            members = np.flatnonzero(assignment == cluster)
+            within = distances[np.ix_(members, members)].sum(axis=1)
+            updated.append(int(members[np.argmin(within)]))
+        if updated == medoids:
+            break
+        medoids = updated
+
+    return medoids, np.argmin(distances[:, medoids], axis=1)
+
+def compress_identity(embeddings, max_radius=0.3, max_prototypes=8):
+    """
+    Reduce one person's embeddings to a small set of weighted prototypes.
+
+    Args:
+        embeddings (np.ndarray): (n, dim) embeddings of one person
+        max_radius (float): Maximum distance from an embedding to its prototype
+        max_prototypes (int): Upper bound on the number of prototypes
+
+    Returns:
+        tuple: ((m, dim) float32 prototypes, (m,) int32 weights)
+    """
+    points = np.asarray(embeddings, dtype=np.float32)
+    count = len(points)
+
+    mean = points.mean(axis=0)
+    if max_prototypes <= 1 or np.linalg.norm(points - mean, axis=1).max() <= max_radius:
+        return mean[None, :], np.array([count], dtype=np.int32)
+
+    distances = _pairwise_distances(points)
+    for k in range(2, min(max_prototypes, count) + 1):
+        medoids, assignment = _kmedoids(points, distances, k)
+        radius = distances[np.arange(count), np.asarray(medoids)[assignment]].max()
+        if radius <= max_radius:
+            break
+
+    weights = np.bincount(assignment, minlength=len(medoids)).astype(np.int32)
+    return points[medoids], weights
+
+def compress_gallery(gallery, max_radius=0.3, max_prototypes=8):
+    """
+    Replace every identity's embeddings with weighted prototypes.
+
+    Args:
+        gallery (Gallery): Full gallery
+        max_radius (float): Maximum distance from an embedding to its prototype
+        max_prototypes (int): Upper bound on prototypes per identity
+
+    Returns:
+        Gallery: Compressed gallery with a "weights" section
+    """
+    prototypes = []
+    labels = []
+    weights = []
+    gallery_labels = np.asarray(gallery.labels)
+    for label in range(len(gallery.names)):
+        rows = np.flatnonzero(gallery_labels == label)
+        if len(rows) == 0:
+            continue
+        points, counts = compress_identity(gallery.embeddings[rows], max_radius, max_prototypes)
+        prototypes.append(points)
+        labels.append(np.full(len(points), label, dtype=np.int32))
+        weights.append(counts)
+
+    if prototypes:
+        embeddings = np.ascontiguousarray(np.vstack(prototypes), dtype=np.float32)
+        labels = np.concatenate(labels)
+        weights = np.concatenate(weights)
+    else:
+        embeddings = np.empty((0, gallery.dim), dtype=np.float32)
+        labels = np.empty(0, dtype=np.int32)
+        weights = np.empty(0, dtype=np.int32)
+
+    sections = dict(gallery.sections)
+    sections["weights"] = weights.astype("<i4")
+    return Gallery(embeddings, labels, gallery.names, sections=sections, meta=gallery.meta)
+
+def evaluate_compression(gallery, compressed, tolerance=0.5, sample=1000, seed=0, max_radius=0.3,
+                         max_prototypes=8, folds=5):
+    """
+    Compare recognition with the full and the compressed gallery on held-out faces.
+
+    A sample of the original embeddings is split into folds. Each fold is
+    removed from the full gallery, the people it belongs to are compressed
+    again without it, and its faces are matched against both. A face never
+    matches itself, so disagreements show where compression changed the
+    outcome for faces the gallery has not seen.
+
+    Args:
+        gallery (Gallery): Full gallery
+        compressed (Gallery): Compressed gallery
+        tolerance (float): Recognition tolerance used by the attendance system
+        sample (int): Number of embeddings to test
+        seed (int): Random seed for picking the sample
+        max_radius (float): max_radius the gallery was compressed with
+        max_prototypes (int): max_prototypes the gallery was compressed with
+        folds (int): Number of folds the sample is held out in
+
+    Returns:
+        float: Fraction of held-out faces recognized identically
+    """
+    if gallery.count == 0:
+        return 1.0
+
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(gallery.count, size=min(sample, gallery.count), replace=False))
+    embeddings = np.asarray(gallery.embeddings, dtype=np.float32)
+    labels = np.asarray(gallery.labels)
+    prototype_labels = np.asarray(compressed.labels)
+    prototype_weights = np.asarray(compressed.sections["weights"])
+
+    agree = 0
+    for fold in range(min(folds, len(rows))):
+        held = rows[fold::folds]
+        keep = np.ones(gallery.count, dtype=bool)
+        keep[held] = False
+        full = Gallery(embeddings[keep], labels[keep], gallery.names)
+
+        # Only the people with held-out faces need to be compressed again
+        affected = np.unique(labels[held])
+        untouched = ~np.isin(prototype_labels, affected)
+        points = [np.asarray(compressed.embeddings, dtype=np.float32)[untouched]]
+        point_labels = [prototype_labels[untouched]]
+        weights = [prototype_weights[untouched]]
+        for label in affected:
+            remaining = embeddings[keep & (labels == label)]
+            if len(remaining):
+                prototypes, counts = compress_identity(remaining, max_radius, max_prototypes)
+                points.append(prototypes)
+                point_labels.append(np.full(len(prototypes), label, dtype=np.int32))
+                weights.append(counts)
+        reduced = Gallery(np.ascontiguousarray(np.vstack(points), dtype=np.float32),
+                          np.concatenate(point_labels).astype(np.int32), gallery.names,
+                          sections={"weights": np.concatenate(weights).astype("<i4")})
+
+        if full.count == 0:
+            # Nothing left to match against: both galleries reject every face
+            agree += len(held)
+            continue
+        queries = embeddings[held]
+        full_matches = FaceMatcher(full, tolerance).match(queries)
+        compressed_matches = FaceMatcher(reduced, tolerance).match(queries)
+        agree += sum(a.name == b.name for a, b in zip(full_matches, compressed_matches))
+    return agree / float(len(rows))
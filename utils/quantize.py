@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Quantized gallery scans with exact re-ranking.
+Face encodings need far less precision than float32 to rank candidates,
+so the matcher can scan a float16 copy of the gallery (2x smaller) or an
+int8 copy with a scale and offset per dimension (4x smaller) instead,
+and only touch the float32 rows of the few candidates it re-ranks.
+NumPy converts float16 in software, so float16 saves memory but scans
+slower; int8 saves more and also scans faster than float32.
+
+Every quantized row stores how far it is from the original row. By the
+triangle inequality the exact distance to a face lies within that error
+of the quantized distance, so the re-ranked candidates are exactly the
+rows that can be within tolerance or the closest overall. The matcher
+recomputes the deciding distances in float64 for every scan, so every
+accept/reject decision is the same as with the float32 scan.
+"""
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8")
+
+# Sections stored in the gallery with one entry per row (sliced along
+# with the gallery) and with one entry per dimension (shared by all rows)
+QUANTIZED_ROW_SECTIONS = ("quantized", "quantized_norms", "quantized_errors")
+QUANTIZED_DIM_SECTIONS = ("quantized_scale", "quantized_offset")
+
+# Rows converted to float32 at a time while scanning; small enough for the
+# converted block to stay in cache while it is multiplied
+SCAN_BLOCK = 1024
+
+# Added to every row's error to cover float32 rounding in both scans
+ERROR_MARGIN = 1e-3
+
+def quantize_embeddings(embeddings, precision):
+    """
+    Quantize a gallery's embeddings.
+
+    Args:
+        embeddings (np.ndarray): (count, dim) float32 embeddings
+        precision (str): "float16" or "int8"
+
+    Returns:
+        dict: Gallery sections holding the quantized rows, their squared
+            norms and errors, and for int8 the per-dimension scale and offset
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    count, dim = embeddings.shape
+    sections = {}
+    if precision == "float16":
+        codes = np.empty((count, dim), dtype="<f2")
+        scale = offset = None
+    elif precision == "int8":
+        low = embeddings.min(axis=0) if count else np.zeros(dim, dtype=np.float32)
+        high = embeddings.max(axis=0) if count else np.ones(dim, dtype=np.float32)
+        scale = np.maximum((high - low) / 255.0, 1e-12).astype("<f4")
+        # Codes run from -128 to 127, so value = code * scale + offset
+        offset = (low + 128.0 * scale).astype("<f4")
+        codes = np.empty((count, dim), dtype="i1")
+        sections["quantized_scale"] = scale
+        sections["quantized_offset"] = offset
+    else:
+        raise ValueError(f"unsupported precision {precision!r}")
+
+    norms = np.empty(count, dtype="<f4")
+    errors = np.empty(count, dtype="<f4")
+    for start in range(0, count, SCAN_BLOCK):
+        block = embeddings[start:start + SCAN_BLOCK]
+        if scale is None:
+            codes[start:start + SCAN_BLOCK] = block
+            restored = codes[start:start + SCAN_BLOCK].astype(np.float32)
+        else:
+            block_codes = np.clip(np.rint((block - offset) / scale), -128, 127)
+            codes[start:start + SCAN_BLOCK] = block_codes
+            restored = block_codes.astype(np.float32) * scale + offset
+        norms[start:start + SCAN_BLOCK] = np.einsum("ij,ij->i", restored, restored)
+        errors[start:start + SCAN_BLOCK] = np.linalg.norm(block - restored, axis=1) + ERROR_MARGIN
+
+    sections.update({"quantized": codes, "quantized_norms": norms, "quantized_errors": errors})
+    return sections
+
+def quantized_precision(sections):
+    """
+    Return the precision of the quantized rows stored in a gallery.
+
+    Args:
+        sections (dict): Gallery sections
+
+    Returns:
+        str or None: "float16", "int8" or None if the gallery is not quantized
+    """
+    codes = sections.get("quantized")
+    if codes is None:
+        return None
+    return "int8" if np.dtype(codes.dtype).kind == "i" else "float16"
+
+class QuantizedScan:
+    """
+    Approximate distances from faces to every gallery row, with bounds.
+
+    Usage:
+        scan = QuantizedScan(gallery.sections)
+        approx = scan.distances(queries)  # (faces, count)
+        exact lies within approx +/- scan.errors
+    """
+
+    def __init__(self, sections):
+        """
+        Args:
+            sections (dict): Gallery sections written by quantize_embeddings
+        """
+        self.codes = sections["quantized"]
+        self.norms = np.asarray(sections["quantized_norms"], dtype=np.float32)
+        self.errors = np.asarray(sections["quantized_errors"], dtype=np.float32)
+        self.scale = sections.get("quantized_scale")
+        self.offset = sections.get("quantized_offset")
+        self.precision = quantized_precision(sections)
+
+    @property
+    def nbytes(self):
+        """int: Bytes read per scan."""
+        return int(self.codes.nbytes + self.norms.nbytes + self.errors.nbytes)
+
+    def distances(self, queries):
+        """
+        Compute distances from faces to the quantized rows.
+
+        Args:
+            queries (np.ndarray): (faces, dim) float32 face encodings
+
+        Returns:
+            np.ndarray: (faces, count) float32 approximate distances
+        """
+        if self.scale is None:
+            weighted = np.ascontiguousarray(queries.T)
+            shift = np.zeros(len(queries), dtype=np.float32)
+        else:
+            # y . (code * scale + offset) = code . (y * scale) + y . offset
+            weighted = np.ascontiguousarray((queries * self.scale).T, dtype=np.float32)
+            shift = queries @ np.asarray(self.offset, dtype=np.float32)
+
+        count = len(self.codes)
+        dots = np.empty((count, len(queries)), dtype=np.float32)
+        block = np.empty((SCAN_BLOCK, self.codes.shape[1]), dtype=np.float32)
+        for start in range(0, count, SCAN_BLOCK):
+            codes = self.codes[start:start + SCAN_BLOCK]
+            np.copyto(block[:len(codes)], codes, casting="unsafe")
+            np.matmul(block[:len(codes)], weighted, out=dots[start:start + SCAN_BLOCK])
+        squared = dots.T.copy()
+        squared += shift[:, None]
+        squared *= -2.0
+        squared += self.norms[None, :]
+        squared += np.einsum("ij,ij->i", queries, queries)[:, None]
+        np.maximum(squared, 0.0, out=squared)
+        return np.sqrt(squared, out=squared)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Recording and deterministic replay of camera sessions.
+A recording is a single .frec file: an 8-byte magic, a JSON header and
+one record per frame holding its sequence number, its timestamp relative
+to the first frame and the frame encoded as JPEG (or lossless PNG).
+ReplaySource plays a recording back through the same interface as
+FrameGrabber, either at the recorded pace with latest-frame semantics, or
+as fast as the consumer reads with every frame delivered exactly once,
+which makes two runs over the same recording comparable frame by frame.
+"""
+import json
+import struct
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from utils.capture import FrameGrabber
+
+RECORDING_MAGIC = b"FRFRAMES"
+RECORDING_VERSION = 1
+RECORDING_EXTENSION = ".frec"
+
+# Per-frame record header: payload length, sequence number, seconds since the first frame.
+_RECORD = struct.Struct("<IId")
+
+class FrameRecorder:
+    """
+    Writes frames and timestamps to a .frec file.
+    """
+
+    def __init__(self, path, codec="jpg", quality=90):
+        """
+        Create the recording.
+
+        Args:
+            path (str): Output file
+            codec (str): "jpg" (compact) or "png" (lossless)
+            quality (int): JPEG quality
+        """
+        if codec not in ("jpg", "png"):
+            raise ValueError(f"Unsupported codec '{codec}', choose jpg or png")
+        self.path = path
+        self.codec = codec
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, quality] if codec == "jpg" else []
+        self.frames = 0
+        self._start = None
+        self._lock = threading.Lock()
+
+        header = json.dumps({"version": RECORDING_VERSION, "codec": codec, "created": time.time()}).encode("utf-8")
+        self.file = open(path, "wb")
+        self.file.write(RECORDING_MAGIC + struct.pack("<I", len(header)) + header)
+
+    def write(self, frame, timestamp=None):
+        """
+        Append a frame.
+
+        Args:
+            frame (np.ndarray): BGR frame
+            timestamp (float, optional): time.monotonic() of the capture
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        ok, payload = cv2.imencode("." + self.codec, frame, self.params)
+        if not ok:
+            return
+        with self._lock:
+            if self.file is None:
+                return
+            if self._start is None:
+                self._start = timestamp
+            self.frames += 1
+            self.file.write(_RECORD.pack(len(payload), self.frames, timestamp - self._start))
+            self.file.write(payload.tobytes())
+
+    def close(self):
+        """Finish the recording."""
+        with self._lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+                print(f"[INFO] Recorded {self.frames} frames to {self.path}")
+
+def read_recording(path):
+    """
+    Iterate over the frames of a recording.
+
+    Args:
+        path (str): .frec file
+
+    Yields:
+        tuple: (sequence number, seconds since the first frame, BGR frame)
+    """
+    with open(path, "rb") as f:
+        if f.read(len(RECORDING_MAGIC)) != RECORDING_MAGIC:
+            raise ValueError(f"{path} is not a frame recording")
+        (header_length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_length).decode("utf-8"))
+        if header.get("version") != RECORDING_VERSION:
+            raise ValueError(f"Unsupported recording version {header.get('version')}")
+
+        while True:
+            raw = f.read(_RECORD.size)
+            if len(raw) < _RECORD.size:
+                return
+            length, seq, offset = _RECORD.unpack(raw)
+            payload = f.read(length)
+            if len(payload) < length:
+                # Truncated last frame, e.g. the recorder was killed
+                return
+            frame = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if frame is not None:
+                yield seq, offset, frame
+
+def is_recording(source):
+    """
+    Check whether a source names a recording.
+
+    Args:
+        source (int or str): Video source
+
+    Returns:
+        bool: True for .frec files
+    """
+    return isinstance(source, str) and source.endswith(RECORDING_EXTENSION)
+
+class ReplaySource(FrameGrabber):
+    """
+    Plays a recording through the FrameGrabber interface.
+
+    With speed > 0 frames are published at the recorded pace (scaled by
+    speed) and frames the consumer is too slow for are dropped, like a
+    live camera. With speed 0 every frame is delivered, each as soon as
+    the previous one was read, so runs are repeatable.
+    """
+
+    def __init__(self, path, speed=1.0, on_frame=None):
+        """
+        Open the recording.
+
+        Args:
+            path (str): .frec file
+            speed (float): Playback speed relative to the recording (0 for as fast as possible)
+            on_frame (callable, optional): Called after every published frame
+        """
+        self.source = path
+        self.speed = speed
+        self.on_frame = on_frame
+        self.recorder = None
+        self.capture = None
+        self._init_state()
+        try:
+            with open(path, "rb") as f:
+                self._opened = f.read(len(RECORDING_MAGIC)) == RECORDING_MAGIC
+        except OSError:
+            self._opened = False
+
+    def isOpened(self):
+        return self._opened
+
+    def _reader(self):
+        """Publish the recorded frames at the chosen pace."""
+        start = time.monotonic()
+        try:
+            for _, offset, frame in read_recording(self.source):
+                if not self._running:
+                    return
+                if self.speed > 0:
+                    delay = start + offset / self.speed - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                else:
+                    # Hand over every frame: wait until the previous one was read
+                    with self._condition:
+                        self._condition.wait_for(lambda: self._last_read >= self._seq or not self._running)
+                self._publish(frame)
+        except ValueError as e:
+            print(f"❌ {e}")
+        finally:
+            self._finish()
+
+def open_frame_source(source=0, on_frame=None, record=None, replay_speed=1.0):
+    """
+    Open a camera, video, stream or recording as a threaded frame source.
+
+    Args:
+        source (int or str): Camera index, video file, stream URL or .frec recording
+        on_frame (callable, optional): Called after every new frame
+        record (str, optional): Save the captured frames to this .frec file
+        replay_speed (float): Playback speed for recordings (0 for as fast as possible)
+
+    Returns:
+        FrameGrabber: The frame source (not started yet)
+    """
+    if is_recording(source):
+        return ReplaySource(source, speed=replay_speed, on_frame=on_frame)
+    recorder = FrameRecorder(record) if record else None
+    return FrameGrabber(source, on_frame=on_frame, recorder=recorder)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Hot reloading of the gallery in a running recognizer.
+A background thread watches the gallery and its IVF index for a new
+version (or is woken by SIGHUP), builds a complete new matcher off the
+frame-processing path and then swaps it in with a single reference
+assignment. Each frame reads the current matcher once, so a frame in
+flight keeps using the version it started with and never sees a
+half-built gallery; the old version is released when its last frame
+finishes.
+"""
+import signal
+import threading
+
+from utils.ann_index import get_index_path
+from utils.face_utils import load_matcher
+from utils.gallery import file_signature
+
+class MatcherReloader:
+    """
+    Holds the current FaceMatcher and replaces it when the gallery changes.
+
+    Usage:
+        reloader = MatcherReloader("encodings.gallery")
+        reloader.start()
+        matcher = reloader.matcher  # once per frame
+        ...
+        reloader.stop()
+    """
+
+    def __init__(self, encodings_path, tolerance=0.5, nprobe=8, poll_interval=2.0, shards=1):
+        """
+        Load the initial matcher.
+
+        Args:
+            encodings_path (str): Path to the gallery file
+            tolerance (float): Recognition tolerance
+            nprobe (int): IVF lists scanned per face (0 for exhaustive matching)
+            poll_interval (float): Seconds between checks of the files (0 to
+                only reload on request or SIGHUP)
+            shards (int): Shards exhaustive matching is split into
+        """
+        self.encodings_path = encodings_path
+        self.tolerance = tolerance
+        self.nprobe = nprobe
+        self.poll_interval = poll_interval
+        self.shards = shards
+        self.version = 0
+
+        self._signature = self._signatures()
+        self.matcher = load_matcher(encodings_path, tolerance=tolerance, nprobe=nprobe, shards=shards)
+
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+
+    def _signatures(self):
+        return (file_signature(self.encodings_path),
+                file_signature(get_index_path(self.encodings_path)))
+
+    def start(self):
+        """
+        Start watching for new gallery versions.
+
+        Returns:
+            MatcherReloader: self, for chaining
+        """
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._watch, name="gallery-reloader", daemon=True)
+            self._thread.start()
+        return self
+
+    def request_reload(self):
+        """Reload on the watcher thread as soon as possible, changed or not."""
+        self._signature = None
+        self._wake.set()
+
+    def install_signal_handler(self):
+        """
+        Reload on SIGHUP.
+
+        Returns:
+            bool: True if the handler was installed (the platform supports
+                  SIGHUP and this is the main thread)
+        """
+        if not hasattr(signal, "SIGHUP") or threading.current_thread() is not threading.main_thread():
+            return False
+        signal.signal(signal.SIGHUP, lambda signum, frame: self.request_reload())
+        return True
+
+    def _watch(self):
+        """Poll the gallery files and reload when they change."""
+        pending = None
+        while self._running:
+            self._wake.wait(self.poll_interval or None)
+            self._wake.clear()
+            if not self._running:
+                break
+
+            signature = self._signatures()
+            if signature == self._signature:
+                pending = None
+                continue
+            if self._signature is not None and signature != pending:
+                # Wait one more interval so the gallery and the index written
+                # right after it are picked up together.
+                pending = signature
+                if self.poll_interval:
+                    continue
+            pending = None
+            self._reload(signature)
+
+    def _reload(self, signature):
+        """Build a new matcher and swap it in."""
+        try:
+            matcher = load_matcher(self.encodings_path, tolerance=self.tolerance, nprobe=self.nprobe,
+                                   verbose=False, shards=self.shards)
+        except Exception as e:
+            print(f"[WARNING] Could not reload {self.encodings_path}, keeping the current gallery: {e}")
+            self._signature = signature
+            return
+        if matcher is None:
+            print(f"[WARNING] {self.encodings_path} is empty, keeping the current gallery.")
+            self._signature = signature
+            return
+
+        # A single reference assignment: frames already running keep the old
+        # matcher, the next frame gets the new one.
+        self.matcher = matcher
+        self._signature = signature
+        self.version += 1
+        index = "with IVF index" if matcher.index is not None else "without index"
+        print(f"[INFO] Reloaded gallery: {matcher.count} encodings for {len(matcher.names)} people, {index}.")
+
+    def stop(self):
+        """Stop the watcher thread."""
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Fair scheduling of several cameras onto a shared worker pool.
+Every camera keeps its own capture thread and only ever exposes its latest
+frame. Worker threads ask the scheduler for the next camera to process;
+the scheduler uses stride scheduling, so each camera gets an equal share
+of the workers, and cameras that recently had faces in view get a larger
+share than empty doorways. A camera is handed to at most one worker at a
+time, which keeps its tracker state in frame order.
+"""
+import threading
+import time
+
+class CameraStream:
+    """
+    A camera and the recognition state that belongs to it.
+
+    Attributes:
+        name (str): Camera name used in windows, logs and metrics
+        grabber (FrameGrabber): Capture thread of the camera (or a ReplaySource)
+        tracker (FaceTracker): Face tracker of the camera
+        metrics (PipelineMetrics): Metrics of the camera
+        frame_index (int): Number of frames processed
+        fps (float): Smoothed processing rate
+        display (np.ndarray or None): Latest annotated frame
+        display_seq (int): Increases whenever display is replaced
+        gallery_version (int): Gallery version the tracker's identities came from
+        motion (MotionGate or None): Motion gate of the camera
+        controller (AdaptiveController or None): Detection scale and cadence controller
+        faces (list): ((top, right, bottom, left), name) pairs of the last processed frame
+    """
+
+    def __init__(self, name, grabber, tracker, metrics, motion=None, controller=None):
+        self.name = name
+        self.grabber = grabber
+        self.tracker = tracker
+        self.metrics = metrics
+        self.frame_index = 0
+        self.fps = 0.0
+        self.display = None
+        self.display_seq = 0
+        self.gallery_version = 0
+        self.motion = motion
+        self.controller = controller
+        self.faces = []
+
+        self.busy = False
+        self.pass_value = 0.0
+        self.last_activity = None
+        self._last_done = None
+
+    @property
+    def ready(self):
+        """bool: True if a new frame is waiting and no worker holds the camera."""
+        return not self.busy and self.grabber.backlog > 0
+
+    @property
+    def backlog(self):
+        """int: Frames captured since the last processed frame."""
+        return self.grabber.backlog
+
+    @property
+    def finished(self):
+        """bool: True once a finite source (a replay) has been fully processed."""
+        return self.grabber.finished and self.grabber.backlog == 0 and not self.busy
+
+    def status(self):
+        """
+        Summarize the camera.
+
+        Returns:
+            dict: name, fps, backlog, dropped, processed and motion-skipped frames
+        """
+        return {
+            "name": self.name,
+            "fps": round(self.fps, 1),
+            "backlog": self.backlog,
+            "dropped": self.grabber.dropped,
+            "frames": self.frame_index,
+            "skipped": self.motion.skipped if self.motion is not None else 0,
+        }
+
+class FairScheduler:
+    """
+    Stride scheduler handing cameras with a new frame to worker threads.
+
+    Usage:
+        scheduler = FairScheduler()
+        scheduler.add(CameraStream(name, open_frame_source(0, on_frame=scheduler.notify), ...))
+        camera = scheduler.acquire()
+        ... process camera.grabber.read() ...
+        scheduler.release(camera, faces=len(boxes))
+    """
+
+    def __init__(self, cameras=None, active_weight=4.0, activity_window=2.0):
+        """
+        Set up the scheduler.
+
+        Args:
+            cameras (list, optional): CameraStream objects to schedule
+            active_weight (float): Share of an active camera relative to an idle one
+            activity_window (float): Seconds a camera stays active after its last face
+        """
+        self.cameras = list(cameras or [])
+        self.active_weight = active_weight
+        self.activity_window = activity_window
+        self.running = True
+        self._virtual_time = 0.0
+        self._condition = threading.Condition()
+
+    def add(self, camera):
+        """
+        Add a camera to the schedule.
+
+        Args:
+            camera (CameraStream): Camera to add
+        """
+        with self._condition:
+            camera.pass_value = self._virtual_time
+            self.cameras.append(camera)
+
+    def notify(self):
+        """Wake waiting workers; passed to the grabbers as their on_frame callback."""
+        with self._condition:
+            self._condition.notify_all()
+
+    def is_active(self, camera, now=None):
+        """
+        Check whether a camera had faces in view recently.
+
+        Args:
+            camera (CameraStream): Camera to check
+            now (float, optional): Current time.monotonic()
+
+        Returns:
+            bool: True if the camera gets the active share
+        """
+        if camera.last_activity is None:
+            return False
+        now = time.monotonic() if now is None else now
+        return now - camera.last_activity <= self.activity_window
+
+    def acquire(self, timeout=0.5):
+        """
+        Wait for the next camera to process.
+
+        Args:
+            timeout (float): Maximum seconds to wait
+
+        Returns:
+            CameraStream or None: The camera, now held by the caller, or None
+                on timeout or shutdown
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: not self.running or any(c.ready for c in self.cameras), timeout)
+            if not self.running:
+                return None
+            ready = [c for c in self.cameras if c.ready]
+            if not ready:
+                return None
+
+            camera = min(ready, key=lambda c: c.pass_value)
+            # A camera that was idle does not get to catch up in a burst.
+            camera.pass_value = max(camera.pass_value, self._virtual_time)
+            self._virtual_time = camera.pass_value
+            camera.busy = True
+            return camera
+
+    def release(self, camera, faces=0):
+        """
+        Hand a camera back after processing one of its frames.
+
+        Args:
+            camera (CameraStream): Camera returned by acquire
+            faces (int): Faces found in the frame
+        """
+        now = time.monotonic()
+        with self._condition:
+            if faces:
+                camera.last_activity = now
+            weight = self.active_weight if self.is_active(camera, now) else 1.0
+            camera.pass_value += 1.0 / weight
+            if camera._last_done is not None:
+                interval = max(now - camera._last_done, 1e-6)
+                camera.fps = 1.0 / interval if camera.fps == 0.0 else 0.9 * camera.fps + 0.1 / interval
+            camera._last_done = now
+            camera.busy = False
+            self._condition.notify_all()
+
+    def stop(self):
+        """Wake every worker and make acquire return None."""
+        with self._condition:
+            self.running = False
+            self._condition.notify_all()
+
+    def status(self):
+        """
+        Summarize every camera.
+
+        Returns:
+            list: One dict per camera from CameraStream.status
+        """
+        return [camera.status() for camera in self.cameras]
+
+def format_status(status):
+    """
+    Format camera statuses as one line.
+
+    Args:
+        status (list): Output of FairScheduler.status
+
+    Returns:
+        str: Human readable summary
+    """
+    return "[CAMERAS] " + " | ".join(
+        f"{s['name']}: {s['fps']:.1f} fps, backlog {s['backlog']}, {s['dropped']} dropped, "
+        f"{s['skipped']} skipped" for s in status)
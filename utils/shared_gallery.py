@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Shared-memory gallery for several recognizer processes on one host.
+A publisher writes the gallery once into a RAM-backed file system
+(/dev/shm where available) in the regular gallery format, with the squared
+norms the matcher needs precomputed. Workers open it with load_gallery,
+which memory-maps it read-only, and FaceMatcher uses the mapped arrays
+as they are, so all workers share one copy of the pages.
+
+Every publish writes a complete new version next to the current one and
+renames it into place. A worker that mapped the old version keeps reading
+it undisturbed until its reloader switches to the new one; the kernel
+frees the old pages when the last worker lets go of them.
+"""
+import os
+import time
+import tempfile
+import multiprocessing
+
+import numpy as np
+
+from utils.ann_index import IVFIndex, get_index_path, load_index, save_index
+from utils.gallery import Gallery, file_signature, load_gallery, read_gallery_header, save_gallery
+
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+def shared_gallery_path(name="encodings", directory=None):
+    """
+    Return where a shared gallery is published.
+
+    Args:
+        name (str): Name of the shared gallery
+        directory (str, optional): Directory to publish in (default SHARED_DIR)
+
+    Returns:
+        str: Path workers pass as their encodings file
+    """
+    return os.path.join(directory or SHARED_DIR, f"facerec-{name}.gallery")
+
+def published_version(path):
+    """
+    Return the version of a published gallery.
+
+    Args:
+        path (str): Path of the shared gallery
+
+    Returns:
+        int: Version number, or 0 if nothing is published
+    """
+    try:
+        return int(read_gallery_header(path).get("publish_version", 0))
+    except (OSError, ValueError):
+        return 0
+
+def publish_gallery(source_path, path):
+    """
+    Publish a gallery file (and its IVF index) as a new shared version.
+
+    Args:
+        source_path (str): Gallery file to publish
+        path (str): Path of the shared gallery
+
+    Returns:
+        int: The published version, or 0 if the source gallery is empty
+    """
+    source = load_gallery(source_path)
+    if source.count == 0:
+        return 0
+
+    embeddings = np.ascontiguousarray(source.embeddings, dtype=np.float32)
+    sections = dict(source.sections)
+    sections["norms"] = np.einsum("ij,ij->i", embeddings, embeddings).astype("<f4")
+    meta = dict(source.meta)
+    meta["publish_version"] = published_version(path) + 1
+    meta["source"] = os.path.abspath(source_path)
+    shared = Gallery(embeddings, source.labels, source.names, sections=sections, meta=meta)
+    save_gallery(shared, path)
+
+    index_path = get_index_path(path)
+    index = load_index(get_index_path(source_path), source)
+    if index is not None:
+        # The index is tied to the gallery it was built for by its creation time
+        save_index(IVFIndex(index.centroids, index.offsets, index.row_ids, shared.meta["created"]), index_path)
+    elif os.path.exists(index_path):
+        os.unlink(index_path)
+    return meta["publish_version"]
+
+def unpublish_gallery(path):
+    """
+    Remove a shared gallery; workers that mapped it keep their copy.
+
+    Args:
+        path (str): Path of the shared gallery
+    """
+    for file_path in (path, get_index_path(path)):
+        if os.path.exists(file_path):
+            os.unlink(file_path)
+
+class GalleryPublisher:
+    """
+    Keeps a shared gallery in step with its source file.
+
+    Usage:
+        publisher = GalleryPublisher("encodings.gallery", shared_gallery_path())
+        publisher.publish()
+        while running:
+            publisher.poll()
+        publisher.close()
+    """
+
+    def __init__(self, source_path, path):
+        """
+        Args:
+            source_path (str): Gallery file written by the encode command
+            path (str): Path of the shared gallery
+        """
+        self.source_path = source_path
+        self.path = path
+        self.version = 0
+        self._signature = None
+
+    def _signatures(self):
+        return (file_signature(self.source_path), file_signature(get_index_path(self.source_path)))
+
+    def publish(self):
+        """
+        Publish the source gallery now.
+
+        Returns:
+            int: The published version, or 0 if the source gallery is empty
+        """
+        self._signature = self._signatures()
+        version = publish_gallery(self.source_path, self.path)
+        if version:
+            self.version = version
+        return version
+
+    def poll(self):
+        """
+        Publish again if the source gallery or its index changed.
+
+        Returns:
+            bool: True if a new version was published
+        """
+        signature = self._signatures()
+        if signature == self._signature:
+            return False
+        # Let a re-encode finish writing the gallery and its index first
+        time.sleep(0.5)
+        return bool(self.publish())
+
+    def close(self):
+        """Remove the shared gallery."""
+        unpublish_gallery(self.path)
+
+def _memory_usage():
+    """Rss, Pss and shared kB of this process, from /proc/self/smaps_rollup."""
+    usage = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty"):
+                usage[key] = int(value.split()[0])
+    usage["Shared"] = usage.pop("Shared_Clean", 0) + usage.pop("Shared_Dirty", 0)
+    return usage
+
+def _measure_worker(path, queries, ready, measure, done, results):
+    """Attach to the shared gallery like a recognizer, match, and report memory."""
+    from utils.matcher import FaceMatcher
+
+    before = _memory_usage()
+    matcher = FaceMatcher(load_gallery(path), nprobe=0)
+    matcher.match(queries)
+    ready.release()
+    # Measure once every worker is attached, so Pss splits the shared pages
+    # between all of them, and stay attached until all have measured
+    measure.wait()
+    after = _memory_usage()
+    results.put({key: after[key] - before[key] for key in after})
+    done.wait()
+
+def measure_workers(path, workers=4, faces=4):
+    """
+    Start worker processes that attach to a shared gallery and measure
+    how much memory each adds.
+
+    Every worker matches against the whole gallery, so all of its pages
+    are mapped. Pss charges shared pages to the processes mapping them in
+    equal parts, so the sum over workers stays near one gallery's size
+    when nothing is copied.
+
+    Args:
+        path (str): Path of the shared gallery
+        workers (int): Number of worker processes
+        faces (int): Faces matched per worker
+
+    Returns:
+        dict or None: Gallery size and per-worker Rss/Pss growth in kB,
+            or None where /proc/self/smaps_rollup is not available
+    """
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        return None
+
+    dim = read_gallery_header(path)["dim"]
+    queries = np.random.default_rng(0).normal(0.0, 0.1, (faces, dim)).astype(np.float32)
+    context = multiprocessing.get_context("spawn")
+    ready = context.Semaphore(0)
+    measure = context.Event()
+    done = context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=_measure_worker, args=(path, queries, ready, measure, done, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        for _ in processes:
+            ready.acquire()
+        measure.set()
+        usage = [results.get() for _ in processes]
+    finally:
+        done.set()
+        for process in processes:
+            process.join()
+
+    return {
+        "gallery_kb": os.path.getsize(path) // 1024,
+        "workers": usage,
+        "rss_kb": sum(worker["Rss"] for worker in usage),
+        "pss_kb": sum(worker["Pss"] for worker in usage),
+    }
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Synthetic galleries, queries and frames for benchmarks.
+Embeddings are drawn around one random centre per person so distances
+look like face_recognition's: rows of the same person are about 0.35
+apart, different people about 0.8, and a query of an enrolled person
+lands within the usual 0.5 tolerance of that person's rows. Frames are
+drawn with OpenCV, so nothing needs a camera, a dataset or a download.
+"""
+import cv2
+import numpy as np
+
+from utils.gallery import EMBEDDING_DIM, Gallery
+
+# Length of every person's centre; two centres are about sqrt(2) * radius apart.
+CENTRE_RADIUS = 0.65
+# Per-row noise; two rows of one person are about sqrt(2) * spread apart.
+ROW_SPREAD = 0.25
+
+def _noise(rng, rows, dim, spread):
+    """Gaussian noise whose vectors have an expected length of spread."""
+    return (rng.standard_normal((rows, dim), dtype=np.float32) * (spread / np.sqrt(dim))).astype(np.float32)
+
+def synthetic_gallery(count, rows_per_person=10, dim=EMBEDDING_DIM, seed=0, chunk=100000):
+    """
+    Generate a gallery of random people.
+
+    Args:
+        count (int): Number of embeddings
+        rows_per_person (int): Embeddings per person
+        dim (int): Embedding dimension
+        seed (int): Random seed
+        chunk (int): Rows generated at a time, to bound temporary memory
+
+    Returns:
+        Gallery: Gallery with count rows and "centres" as an extra section
+    """
+    rng = np.random.default_rng(seed)
+    people = max(1, int(np.ceil(count / float(rows_per_person))))
+    centres = rng.standard_normal((people, dim), dtype=np.float32)
+    centres *= CENTRE_RADIUS / np.linalg.norm(centres, axis=1, keepdims=True)
+
+    labels = (np.arange(count) // rows_per_person).astype(np.int32)
+    embeddings = np.empty((count, dim), dtype=np.float32)
+    for start in range(0, count, chunk):
+        end = min(count, start + chunk)
+        embeddings[start:end] = centres[labels[start:end]] + _noise(rng, end - start, dim, ROW_SPREAD)
+
+    names = [f"person_{i:07d}" for i in range(people)]
+    return Gallery(embeddings, labels, names, sections={"centres": centres})
+
+def synthetic_queries(gallery, count, unknown_ratio=0.2, seed=1):
+    """
+    Generate face encodings to match against a synthetic gallery.
+
+    Args:
+        gallery (Gallery): Gallery from synthetic_gallery
+        count (int): Number of queries
+        unknown_ratio (float): Fraction of queries from people not in the gallery
+        seed (int): Random seed
+
+    Returns:
+        tuple: ((count, dim) float32 queries, expected name per query or None for unknown)
+    """
+    rng = np.random.default_rng(seed)
+    centres = gallery.sections["centres"]
+    dim = centres.shape[1]
+    queries = np.empty((count, dim), dtype=np.float32)
+    expected = []
+    for i in range(count):
+        if rng.random() < unknown_ratio:
+            centre = rng.standard_normal(dim).astype(np.float32)
+            centre *= CENTRE_RADIUS / np.linalg.norm(centre)
+            expected.append(None)
+        else:
+            label = int(rng.integers(len(centres)))
+            centre = centres[label]
+            expected.append(gallery.names[label])
+        queries[i] = centre + _noise(rng, 1, dim, ROW_SPREAD)[0]
+    return queries, expected
+
+def synthetic_frames(count, width=640, height=480, faces=1, seed=0):
+    """
+    Draw frames with simple face-like figures on a textured background.
+
+    The figures are not real faces, so detectors may or may not find them;
+    the frames exercise the same image sizes and code paths as a camera.
+
+    Args:
+        count (int): Number of frames
+        width (int): Frame width
+        height (int): Frame height
+        faces (int): Figures per frame
+        seed (int): Random seed
+
+    Returns:
+        list: BGR frames
+    """
+    rng = np.random.default_rng(seed)
+    background = rng.integers(60, 120, size=(height // 8, width // 8, 3), dtype=np.uint8)
+    background = cv2.resize(background, (width, height), interpolation=cv2.INTER_LINEAR)
+
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        for j in range(faces):
+            size = int(height * rng.uniform(0.2, 0.35))
+            cx = int((j + 0.5) * width / faces + rng.integers(-10, 11) + 5 * np.sin(i / 5.0))
+            cy = int(height / 2 + rng.integers(-10, 11))
+            cv2.ellipse(frame, (cx, cy), (int(size * 0.4), size // 2), 0, 0, 360, (150, 170, 210), -1)
+            for dx in (-1, 1):
+                cv2.circle(frame, (cx + dx * size // 6, cy - size // 10), max(2, size // 16), (40, 40, 40), -1)
+            cv2.ellipse(frame, (cx, cy + size // 5), (size // 6, size // 16), 0, 0, 180, (60, 60, 140), 2)
+        frames.append(frame)
+    return frames
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Lightweight IoU / centroid face tracker.
+The same person usually stays in view for hundreds of frames, so the
+recognition loop only needs to encode and match a face when it first
+appears and then every so often to re-verify it. The tracker links each
+detected box to a track from the previous frames and caches the identity
+assigned to that track.
+"""
+import numpy as np
+
+from utils.matcher import UNKNOWN_NAME
+
+class Track:
+    """
+    A face followed across frames.
+
+    Attributes:
+        track_id (int): Unique id of the track
+        box (tuple): Latest (top, right, bottom, left) box
+        name (str or None): Cached identity, None until the face is encoded
+        distance (float or None): Distance of the cached identity
+        last_seen (int): Frame index the track was last detected in
+        last_verified (int or None): Frame index of the last encoding
+    """
+
+    def __init__(self, track_id, box, frame_index):
+        self.track_id = track_id
+        self.box = box
+        self.name = None
+        self.distance = None
+        self.last_seen = frame_index
+        self.last_verified = None
+
+    def assign(self, match, frame_index):
+        """
+        Cache the result of matching this track's face.
+
+        Args:
+            match (Match): Result from the matcher
+            frame_index (int): Frame the face was encoded in
+        """
+        self.name = match.name
+        self.distance = match.distance
+        self.last_verified = frame_index
+
+def _iou(box, boxes):
+    """Intersection over union of one box against many (top, right, bottom, left) boxes."""
+    top = np.maximum(box[0], boxes[:, 0])
+    right = np.minimum(box[1], boxes[:, 1])
+    bottom = np.minimum(box[2], boxes[:, 2])
+    left = np.maximum(box[3], boxes[:, 3])
+    intersection = np.clip(right - left, 0, None) * np.clip(bottom - top, 0, None)
+    area = (box[1] - box[3]) * (box[2] - box[0])
+    areas = (boxes[:, 1] - boxes[:, 3]) * (boxes[:, 2] - boxes[:, 0])
+    union = area + areas - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)
+
+def _centroid_distance(box, boxes):
+    """Centroid distance of one box to many, relative to the box size."""
+    centre = np.array([(box[0] + box[2]) / 2.0, (box[1] + box[3]) / 2.0])
+    centres = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2.0, (boxes[:, 1] + boxes[:, 3]) / 2.0], axis=1)
+    size = max(box[2] - box[0], box[1] - box[3], 1)
+    return np.linalg.norm(centres - centre, axis=1) / size
+
+class FaceTracker:
+    """
+    Greedy IoU tracker with a centroid fallback for fast movement.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_centroid_shift=0.5, max_missed=10,
+                 reverify_interval=30, unknown_retry_interval=5):
+        """
+        Configure the tracker.
+
+        Args:
+            iou_threshold (float): Minimum IoU to continue a track
+            max_centroid_shift (float): Maximum centroid movement, relative to
+                the face size, to continue a track when IoU is too low
+            max_missed (int): Frames a track survives without a detection
+            reverify_interval (int): Frames between re-encoding a known face
+            unknown_retry_interval (int): Frames between re-encoding an unknown face
+        """
+        self.iou_threshold = iou_threshold
+        self.max_centroid_shift = max_centroid_shift
+        self.max_missed = max_missed
+        self.reverify_interval = reverify_interval
+        self.unknown_retry_interval = unknown_retry_interval
+        self.tracks = []
+        self._next_id = 1
+
+    def update(self, boxes, frame_index):
+        """
+        Associate this frame's detections with existing tracks.
+
+        Args:
+            boxes (list): (top, right, bottom, left) face boxes
+            frame_index (int): Index of the current frame
+
+        Returns:
+            list: The Track for every box, in input order
+        """
+        self.tracks = [t for t in self.tracks if frame_index - t.last_seen <= self.max_missed]
+
+        assigned = [None] * len(boxes)
+        if boxes and self.tracks:
+            detections = np.asarray(boxes, dtype=np.float64)
+            previous = np.asarray([t.box for t in self.tracks], dtype=np.float64)
+
+            # Score every (track, detection) pair, IoU first, centroid second.
+            pairs = []
+            for ti in range(len(self.tracks)):
+                ious = _iou(previous[ti], detections)
+                shifts = _centroid_distance(previous[ti], detections)
+                for di in range(len(boxes)):
+                    if ious[di] >= self.iou_threshold:
+                        pairs.append((1.0 + ious[di], ti, di))
+                    elif shifts[di] <= self.max_centroid_shift:
+                        pairs.append((1.0 - shifts[di], ti, di))
+
+            used_tracks = set()
+            for _, ti, di in sorted(pairs, reverse=True):
+                if ti in used_tracks or assigned[di] is not None:
+                    continue
+                used_tracks.add(ti)
+                assigned[di] = self.tracks[ti]
+
+        for di, box in enumerate(boxes):
+            track = assigned[di]
+            if track is None:
+                track = Track(self._next_id, box, frame_index)
+                self._next_id += 1
+                self.tracks.append(track)
+                assigned[di] = track
+            track.box = box
+            track.last_seen = frame_index
+
+        return assigned
+
+    def needs_encoding(self, track, frame_index):
+        """
+        Decide whether a track's face should be encoded in this frame.
+
+        Args:
+            track (Track): Track to check
+            frame_index (int): Index of the current frame
+
+        Returns:
+            bool: True for new tracks and tracks due for re-verification
+        """
+        if track.last_verified is None:
+            return True
+        interval = self.unknown_retry_interval if track.name == UNKNOWN_NAME else self.reverify_interval
+        return frame_index - track.last_verified >= interval